@@ -8,6 +8,23 @@ from PIL import Image
 import requests
 from streamlit_option_menu import option_menu
 import time
+import re
+import secrets
+import uuid
+import streamlit.components.v1 as components
+from lmu_buddy_memory import BoundedHistory, memory_report
+from lmu_buddy_session_store import SQLiteSessionStore, SessionManager
+
+# Maximum number of chat messages kept per session
+MAX_CHAT_HISTORY = 100
+HEDGE_DEADLINE = 20.0  # seconds the LLM has to upgrade an instant rule-based answer
+
+# Session persistence (SQLite in WAL mode; swap the store for other backends)
+SESSION_DB_PATH = "lmu_sessions.db"
+SESSION_IDLE_TTL = 30 * 60
+SESSION_RETENTION = 30 * 24 * 60 * 60  # saved chats (and the cookie pointing at them) expire after 30 days
+SESSION_COOKIE = "lmu_buddy_session"
+SESSION_ID_PATTERN = re.compile(r"[0-9a-f]{64}")
 
 # Page configuration
 st.set_page_config(
@@ -77,9 +94,66 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Session persistence shared by every Streamlit session in this process
+@st.cache_resource
+def get_session_manager():
+    return SessionManager(SQLiteSessionStore(SESSION_DB_PATH), idle_ttl=SESSION_IDLE_TTL,
+                          retention=SESSION_RETENTION)
+
+def set_session_cookie(session_id):
+    """Remember the session id in this browser; it never appears in the (shareable) URL"""
+    components.html(f"""<script>
+        const secure = window.parent.location.protocol === "https:" ? "; Secure" : "";
+        window.parent.document.cookie = "{SESSION_COOKIE}={session_id}; path=/; max-age={SESSION_RETENTION}; SameSite=Strict" + secure;
+    </script>""", height=0)
+
+def get_session_id():
+    """Unguessable session id kept in a browser cookie so a reconnect finds its saved state"""
+    if 'session_id' not in st.session_state:
+        session_id = st.context.cookies.get(SESSION_COOKIE, "")
+        if not SESSION_ID_PATTERN.fullmatch(session_id):
+            session_id = secrets.token_hex(32)
+            set_session_cookie(session_id)
+        if "sid" in st.query_params:
+            # Links from older versions carried the id; opening one must not load that chat
+            del st.query_params["sid"]
+        st.session_state.session_id = session_id
+    return st.session_state.session_id
+
+def get_session():
+    """Get this session's persisted state, loading it lazily after a reconnect"""
+    session = get_session_manager().get(get_session_id())
+    if not isinstance(session.get('chat_history'), BoundedHistory):
+        history = BoundedHistory(MAX_CHAT_HISTORY)
+        history.extend(session.get('chat_history', []))
+        session['chat_history'] = history
+    return session
+
+def get_session_resources():
+    """This session's loaded buddies; freed with the session when it goes idle"""
+    return get_session_manager().resources(get_session_id())
+
+def save_session():
+    """Persist chat history and buddy state for this session"""
+    resources = get_session_resources()
+    if 'enhanced_lmu_buddy' in resources:
+        session['buddy_v1'] = resources['enhanced_lmu_buddy'].export_session_state()
+    if 'enhanced_lmu_buddy_v2' in resources:
+        session['buddy_v2'] = resources['enhanced_lmu_buddy_v2'].export_session_state()
+    try:
+        # Pass the state this run holds so a turn survives an idle sweep mid-run
+        get_session_manager().save(get_session_id(), session)
+    except Exception as e:
+        st.warning(f"Could not save your chat session: {e}")
+
+def save_and_rerun():
+    """Persist the chat turn just added, then rerun to show it (st.rerun skips the rest of the script)"""
+    save_session()
+    st.rerun()
+
 # Initialize session state
-if 'chat_history' not in st.session_state:
-    st.session_state.chat_history = []
+session = get_session()
+chat_history = session['chat_history']
 if 'waitlist_data' not in st.session_state:
     st.session_state.waitlist_data = []
 if 'user_name' not in st.session_state:
@@ -105,30 +179,66 @@ from enhanced_lmu_buddy_v2 import EnhancedLMUBuddyV2
 
 # Initialize Enhanced LMU Buddy
 def get_enhanced_lmu_buddy():
-    if 'enhanced_lmu_buddy' not in st.session_state:
+    resources = get_session_resources()
+    if 'enhanced_lmu_buddy' not in resources:
         with st.spinner("Loading LMU Buddy... This may take a moment on first run."):
-            st.session_state.enhanced_lmu_buddy = EnhancedLMUBuddy()
-    return st.session_state.enhanced_lmu_buddy
+            buddy = EnhancedLMUBuddy()
+            buddy.restore_session_state(session.get('buddy_v1'))
+            resources['enhanced_lmu_buddy'] = buddy
+    return resources['enhanced_lmu_buddy']
 
 # Initialize Enhanced LMU Buddy V2
 def get_enhanced_lmu_buddy_v2():
-    if 'enhanced_lmu_buddy_v2' not in st.session_state:
+    resources = get_session_resources()
+    if 'enhanced_lmu_buddy_v2' not in resources:
         with st.spinner("Loading Enhanced LMU Buddy V2... This may take a moment on first run."):
-            st.session_state.enhanced_lmu_buddy_v2 = EnhancedLMUBuddyV2()
-    return st.session_state.enhanced_lmu_buddy_v2
+            buddy = EnhancedLMUBuddyV2()
+            buddy.restore_session_state(session.get('buddy_v2'))
+            resources['enhanced_lmu_buddy_v2'] = buddy
+    return resources['enhanced_lmu_buddy_v2']
+
+def get_loaded_buddy():
+    """Whichever buddy this session already loaded (used to ground LLM prompts), without loading one"""
+    resources = get_session_resources()
+    return resources.get('enhanced_lmu_buddy_v2') or resources.get('enhanced_lmu_buddy')
+
+# Ollama client shared by every session (one keep-alive connection pool per process)
+@st.cache_resource
+def get_ollama_client():
+    from lmu_buddy_ollama_client import get_shared_client
+    return get_shared_client()
+
+# Async client and event loop thread shared by every session; its request queue
+# caps how many generations hit the Ollama daemon at once
+@st.cache_resource
+def get_async_ollama_client():
+    from lmu_buddy_async_client import get_shared_async_client
+    return get_shared_async_client(prompt_client=get_ollama_client())
+
+@st.cache_resource
+def get_async_runner():
+    from lmu_buddy_async_client import get_shared_runner
+    return get_shared_runner()
 
 # LMU Buddy AI responses with Ollama integration
-def get_lmu_buddy_response(user_input):
+def get_lmu_buddy_response(user_input, use_model=True):
     """Get response from LMU Buddy using fine-tuned Ollama model"""
     try:
         # Try to use the fine-tuned Ollama model first
-        from lmu_buddy_ollama_client import LMUBuddyOllamaClient
+        client = get_ollama_client()
         
-        # Initialize the client
-        client = LMUBuddyOllamaClient()
+        if not use_model:
+            # Model down, circuit open or empty reply: prefer the rule-based buddy if loaded
+            buddy = get_loaded_buddy()
+            if buddy is not None:
+                return buddy.generate_response(user_input)
+            return client.get_fallback_response(user_input)
         
         # Get response from fine-tuned model
-        response = client.get_enhanced_response(user_input)
+        response = client.get_enhanced_response(user_input, {
+            'session_id': get_session_id(),
+            'buddy': get_loaded_buddy()
+        })
         return response
         
     except ImportError:
@@ -167,6 +277,188 @@ def get_lmu_buddy_response(user_input):
     else:
         return responses["default"]
 
+def stream_lmu_buddy_response(user_input, placeholder):
+    """Render LMU Buddy's answer token by token; returns the full text and its timings"""
+    timings = {}
+    response = ""
+    session_id = get_session_id()
+    try:
+        from lmu_buddy_prompt_builder import build_grounded_prompt
+        from lmu_buddy_router import RULES
+        buddy = get_loaded_buddy()
+        router = get_ollama_client().router
+        started = time.time()
+        route = router.route(user_input, buddy)
+        if route['route'] == RULES:
+            # Greetings and questions the knowledge base answers outright never reach a model
+            response = get_lmu_buddy_response(user_input, use_model=False)
+            router.record(RULES, time.time() - started)
+            placeholder.markdown(f'<div class="bot-message">{response}</div>', unsafe_allow_html=True)
+            return response, {'route': RULES, 'ttft': 0.0, 'total': time.time() - started}
+        
+        summary = chat_history.summary()
+        cached, query = get_ollama_client().cached_completion(user_input, buddy, route, summary=summary,
+                                                              session_id=session_id)
+        if cached:
+            placeholder.markdown(f'<div class="bot-message">{cached}</div>', unsafe_allow_html=True)
+            return cached, {'cached': True, 'ttft': 0.0, 'total': 0.0}
+        
+        budget = get_ollama_client().grounding_budget(user_input, session_id, route)
+        prompt = build_grounded_prompt(user_input, buddy, token_budget=budget, summary=summary,
+                                       query_embedding=route['embedding'])
+        client = get_async_ollama_client()
+        stream = get_async_runner().iterate(lambda: client.stream(prompt, timings=timings, session_id=session_id,
+                                                                  topic=route['intent'], model=route['model'],
+                                                                  options=route['options']))
+        try:
+            for token in stream:
+                if token is None:
+                    # Still queued or thinking; the UI update also lets a rerun interrupt this run
+                    if not response:
+                        waiting = client.queue_stats()['waiting']
+                        status = f" ({waiting} ahead in line)" if waiting else ""
+                        placeholder.markdown(f'<div class="bot-message">🦁 Thinking...{status}</div>', unsafe_allow_html=True)
+                    continue
+                response += token
+                placeholder.markdown(f'<div class="bot-message">{response}▌</div>', unsafe_allow_html=True)
+        finally:
+            # Navigating away stops this script run; closing the stream cancels the generation
+            stream.close()
+        if timings.get('completed'):
+            router.record(route['route'], time.time() - started)
+            get_ollama_client().store_completion(query, response.strip())
+    except ImportError:
+        response = get_lmu_buddy_response(user_input)
+    except Exception as e:
+        st.warning(f"LMU Buddy is busy right now: {e}")
+    
+    if not response.strip():
+        # Model unavailable or returned nothing; use the keyword fallbacks
+        response = get_lmu_buddy_response(user_input, use_model=False)
+    
+    placeholder.markdown(f'<div class="bot-message">{response}</div>', unsafe_allow_html=True)
+    return response, timings
+
+def start_hedged_upgrade(message, user_input):
+    """Generate the LLM answer in the background for a message the rule engine already answered"""
+    try:
+        from lmu_buddy_prompt_builder import build_grounded_prompt
+        from lmu_buddy_router import RULES
+        buddy = get_loaded_buddy()
+        route = get_ollama_client().router.route(user_input, buddy)
+        if route['route'] == RULES:
+            # Nothing for a model to add to the rule-based answer
+            return
+        
+        session_id = get_session_id()
+        summary = chat_history.summary()
+        cached, query = get_ollama_client().cached_completion(user_input, buddy, route, summary=summary,
+                                                              session_id=session_id)
+        if cached:
+            message["rule_based_content"] = message["content"]
+            message["content"] = cached
+            return
+        
+        client = get_async_ollama_client()
+        budget = get_ollama_client().grounding_budget(user_input, session_id, route)
+        prompt = build_grounded_prompt(user_input, buddy, token_budget=budget, summary=summary,
+                                       query_embedding=route['embedding'])
+        future = get_async_runner().submit(
+            client.generate(prompt, session_id=session_id, topic=route['intent'], model=route['model'],
+                            options=route['options'])
+        )
+    except ImportError:
+        return
+    
+    def remember(done):
+        if not done.cancelled() and done.exception() is None:
+            get_ollama_client().store_completion(query, done.result())
+    future.add_done_callback(remember)
+    
+    message["upgrade_id"] = uuid.uuid4().hex
+    pending = st.session_state.setdefault('pending_upgrades', {})
+    pending[message["upgrade_id"]] = (future, time.time() + HEDGE_DEADLINE)
+
+def apply_hedged_upgrades(wait=False):
+    """Swap finished LLM answers into their messages in place
+    
+    With wait=True, keeps polling until pending upgrades finish or miss their deadline,
+    then reruns to show them; any user interaction interrupts the wait.
+    """
+    pending = st.session_state.get('pending_upgrades')
+    if not pending:
+        return
+    
+    messages = {message.get("upgrade_id"): message for message in chat_history if message.get("upgrade_id")}
+    status = st.empty() if wait else None
+    upgraded = False
+    while pending:
+        for upgrade_id, (future, deadline) in list(pending.items()):
+            message = messages.get(upgrade_id)
+            if future.done():
+                del pending[upgrade_id]
+                result = None if future.cancelled() or future.exception() else future.result()
+                if message is not None:
+                    message.pop("upgrade_id", None)
+                    if result:
+                        message["rule_based_content"] = message["content"]
+                        message["content"] = result
+                        upgraded = True
+            elif message is None or time.time() > deadline:
+                # Too late to be useful, or the message was cleared: stop the generation
+                future.cancel()
+                del pending[upgrade_id]
+                if message is not None:
+                    message.pop("upgrade_id", None)
+        
+        if not wait or not pending:
+            break
+        status.caption("✨ LMU Buddy is upgrading its answer...")
+        time.sleep(0.25)
+    
+    if status is not None:
+        status.empty()
+    if wait and upgraded:
+        save_and_rerun()
+
+def render_session_memory_debug():
+    """Show approximate bytes used by this session's conversation state"""
+    with st.sidebar.expander("🧠 Session Memory (debug)"):
+        usage = memory_report({'chat_history': chat_history})
+        resources = get_session_resources()
+        for key in ['enhanced_lmu_buddy', 'enhanced_lmu_buddy_v2']:
+            if key in resources:
+                buddy_usage = resources[key].memory_usage()
+                buddy_usage.pop('total', None)
+                usage.update({f"{key}.{name}": size for name, size in buddy_usage.items()})
+        usage['total'] = sum(size for name, size in usage.items() if name != 'total')
+        for name, size in usage.items():
+            st.text(f"{name}: {size / 1024:.1f} KB")
+        st.caption(f"Chat messages kept: {len(chat_history)}/{MAX_CHAT_HISTORY}")
+        timed = [m for m in chat_history if m.get("total_time") is not None]
+        if timed:
+            last = timed[-1]
+            ttft = f"{last['ttft']:.2f}s" if last.get('ttft') is not None else "n/a"
+            st.caption(f"Last streamed reply: first token {ttft}, total {last['total_time']:.2f}s")
+        completions = get_ollama_client().completion_cache.stats()
+        st.caption(f"LLM answer cache: {completions['entries']} answers, {completions['hit_rate']:.0%} hit rate")
+        breaker = get_ollama_client().breaker.snapshot()
+        st.caption(f"LLM circuit: {breaker['state']} ({breaker['rejected']} requests answered by fallback)")
+        for route, counters in get_ollama_client().router.snapshot().items():
+            if counters['requests']:
+                st.caption(f"Route {route}: {counters['requests']} replies, avg {counters['avg_seconds']:.2f}s, "
+                           f"cost {counters['cost']:.0f}")
+        sizes = get_ollama_client().prompt_size_stats()
+        if sizes['requests']:
+            st.caption(f"Prompt size: p50 ~{sizes['p50_tokens']} / p95 ~{sizes['p95_tokens']} tokens, "
+                       f"{sizes['chars_per_token']:.1f} chars/token, {sizes['history_trims']} history trims")
+        usage = get_ollama_client().usage_stats()
+        if usage['turns']:
+            st.caption(f"Prompt tokens evaluated: first turn {usage['first_prompt_eval_count']}, "
+                       f"average {usage['avg_prompt_eval_count']:.0f} over {usage['turns']} turns")
+
+render_session_memory_debug()
+
 # Navigation
 selected = option_menu(
     menu_title=None,
@@ -293,8 +585,16 @@ elif selected == "🤖 LMU Buddy":
                 buddy = get_enhanced_lmu_buddy()
             except Exception as e:
                 st.error(f"Error loading Enhanced LMU Buddy V1: {e}")
+                save_session()
                 st.stop()
         
+        hedged_mode = st.toggle(
+            "⚡ Instant answers, upgraded by the LLM",
+            key="hedged_mode",
+            help="Shows the rule-based answer right away and swaps in the fine-tuned model's answer if it is ready within a few seconds"
+        )
+        apply_hedged_upgrades()
+        
         # Data insights
         st.markdown("### 📊 LMU Knowledge Base")
         col1, col2, col3, col4 = st.columns(4)
@@ -328,7 +628,7 @@ elif selected == "🤖 LMU Buddy":
                 st.info(f"**Detected Tone:** {dominant_tone.title()}")
         
         # Display chat history
-        for message in st.session_state.chat_history:
+        for message in chat_history:
             if message["role"] == "user":
                 st.markdown(f'<div class="user-message">{message["content"]}</div>', unsafe_allow_html=True)
             else:
@@ -342,14 +642,17 @@ elif selected == "🤖 LMU Buddy":
             st.session_state.last_user_input = user_input
             
             # Add user message to history
-            st.session_state.chat_history.append({"role": "user", "content": user_input})
+            chat_history.append({"role": "user", "content": user_input})
             
             # Get AI response
             with st.spinner("LMU Buddy is thinking..."):
                 ai_response = buddy.generate_response(user_input)
-            st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
+            message = {"role": "assistant", "content": ai_response}
+            if hedged_mode:
+                start_hedged_upgrade(message, user_input)
+            chat_history.append(message)
             
-            st.rerun()
+            save_and_rerun()
         
         # Quick access buttons
         st.markdown("### 🚀 Quick Access")
@@ -362,49 +665,49 @@ elif selected == "🤖 LMU Buddy":
                 st.markdown("**🍕 Authentic Tea**")
                 if st.button("🍕 Food Tea", key="food_tea_v2"):
                     st.session_state.last_user_input = "Tell me about the food on campus"
-                    st.session_state.chat_history.append({"role": "user", "content": "Tell me about the food on campus"})
-                    ai_response = buddy.generate_response("Tell me about the food on campus")
-                    st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
-                    st.rerun()
+                    chat_history.append({"role": "user", "content": "Tell me about the food on campus"})
+                    ai_response = buddy.generate_quick_response("Tell me about the food on campus")
+                    chat_history.append({"role": "assistant", "content": ai_response})
+                    save_and_rerun()
                 
                 if st.button("👻 Dorm Gossip", key="dorm_gossip_v2"):
                     st.session_state.last_user_input = "What's the tea about the dorms?"
-                    st.session_state.chat_history.append({"role": "user", "content": "What's the tea about the dorms?"})
-                    ai_response = buddy.generate_response("What's the tea about the dorms?")
-                    st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
-                    st.rerun()
+                    chat_history.append({"role": "user", "content": "What's the tea about the dorms?"})
+                    ai_response = buddy.generate_quick_response("What's the tea about the dorms?")
+                    chat_history.append({"role": "assistant", "content": ai_response})
+                    save_and_rerun()
             
             with col2:
                 st.markdown("**👨‍🏫 Professor Tea**")
                 if st.button("👨‍🏫 Professor Tea", key="prof_tea_v2"):
                     st.session_state.last_user_input = "Tell me about the professors"
-                    st.session_state.chat_history.append({"role": "user", "content": "Tell me about the professors"})
-                    ai_response = buddy.generate_response("Tell me about the professors")
-                    st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
-                    st.rerun()
+                    chat_history.append({"role": "user", "content": "Tell me about the professors"})
+                    ai_response = buddy.generate_quick_response("Tell me about the professors")
+                    chat_history.append({"role": "assistant", "content": ai_response})
+                    save_and_rerun()
                 
                 if st.button("🏛️ Admin Complaints", key="admin_complaints_v2"):
                     st.session_state.last_user_input = "What are the biggest complaints about admin?"
-                    st.session_state.chat_history.append({"role": "user", "content": "What are the biggest complaints about admin?"})
-                    ai_response = buddy.generate_response("What are the biggest complaints about admin?")
-                    st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
-                    st.rerun()
+                    chat_history.append({"role": "user", "content": "What are the biggest complaints about admin?"})
+                    ai_response = buddy.generate_quick_response("What are the biggest complaints about admin?")
+                    chat_history.append({"role": "assistant", "content": ai_response})
+                    save_and_rerun()
             
             with col3:
                 st.markdown("**🎉 Campus Life**")
                 if st.button("🎵 TNL Events", key="tnl_events_v2"):
                     st.session_state.last_user_input = "What's up with TNL events?"
-                    st.session_state.chat_history.append({"role": "user", "content": "What's up with TNL events?"})
-                    ai_response = buddy.generate_response("What's up with TNL events?")
-                    st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
-                    st.rerun()
+                    chat_history.append({"role": "user", "content": "What's up with TNL events?"})
+                    ai_response = buddy.generate_quick_response("What's up with TNL events?")
+                    chat_history.append({"role": "assistant", "content": ai_response})
+                    save_and_rerun()
                 
                 if st.button("🏀 Basketball Games", key="basketball_v2"):
                     st.session_state.last_user_input = "Tell me about basketball games"
-                    st.session_state.chat_history.append({"role": "user", "content": "Tell me about basketball games"})
-                    ai_response = buddy.generate_response("Tell me about basketball games")
-                    st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
-                    st.rerun()
+                    chat_history.append({"role": "user", "content": "Tell me about basketball games"})
+                    ai_response = buddy.generate_quick_response("Tell me about basketball games")
+                    chat_history.append({"role": "assistant", "content": ai_response})
+                    save_and_rerun()
         else:
             # V1 buttons
             col1, col2 = st.columns(2)
@@ -412,30 +715,30 @@ elif selected == "🤖 LMU Buddy":
             with col1:
                 st.markdown("**📚 Academic**")
                 if st.button("Find Professors", key="find_professors"):
-                    st.session_state.chat_history.append({"role": "user", "content": "Show me some good professors"})
-                    ai_response = buddy.generate_response("Show me some good professors")
-                    st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
-                    st.rerun()
+                    chat_history.append({"role": "user", "content": "Show me some good professors"})
+                    ai_response = buddy.generate_quick_response("Show me some good professors")
+                    chat_history.append({"role": "assistant", "content": ai_response})
+                    save_and_rerun()
                 
                 if st.button("Popular Courses", key="popular_courses"):
-                    st.session_state.chat_history.append({"role": "user", "content": "What are some popular courses?"})
-                    ai_response = buddy.generate_response("What are some popular courses?")
-                    st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
-                    st.rerun()
+                    chat_history.append({"role": "user", "content": "What are some popular courses?"})
+                    ai_response = buddy.generate_quick_response("What are some popular courses?")
+                    chat_history.append({"role": "assistant", "content": ai_response})
+                    save_and_rerun()
             
             with col2:
                 st.markdown("**🎉 Campus Life**")
                 if st.button("Upcoming Events", key="upcoming_events"):
-                    st.session_state.chat_history.append({"role": "user", "content": "What events are coming up?"})
-                    ai_response = buddy.generate_response("What events are coming up?")
-                    st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
-                    st.rerun()
+                    chat_history.append({"role": "user", "content": "What events are coming up?"})
+                    ai_response = buddy.generate_quick_response("What events are coming up?")
+                    chat_history.append({"role": "assistant", "content": ai_response})
+                    save_and_rerun()
                 
                 if st.button("Best Food Spots", key="best_food"):
-                    st.session_state.chat_history.append({"role": "user", "content": "Where should I eat on campus?"})
-                    ai_response = buddy.generate_response("Where should I eat on campus?")
-                    st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
-                    st.rerun()
+                    chat_history.append({"role": "user", "content": "Where should I eat on campus?"})
+                    ai_response = buddy.generate_quick_response("Where should I eat on campus?")
+                    chat_history.append({"role": "assistant", "content": ai_response})
+                    save_and_rerun()
         
         # Advanced features
         st.markdown("### 🔍 Advanced Features")
@@ -444,24 +747,24 @@ elif selected == "🤖 LMU Buddy":
         
         with col1:
             if st.button("🏠 Housing Info", key="housing_info"):
-                st.session_state.chat_history.append({"role": "user", "content": "Tell me about housing options"})
-                ai_response = buddy.generate_response("Tell me about housing options")
-                st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
-                st.rerun()
+                chat_history.append({"role": "user", "content": "Tell me about housing options"})
+                ai_response = buddy.generate_quick_response("Tell me about housing options")
+                chat_history.append({"role": "assistant", "content": ai_response})
+                save_and_rerun()
         
         with col2:
             if st.button("🏛️ Organizations", key="organizations"):
-                st.session_state.chat_history.append({"role": "user", "content": "What organizations should I join?"})
-                ai_response = buddy.generate_response("What organizations should I join?")
-                st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
-                st.rerun()
+                chat_history.append({"role": "user", "content": "What organizations should I join?"})
+                ai_response = buddy.generate_quick_response("What organizations should I join?")
+                chat_history.append({"role": "assistant", "content": ai_response})
+                save_and_rerun()
         
         with col3:
             if st.button("📰 Latest News", key="latest_news"):
-                st.session_state.chat_history.append({"role": "user", "content": "What's the latest LMU news?"})
-                ai_response = buddy.generate_response("What's the latest LMU news?")
-                st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
-                st.rerun()
+                chat_history.append({"role": "user", "content": "What's the latest LMU news?"})
+                ai_response = buddy.generate_quick_response("What's the latest LMU news?")
+                chat_history.append({"role": "assistant", "content": ai_response})
+                save_and_rerun()
         
         # Feedback system
         st.markdown("### 👍 How was your experience?")
@@ -474,9 +777,14 @@ elif selected == "🤖 LMU Buddy":
                 st.info("Thanks for the feedback! We're constantly working to improve.")
         with col3:
             if st.button("🔄 Clear Chat", key="clear_chat"):
-                st.session_state.chat_history = []
-                st.rerun()
+                chat_history.clear()
+                get_ollama_client().session_contexts.reset(get_session_id())
+                apply_hedged_upgrades()
+                save_and_rerun()
     
+        
+        # Keep the page live until background LLM answers land (or miss their deadline)
+        apply_hedged_upgrades(wait=True)
     except Exception as e:
         st.error(f"Error loading Enhanced LMU Buddy: {e}")
         st.info("Falling back to basic LMU Buddy...")
@@ -485,7 +793,7 @@ elif selected == "🤖 LMU Buddy":
         st.markdown("### 💬 Chat with LMU Buddy")
         
         # Display chat history
-        for message in st.session_state.chat_history:
+        for message in chat_history:
             if message["role"] == "user":
                 st.markdown(f'<div class="user-message">{message["content"]}</div>', unsafe_allow_html=True)
             else:
@@ -496,35 +804,41 @@ elif selected == "🤖 LMU Buddy":
         
         if st.button("Send", key="fallback_send_button") and user_input:
             # Add user message to history
-            st.session_state.chat_history.append({"role": "user", "content": user_input})
+            chat_history.append({"role": "user", "content": user_input})
             
-            # Get AI response
-            ai_response = get_lmu_buddy_response(user_input)
-            st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
+            # Stream AI response as it is generated
+            st.markdown(f'<div class="user-message">{user_input}</div>', unsafe_allow_html=True)
+            ai_response, timings = stream_lmu_buddy_response(user_input, st.empty())
+            chat_history.append({
+                "role": "assistant",
+                "content": ai_response,
+                "ttft": timings.get('ttft'),
+                "total_time": timings.get('total')
+            })
             
-            st.rerun()
+            save_and_rerun()
         
         # Suggested questions
         st.markdown("### 💡 Try asking about:")
         col1, col2, col3 = st.columns(3)
         with col1:
             if st.button("🍕 Best food on campus?", key="fallback_food"):
-                st.session_state.chat_history.append({"role": "user", "content": "Best food on campus?"})
-                ai_response = get_lmu_buddy_response("Best food on campus?")
-                st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
-                st.rerun()
+                chat_history.append({"role": "user", "content": "Best food on campus?"})
+                ai_response, timings = stream_lmu_buddy_response("Best food on campus?", st.empty())
+                chat_history.append({"role": "assistant", "content": ai_response, "ttft": timings.get('ttft'), "total_time": timings.get('total')})
+                save_and_rerun()
         with col2:
             if st.button("📚 Best study spots?", key="fallback_study"):
-                st.session_state.chat_history.append({"role": "user", "content": "Best study spots?"})
-                ai_response = get_lmu_buddy_response("Best study spots?")
-                st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
-                st.rerun()
+                chat_history.append({"role": "user", "content": "Best study spots?"})
+                ai_response, timings = stream_lmu_buddy_response("Best study spots?", st.empty())
+                chat_history.append({"role": "assistant", "content": ai_response, "ttft": timings.get('ttft'), "total_time": timings.get('total')})
+                save_and_rerun()
         with col3:
             if st.button("🎉 What's up this weekend?", key="fallback_weekend"):
-                st.session_state.chat_history.append({"role": "user", "content": "What's up this weekend?"})
-                ai_response = get_lmu_buddy_response("What's up this weekend?")
-                st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
-                st.rerun()
+                chat_history.append({"role": "user", "content": "What's up this weekend?"})
+                ai_response, timings = stream_lmu_buddy_response("What's up this weekend?", st.empty())
+                chat_history.append({"role": "assistant", "content": ai_response, "ttft": timings.get('ttft'), "total_time": timings.get('total')})
+                save_and_rerun()
 
 # Waitlist Analytics
 elif selected == "📊 Waitlist":
@@ -595,10 +909,10 @@ elif selected == "📈 Analytics":
         with col1:
             st.metric("Total Users", len(waitlist_data))
         with col2:
-            chat_sessions = len(st.session_state.chat_history) // 2
+            chat_sessions = len(chat_history) // 2
             st.metric("Chat Sessions", chat_sessions)
         with col3:
-            avg_session_length = len(st.session_state.chat_history) / max(chat_sessions, 1)
+            avg_session_length = len(chat_history) / max(chat_sessions, 1)
             st.metric("Avg Session Length", f"{avg_session_length:.1f} messages")
         with col4:
             completion_rate = len([entry for entry in waitlist_data if entry.get('feedback')]) / len(waitlist_data) * 100
@@ -627,4 +941,6 @@ st.markdown("""
     <p>Built with ❤️ for the LMU community</p>
     <p>Share your unique link and climb the waitlist! #BringBackTheRoar</p>
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+save_session()
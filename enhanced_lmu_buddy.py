@@ -6,16 +6,40 @@ from datetime import datetime, timedelta
 import re
 from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
-import pickle
 import os
 import random
+from lmu_buddy_memory import (
+    BoundedHistory, LRUCounter, memory_report,
+    DEFAULT_MAX_HISTORY, DEFAULT_MAX_TRACKED_QUERIES
+)
+from lmu_buddy_intents import resolve_intent, QUICK_ACCESS_PROMPTS
+from lmu_buddy_cache import shared_quick_access, shared_response_cache, shared_search_cache
+from lmu_buddy_knowledge_base import knowledge_base, load_index, save_index
+
+# V1 index artifact (V2 keeps lmu_embeddings.pkl, which uses a different mapping format)
+EMBEDDINGS_PATH = 'lmu_embeddings_v1.pkl'
+
+# Intents whose core answer depends only on the query, tone and data (not on chat history)
+CACHEABLE_INTENTS = {
+    'professor', 'course', 'dining', 'housing', 'event', 'organization',
+    'facility', 'news', 'transportation', 'campus_life', 'unknown'
+}
+
+# Placeholders for randomized flourishes and picks, filled in after the core answer is built
+# (and again on every cache hit, so cached answers keep their variety)
+FLOURISH_PATTERN = re.compile(r'\[\[(trivia|closing|insight|recommendation|excitement|pick|bullets)((?:\|[^|\[\]]*)*)\]\]')
 
 class EnhancedLMUBuddy:
-    def __init__(self):
+    def __init__(self, max_history=DEFAULT_MAX_HISTORY, max_tracked_queries=DEFAULT_MAX_TRACKED_QUERIES,
+                 response_cache=None):
         self.model = SentenceTransformer('all-MiniLM-L6-v2')
         self.data = self.load_lmu_data()
         self.embeddings = self.load_or_compute_embeddings()
-        self.conversation_history = []
+        self.data_version = knowledge_base.current()
+        self.data_digest = knowledge_base.digest
+        self.response_cache = response_cache if response_cache is not None else shared_response_cache
+        self._defer_flourishes = False
+        self.conversation_history = BoundedHistory(max_history)
         self.user_preferences = {}
         self.user_context = {
             'name': None,
@@ -25,7 +49,7 @@ class EnhancedLMUBuddy:
             'favorite_topics': [],
             'recent_queries': []
         }
-        self.query_frequency = {}  # Track how often specific queries are asked
+        self.query_frequency = LRUCounter(max_tracked_queries)  # Track how often specific queries are asked
         self.lmu_personality = {
             'casual': {
                 'greetings': ['Yo!', 'Hey there!', 'What\'s good?', 'Sup!'],
@@ -172,6 +196,9 @@ class EnhancedLMUBuddy:
                 "What other LMU topics interest you? 🎯"
             ]
         }
+        
+        # Precomputed routing/retrieval for the quick-access buttons
+        self.quick_access = self.load_quick_access()
     
     def load_lmu_data(self):
         """Load LMU data from JSON file"""
@@ -182,6 +209,20 @@ class EnhancedLMUBuddy:
             # Create default data if file doesn't exist
             return self.create_default_data()
     
+    def refresh_knowledge_base(self):
+        """Hot-reload data and index when the knowledge base version moves on"""
+        version = knowledge_base.current()
+        if version == self.data_version:
+            return False
+        
+        if knowledge_base.digest != self.data_digest:
+            self.data = self.load_lmu_data()
+            self.embeddings = self.load_or_compute_embeddings()
+            self.data_digest = knowledge_base.digest
+        self.data_version = knowledge_base.current()
+        self.quick_access = self.load_quick_access()
+        return True
+    
     def create_default_data(self):
         """Create default LMU data structure"""
         return {
@@ -197,21 +238,12 @@ class EnhancedLMUBuddy:
     
     def load_or_compute_embeddings(self):
         """Load pre-computed embeddings or compute new ones"""
-        try:
-            with open('lmu_embeddings.pkl', 'rb') as f:
-                data = pickle.load(f)
-                # Handle both tuple and dict formats
-                if isinstance(data, tuple) and len(data) == 2:
-                    return {
-                        'embeddings': data[0],
-                        'text_mapping': data[1]
-                    }
-                elif isinstance(data, dict):
-                    return data
-                else:
-                    raise ValueError("Invalid embeddings file format")
-        except FileNotFoundError:
+        data = load_index(EMBEDDINGS_PATH)
+        # Only reuse an index stamped with the current knowledge base
+        if not isinstance(data, dict) or 'text_mapping' not in data or not knowledge_base.matches(data):
             return self.compute_embeddings()
+        knowledge_base.seed(data.get('data_version', 0), data.get('data_digest'))
+        return data
     
     def compute_embeddings(self):
         """Compute embeddings for all LMU data"""
@@ -263,29 +295,60 @@ class EnhancedLMUBuddy:
         if all_texts:
             embeddings = self.model.encode(all_texts)
             
-            # Save embeddings
-            with open('lmu_embeddings.pkl', 'wb') as f:
-                pickle.dump({
-                    'embeddings': embeddings,
-                    'text_mapping': text_mapping
-                }, f)
-            
-            return {
+            # Save embeddings stamped with the knowledge base version they were built from
+            index = {
                 'embeddings': embeddings,
-                'text_mapping': text_mapping
+                'text_mapping': text_mapping,
+                **knowledge_base.stamp()
             }
+            save_index(index, EMBEDDINGS_PATH)
+            
+            return index
         else:
             return {
                 'embeddings': np.array([]),
                 'text_mapping': []
             }
     
-    def semantic_search(self, query, top_k=3):
-        """Perform semantic search on LMU data"""
+    def load_quick_access(self):
+        """Quick-access table for the current data build, computed once and shared by every session"""
+        return shared_quick_access(('v1', self.data_version), self.data_version, self.precompute_quick_access)
+    
+    def precompute_quick_access(self):
+        """Resolve intent, tone, query embedding and core answer for every quick-access prompt"""
+        self.quick_access = {}
+        table = {}
+        for prompt in QUICK_ACCESS_PROMPTS:
+            entry = {
+                'intent': resolve_intent(prompt),
+                'tone': self.analyze_user_tone(prompt),
+                'embedding': self.model.encode([prompt]),
+                'built_on': datetime.now().date()
+            }
+            table[prompt] = entry
+            self.quick_access[prompt] = entry
+            entry['core'] = self.get_core_response(prompt, entry['intent'], entry['tone'])
+        return table
+    
+    def encode_query(self, query):
+        """Encode a query, reusing precomputed embeddings for quick-access prompts"""
+        entry = getattr(self, 'quick_access', {}).get(query)
+        if entry is not None:
+            return entry['embedding']
+        return self.model.encode([query])
+    
+    def semantic_search(self, query, top_k=3, query_embedding=None):
+        """Perform semantic search on LMU data (query_embedding skips re-encoding the query)"""
         if not self.embeddings['embeddings'].size:
             return []
         
-        query_embedding = self.model.encode([query])
+        cache_key = ('v1', self.data_version, query, top_k)
+        cached = shared_search_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        if query_embedding is None:
+            query_embedding = self.encode_query(query)
         similarities = cosine_similarity(query_embedding, self.embeddings['embeddings'])[0]
         
         # Get top k results
@@ -315,6 +378,7 @@ class EnhancedLMUBuddy:
                     # Skip this result if there's an error
                     continue
         
+        shared_search_cache.put(cache_key, results, self.data_version)
         return results
     
     def get_professor_info(self, query):
@@ -404,6 +468,8 @@ class EnhancedLMUBuddy:
     
     def get_lmu_insight(self, category, tone='neutral'):
         """Get a relevant LMU insight based on category and tone"""
+        if self._defer_flourishes:
+            return f"[[insight|{category}|{tone}]]"
         insights = self.lmu_insights.get(category, [])
         if insights:
             insight = random.choice(insights)
@@ -420,14 +486,40 @@ class EnhancedLMUBuddy:
     def track_query_frequency(self, query):
         """Track how often specific queries are asked to avoid repetition"""
         query_lower = query.lower().strip()
-        self.query_frequency[query_lower] = self.query_frequency.get(query_lower, 0) + 1
-        return self.query_frequency[query_lower]
+        return self.query_frequency.increment(query_lower)
     
     def is_repeated_query(self, query):
         """Check if this is a repeated query that needs diversification"""
         query_lower = query.lower().strip()
         return self.query_frequency.get(query_lower, 0) > 1
     
+    def memory_usage(self):
+        """Approximate bytes used by this session's conversation state"""
+        return memory_report({
+            'conversation_history': self.conversation_history,
+            'query_frequency': self.query_frequency,
+            'user_context': self.user_context,
+            'user_preferences': self.user_preferences
+        })
+    
+    def export_session_state(self):
+        """Get the per-session state that should survive restarts"""
+        return {
+            'user_context': self.user_context,
+            'conversation_history': self.conversation_history.to_list(),
+            'query_frequency': dict(self.query_frequency.items())
+        }
+    
+    def restore_session_state(self, state):
+        """Restore per-session state saved by export_session_state"""
+        if not state:
+            return
+        self.user_context.update(state.get('user_context', {}))
+        self.conversation_history.clear()
+        self.conversation_history.extend(state.get('conversation_history', []))
+        self.query_frequency.clear()
+        self.query_frequency.load(state.get('query_frequency', {}))
+    
     def get_personalized_greeting(self, tone='neutral'):
         """Get personalized greeting based on user context"""
         personality = self.lmu_personality.get(tone, self.lmu_personality['neutral'])
@@ -444,6 +536,8 @@ class EnhancedLMUBuddy:
     
     def add_contextual_recommendation(self, query, tone='neutral'):
         """Add personalized recommendations based on user context"""
+        if self._defer_flourishes:
+            return f"[[recommendation|{tone}]]"
         query_lower = query.lower()
         
         # Check if user is in specific clubs/organizations
@@ -465,6 +559,8 @@ class EnhancedLMUBuddy:
     
     def sprinkle_lmu_trivia(self, tone='neutral'):
         """Randomly add fun LMU trivia to responses"""
+        if self._defer_flourishes:
+            return f"[[trivia|{tone}]]"
         if random.random() < 0.3:  # 30% chance to add trivia
             trivia = random.choice(self.lmu_trivia)
             personality = self.lmu_personality.get(tone, self.lmu_personality['neutral'])
@@ -480,9 +576,30 @@ class EnhancedLMUBuddy:
     
     def get_engaging_closing_prompt(self, tone='neutral'):
         """Get an engaging closing prompt based on tone"""
+        if self._defer_flourishes:
+            return f"[[closing|{tone}]]"
         prompts = self.closing_prompts.get(tone, self.closing_prompts['neutral'])
         return random.choice(prompts)
     
+    def get_excitement(self, tone='neutral'):
+        """Random excitement marker for the tone"""
+        if self._defer_flourishes:
+            return f"[[excitement|{tone}]]"
+        personality = self.lmu_personality.get(tone, self.lmu_personality['neutral'])
+        return random.choice(personality['excitement'])
+    
+    def pick(self, options):
+        """Random choice among phrasings, deferred like the other flourishes"""
+        if self._defer_flourishes:
+            return "[[pick|" + "|".join(options) + "]]"
+        return random.choice(options)
+    
+    def pick_bullets(self, options, count):
+        """Bullet list of a random sample of options"""
+        if self._defer_flourishes:
+            return f"[[bullets|{count}|" + "|".join(options) + "]]"
+        return "".join(f"• {option}\n" for option in random.sample(options, min(count, len(options))))
+    
     def extract_user_context(self, user_input):
         """Extract user context from conversation to enable personalized recommendations"""
         user_input_lower = user_input.lower()
@@ -600,17 +717,20 @@ class EnhancedLMUBuddy:
         elif any(word in query_lower for word in ['late', 'night', 'midnight']):
             options = self.dining_variations['late_night']
         else:
-            # Mix different types for variety
+            options = None
+        
+        if options:
+            for option in options[:3]:
+                response += f"• {option}\n"
+        else:
+            # Mix different types for variety (sampled per reply, even from the cache)
             all_options = []
             for category in self.dining_variations.values():
                 all_options.extend(category)
-            options = random.sample(all_options, min(4, len(all_options)))
-        
-        for option in options[:3]:
-            response += f"• {option}\n"
+            response += self.pick_bullets(all_options, 3)
         
         if tone == 'casual':
-            response += f"\nWhat vibe you looking for—quick bite or chill hangout? {random.choice(personality['excitement'])}"
+            response += f"\nWhat vibe you looking for—quick bite or chill hangout? {self.get_excitement(tone)}"
         elif tone == 'formal':
             response += "\nWhich type of dining experience interests you most?"
         else:
@@ -620,14 +740,38 @@ class EnhancedLMUBuddy:
     
     def generate_response(self, user_input):
         """Enhanced response generation with better context awareness and LMU-specific knowledge"""
+        self.refresh_knowledge_base()
+        
+        # Analyze user tone
+        user_tone = self.analyze_user_tone(user_input)
+        self.record_turn(user_input)
+        
+        # Route to the handler for the resolved intent
+        intent = resolve_intent(user_input)
+        core_response = self.get_core_response(user_input, intent, user_tone)
+        return self.apply_flourishes(core_response, user_input)
+    
+    def generate_quick_response(self, prompt):
+        """Answer a quick-access button prompt from the precomputed table"""
+        self.refresh_knowledge_base()
+        entry = self.quick_access.get(prompt)
+        if entry is None:
+            return self.generate_response(prompt)
+        
+        self.record_turn(prompt)
+        if self.is_repeated_query(prompt) or entry['built_on'] != datetime.now().date():
+            core_response = self.get_core_response(prompt, entry['intent'], entry['tone'])
+        else:
+            core_response = entry['core']
+        return self.apply_flourishes(core_response, prompt)
+    
+    def record_turn(self, user_input):
+        """Update frequency, history and user context for a new user message"""
         user_input_lower = user_input.lower()
         
         # Track query frequency for diversification
         self.track_query_frequency(user_input)
         
-        # Analyze user tone
-        user_tone = self.analyze_user_tone(user_input)
-        
         # Add to conversation history
         self.conversation_history.append({"role": "user", "content": user_input})
         
@@ -638,34 +782,51 @@ class EnhancedLMUBuddy:
         
         # Extract user context from conversation
         self.extract_user_context(user_input_lower)
+    
+    def get_core_response(self, user_input, intent, tone='neutral'):
+        """Get the deterministic part of a response, served from the shared cache when possible"""
+        cache_key = None
+        if intent in CACHEABLE_INTENTS:
+            # Event listings depend on today's date, dining answers on whether the query repeats
+            day = datetime.now().date().isoformat() if intent == 'event' else None
+            cache_key = self.response_cache.make_key(
+                user_input, intent, tone, self.data_version, self.is_repeated_query(user_input), day
+            )
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        handler = getattr(self, f"handle_{intent}_query")
+        self._defer_flourishes = True
+        try:
+            core_response = handler(user_input, tone)
+        finally:
+            self._defer_flourishes = False
         
-        # Check for specific query types with enhanced detection
-        if any(word in user_input_lower for word in ['professor', 'teacher', 'instructor', 'faculty', 'dr.', 'prof.']):
-            return self.handle_professor_query(user_input, user_tone)
-        elif any(word in user_input_lower for word in ['course', 'class', 'subject', 'syllabus', 'assignment', 'exam']):
-            return self.handle_course_query(user_input, user_tone)
-        elif any(word in user_input_lower for word in ['food', 'eat', 'dining', 'restaurant', 'lair', 'lions den', 'cafe']):
-            return self.handle_dining_query(user_input, user_tone)
-        elif any(word in user_input_lower for word in ['housing', 'dorm', 'apartment', 'live', 'residence', 'room']):
-            return self.handle_housing_query(user_input, user_tone)
-        elif any(word in user_input_lower for word in ['event', 'activity', 'weekend', 'party', 'social', 'fun']):
-            return self.handle_event_query(user_input, user_tone)
-        elif any(word in user_input_lower for word in ['organization', 'club', 'greek', 'sorority', 'fraternity', 'group']):
-            return self.handle_organization_query(user_input, user_tone)
-        elif any(word in user_input_lower for word in ['facility', 'library', 'study', 'gym', 'center', 'building']):
-            return self.handle_facility_query(user_input, user_tone)
-        elif any(word in user_input_lower for word in ['news', 'announcement', 'update', 'information']):
-            return self.handle_news_query(user_input, user_tone)
-        elif any(word in user_input_lower for word in ['parking', 'car', 'shuttle', 'transportation', 'commute']):
-            return self.handle_transportation_query(user_input, user_tone)
-        elif any(word in user_input_lower for word in ['weather', 'sunset', 'view', 'bluff', 'campus']):
-            return self.handle_campus_life_query(user_input, user_tone)
-        else:
-            # Check if this is an unknown or too broad query
-            if len(user_input.split()) < 3 or any(word in user_input_lower for word in ['what', 'how', 'why', 'when', 'where']):
-                return self.handle_unknown_query(user_input, user_tone)
-            else:
-                return self.handle_general_query(user_input, user_tone)
+        if cache_key is not None:
+            self.response_cache.put(cache_key, core_response, self.data_version)
+        return core_response
+    
+    def apply_flourishes(self, core_response, query):
+        """Fill in trivia, insights, recommendations and closing prompts for this turn"""
+        def render(match):
+            kind = match.group(1)
+            args = match.group(2).split('|')[1:]
+            if kind == 'trivia':
+                return self.sprinkle_lmu_trivia(*args)
+            if kind == 'closing':
+                return self.get_engaging_closing_prompt(*args)
+            if kind == 'insight':
+                return self.get_lmu_insight(*args)
+            if kind == 'excitement':
+                return self.get_excitement(*args)
+            if kind == 'pick':
+                return self.pick(args)
+            if kind == 'bullets':
+                return self.pick_bullets(args[1:], int(args[0]))
+            return self.add_contextual_recommendation(query, *args)
+        
+        return FLOURISH_PATTERN.sub(render, core_response)
     
     def handle_professor_query(self, query, tone='neutral'):
         """Enhanced professor query handler with better LMU-specific insights"""
@@ -704,7 +865,7 @@ class EnhancedLMUBuddy:
             
             # Add intimate LMU knowledge based on tone
             if tone == 'casual':
-                response += f"💡 {tip_start}: {prof_info['name']} is known for being super chill in office hours. Students say they're really approachable and actually care about your success. Plus, they usually curve generously! {random.choice(personality['excitement'])}\n\n"
+                response += f"💡 {tip_start}: {prof_info['name']} is known for being super chill in office hours. Students say they're really approachable and actually care about your success. Plus, they usually curve generously! {self.get_excitement(tone)}\n\n"
                 response += "🎯 **Student Gossip**: Rumor has it they're working on some groundbreaking research in their field. Might be worth asking about in class!"
             elif tone == 'formal':
                 response += f"💡 {tip_start}: Professor {prof_info['name']} maintains excellent office hours and is known for their dedication to student success. Many students report significant academic growth in their courses.\n\n"
@@ -737,7 +898,7 @@ class EnhancedLMUBuddy:
                     response += f"• **{prof['name']}** ({prof['department']}) - Rating: {prof['rating']}/5.0\n"
             
             if tone == 'casual':
-                response += f"\n💡 Try asking about a specific prof by name! I know all the tea on campus faculty 😏 {random.choice(personality['excitement'])}"
+                response += f"\n💡 Try asking about a specific prof by name! I know all the tea on campus faculty 😏 {self.get_excitement(tone)}"
             elif tone == 'formal':
                 response += "\n💡 Please try asking about a specific professor by name for more detailed information."
             else:
@@ -773,7 +934,7 @@ class EnhancedLMUBuddy:
             response += f"📝 Description: {course_info['description']}\n\n"
             
             if tone == 'casual':
-                response += f"💡 {tip_start}: This class is {random.choice(['pretty chill', 'kinda challenging', 'super interesting', 'definitely worth taking'])}! Students say the workload is manageable and the professor is {random.choice(['super helpful', 'really approachable', 'great at explaining things', 'always available for help'])}. {random.choice(personality['excitement'])}\n\n"
+                response += f"💡 {tip_start}: This class is {self.pick(['pretty chill', 'kinda challenging', 'super interesting', 'definitely worth taking'])}! Students say the workload is manageable and the professor is {self.pick(['super helpful', 'really approachable', 'great at explaining things', 'always available for help'])}. {self.get_excitement(tone)}\n\n"
                 response += "🎯 **Student Insight**: Make sure to go to office hours - it's literally the key to success in this class!"
             elif tone == 'formal':
                 response += f"💡 {tip_start}: This course has received positive feedback from students regarding its academic rigor and instructor accessibility. Regular attendance at office hours is highly recommended for optimal performance.\n\n"
@@ -799,7 +960,7 @@ class EnhancedLMUBuddy:
                     response += f"• **{course['code']}** - {course['name']} (Rating: {course['rating']}/5.0)\n"
             
             if tone == 'casual':
-                response += f"\n💡 Try asking about a specific course by code or name! I know all the deets {random.choice(personality['excitement'])}"
+                response += f"\n💡 Try asking about a specific course by code or name! I know all the deets {self.get_excitement(tone)}"
             else:
                 response += "\n💡 Try asking about a specific course by code or name!"
             return response
@@ -835,7 +996,7 @@ class EnhancedLMUBuddy:
                     response += f"🔥 **Must-Try Items:**\n"
                     for item in dining_info.get('popular_items', [])[:3]:
                         response += f"• {item}\n"
-                    response += f"\n💡 **Pro Tip**: {dining_info.get('name', 'This place')} is {random.choice(['always packed during lunch', 'best during off-peak hours', 'perfect for late-night cravings', 'great for group hangouts'])}! {random.choice(personality['excitement'])}\n\n"
+                    response += f"\n💡 **Pro Tip**: {dining_info.get('name', 'This place')} is {self.pick(['always packed during lunch', 'best during off-peak hours', 'perfect for late-night cravings', 'great for group hangouts'])}! {self.get_excitement(tone)}\n\n"
                     response += "🎯 **Student Gossip**: Rumor has it they're planning to add some new menu items next semester!"
                 elif tone == 'formal':
                     response = f"🍕 **{dining_info.get('name', 'Unknown')}** - {dining_info.get('type', 'Dining')} Establishment 🍕\n\n"
@@ -861,7 +1022,7 @@ class EnhancedLMUBuddy:
                     response += f"🔥 **Popular Items:**\n"
                     for item in dining_info.get('popular_items', [])[:3]:
                         response += f"• {item}\n"
-                    response += f"\n💡 **Pro Tip**: {dining_info.get('name', 'This place')} is a great spot for {random.choice(['lunch with friends', 'quick meals between classes', 'late-night study snacks', 'group dining'])}! 🦁\n\n"
+                    response += f"\n💡 **Pro Tip**: {dining_info.get('name', 'This place')} is a great spot for {self.pick(['lunch with friends', 'quick meals between classes', 'late-night study snacks', 'group dining'])}! 🦁\n\n"
                     response += "🎯 **Campus Insight**: This place is always buzzing with students!"
                 
                 response += f"\n\n{self.get_lmu_insight('student_life', tone)}"
@@ -892,7 +1053,7 @@ class EnhancedLMUBuddy:
                     response += f"🔥 **What Students Love:**\n"
                     for pro in housing_info.get('pros', [])[:3]:
                         response += f"• {pro}\n"
-                    response += f"\n💡 **Pro Tip**: {housing_info['name']} is {random.choice(['super social and fun', 'perfect for quiet study', 'great for making friends', 'convenient to everything'])}! {random.choice(personality['excitement'])}\n\n"
+                    response += f"\n💡 **Pro Tip**: {housing_info['name']} is {self.pick(['super social and fun', 'perfect for quiet study', 'great for making friends', 'convenient to everything'])}! {self.get_excitement(tone)}\n\n"
                     response += "🎯 **Student Gossip**: This dorm has the best RA's on campus!"
                 elif tone == 'formal':
                     response = f"🏠 **{housing_info['name']}** - {housing_info['type']} Residence 🏠\n\n"
@@ -912,7 +1073,7 @@ class EnhancedLMUBuddy:
                     response += f"✅ **Pros:**\n"
                     for pro in housing_info.get('pros', [])[:3]:
                         response += f"• {pro}\n"
-                    response += f"\n💡 **Pro Tip**: {housing_info['name']} is known for being {random.choice(['very social', 'quiet and studious', 'convenient to classes', 'great community'])}! 🦁\n\n"
+                    response += f"\n💡 **Pro Tip**: {housing_info['name']} is known for being {self.pick(['very social', 'quiet and studious', 'convenient to classes', 'great community'])}! 🦁\n\n"
                     response += "🎯 **Campus Insight**: Students here really love the community!"
                 
                 response += self.add_contextual_recommendation(query, tone)
@@ -932,7 +1093,7 @@ class EnhancedLMUBuddy:
             response += "• Palm South - apartment-style living\n"
             response += "• Leavey 4/5 - suite-style with ocean views\n"
             response += "• Off-campus apartments in Playa Vista\n\n"
-            response += f"💡 **Pro Tip**: Apply for housing early - the good spots fill up fast! {random.choice(personality['excitement'])}"
+            response += f"💡 **Pro Tip**: Apply for housing early - the good spots fill up fast! {self.get_excitement(tone)}"
         elif tone == 'formal':
             response = "🏠 **LMU Housing Information** 🏠\n\n"
             response += "**First-Year Residence Halls:**\n"
@@ -973,7 +1134,7 @@ class EnhancedLMUBuddy:
                 for event in upcoming_events[:5]:
                     response += self.format_event_with_emoji(event, tone)
                     response += "\n"
-                response += f"💡 **Pro Tip**: Follow @lmu_events on Instagram for the latest updates! {random.choice(personality['excitement'])}\n\n"
+                response += f"💡 **Pro Tip**: Follow @lmu_events on Instagram for the latest updates! {self.get_excitement(tone)}\n\n"
                 response += "🎯 **Want to RSVP to any? Or looking for specific club meetups?**"
             elif tone == 'formal':
                 response = "🎉 **Upcoming LMU Events - Next Two Weeks** 🎉\n\n"
@@ -998,7 +1159,7 @@ class EnhancedLMUBuddy:
                 response += "• 📚 Academic lectures and workshops\n"
                 response += "• 🏀 Sports games and tailgates\n"
                 response += "• 🎬 Movie nights and social events\n\n"
-                response += f"💡 **Pro Tip**: Join clubs and organizations to stay in the loop! {random.choice(personality['excitement'])}"
+                response += f"💡 **Pro Tip**: Join clubs and organizations to stay in the loop! {self.get_excitement(tone)}"
             elif tone == 'formal':
                 response = "🎉 **LMU Events and Activities** 🎉\n\n"
                 response += "**Regular Programming:**\n"
@@ -1039,7 +1200,7 @@ class EnhancedLMUBuddy:
                     response += f"🔥 **What They Do:**\n"
                     for event in org_info.get('events', [])[:3]:
                         response += f"• {event}\n"
-                    response += f"\n💡 **Pro Tip**: {org_info['name']} is {random.choice(['super active and fun', 'great for networking', 'perfect for making friends', 'really impactful on campus'])}! {random.choice(personality['excitement'])}\n\n"
+                    response += f"\n💡 **Pro Tip**: {org_info['name']} is {self.pick(['super active and fun', 'great for networking', 'perfect for making friends', 'really impactful on campus'])}! {self.get_excitement(tone)}\n\n"
                     response += "🎯 **Student Gossip**: They're always planning something exciting!"
                 elif tone == 'formal':
                     response = f"🏛️ **{org_info['name']}** - {org_info['type']} Organization 🏛️\n\n"
@@ -1055,7 +1216,7 @@ class EnhancedLMUBuddy:
                     response += f"🎯 **Activities:**\n"
                     for event in org_info.get('events', [])[:3]:
                         response += f"• {event}\n"
-                    response += f"\n💡 **Pro Tip**: {org_info['name']} is known for being {random.choice(['very active', 'great for networking', 'fun and engaging', 'impactful'])}! 🦁\n\n"
+                    response += f"\n💡 **Pro Tip**: {org_info['name']} is known for being {self.pick(['very active', 'great for networking', 'fun and engaging', 'impactful'])}! 🦁\n\n"
                     response += "🎯 **Campus Insight**: Students love being part of this organization!"
                 
                 response += self.add_contextual_recommendation(query, tone)
@@ -1079,7 +1240,7 @@ class EnhancedLMUBuddy:
             response += "• Cultural clubs celebrating diversity\n"
             response += "• Service organizations and volunteer groups\n"
             response += "• Special interest clubs for every hobby\n\n"
-            response += f"💡 **Pro Tip**: Go to the involvement fair in September! {random.choice(personality['excitement'])}"
+            response += f"💡 **Pro Tip**: Go to the involvement fair in September! {self.get_excitement(tone)}"
         elif tone == 'formal':
             response = "🏛️ **LMU Student Organizations** 🏛️\n\n"
             response += "**Greek Life Organizations:**\n"
@@ -1133,7 +1294,7 @@ class EnhancedLMUBuddy:
                     response += f"🔥 **What's Cool Here:**\n"
                     for feature in facility_info.get('features', [])[:3]:
                         response += f"• {feature}\n"
-                    response += f"\n💡 **Pro Tip**: {facility_info.get('name', 'This place')} is {random.choice(['perfect for studying', 'great for hanging out', 'awesome for events', 'super convenient'])}! {random.choice(personality['excitement'])}\n\n"
+                    response += f"\n💡 **Pro Tip**: {facility_info.get('name', 'This place')} is {self.pick(['perfect for studying', 'great for hanging out', 'awesome for events', 'super convenient'])}! {self.get_excitement(tone)}\n\n"
                     response += "🎯 **Student Gossip**: This is definitely one of the best spots on campus!"
                 elif tone == 'formal':
                     response = f"🏢 **{facility_info.get('name', 'Unknown')}** - {facility_info.get('type', 'Facility')} Facility 🏢\n\n"
@@ -1155,7 +1316,7 @@ class EnhancedLMUBuddy:
                     response += f"✅ **Features:**\n"
                     for feature in facility_info.get('features', [])[:3]:
                         response += f"• {feature}\n"
-                    response += f"\n💡 **Pro Tip**: {facility_info.get('name', 'This place')} is known for being {random.choice(['great for studying', 'perfect for socializing', 'very convenient', 'really nice'])}! 🦁\n\n"
+                    response += f"\n💡 **Pro Tip**: {facility_info.get('name', 'This place')} is known for being {self.pick(['great for studying', 'perfect for socializing', 'very convenient', 'really nice'])}! 🦁\n\n"
                     response += "🎯 **Campus Insight**: Students love using this facility!"
                 
                 response += self.add_contextual_recommendation(query, tone)
@@ -1179,7 +1340,7 @@ class EnhancedLMUBuddy:
             response += "• The Lair - main dining and hangout spot\n"
             response += "• Sacred Heart Chapel - peaceful meditation garden\n"
             response += "• Various lounges throughout campus\n\n"
-            response += f"💡 **Pro Tip**: The library's ocean view study rooms are everything! {random.choice(personality['excitement'])}"
+            response += f"💡 **Pro Tip**: The library's ocean view study rooms are everything! {self.get_excitement(tone)}"
         elif tone == 'formal':
             response = "🏢 **LMU Campus Facilities** 🏢\n\n"
             response += "**Academic Facilities:**\n"
@@ -1233,7 +1394,7 @@ class EnhancedLMUBuddy:
             response += "• Greek life recruitment numbers are up\n"
             response += "• Study abroad programs expanding\n"
             response += "• Career fair dates announced\n\n"
-            response += f"💡 **Pro Tip**: Follow @lmu_news on Instagram for real-time updates! {random.choice(personality['excitement'])}"
+            response += f"💡 **Pro Tip**: Follow @lmu_news on Instagram for real-time updates! {self.get_excitement(tone)}"
         elif tone == 'formal':
             response = "📰 **LMU News and Announcements** 📰\n\n"
             response += "**Campus Developments:**\n"
@@ -1348,7 +1509,7 @@ class EnhancedLMUBuddy:
                 elif recent_context == "housing":
                     response += "Since we've been discussing housing, I can give you the real scoop on which dorms are the best and what to expect! "
                 
-                response += f"I'm constantly learning more about our amazing campus and all the little secrets that make LMU special. {random.choice(personality['excitement'])}"
+                response += f"I'm constantly learning more about our amazing campus and all the little secrets that make LMU special. {self.get_excitement(tone)}"
                 
             else:
                 response = "🤔 That's a great question! As your LMU Buddy, I'm here to help with everything campus-related. "
@@ -1372,7 +1533,7 @@ class EnhancedLMUBuddy:
             elif tone == 'casual':
                 response = f"Yo! I'm your LMU Buddy - your AI campus companion! I know literally everything about LMU, from the best professors and courses to the hidden food spots and upcoming events. "
                 response += "I'm basically your personal campus insider who's been programmed with all the tea about life on the bluff! "
-                response += f"What do you want to know about LMU? {random.choice(personality['excitement'])}"
+                response += f"What do you want to know about LMU? {self.get_excitement(tone)}"
                 
             else:
                 response = "👋 Hey! I'm your LMU Buddy - your AI campus companion! I can help you with everything from finding the best professors and courses to discovering great food spots and upcoming events. "
@@ -1409,7 +1570,7 @@ class EnhancedLMUBuddy:
         personality = self.lmu_personality.get(tone, self.lmu_personality['neutral'])
         
         if tone == 'casual':
-            response = f"That's a great question! I'm still learning, but here are some things I can help you with: {random.choice(personality['excitement'])}\n\n"
+            response = f"That's a great question! I'm still learning, but here are some things I can help you with: {self.get_excitement(tone)}\n\n"
             response += "🎯 **Try asking me about:**\n"
             response += "• 'What's popping this week?' (for events)\n"
             response += "• 'Where should I eat on campus?' (for dining)\n"
@@ -1458,7 +1619,7 @@ class EnhancedLMUBuddy:
             response += "• Uber/Lyft from nearby areas\n"
             response += "• Bike racks are available throughout campus\n"
             response += "• Walking from nearby apartments is totally doable\n\n"
-            response += f"💡 **Pro Tip**: Download the LMU app for real-time shuttle tracking! {random.choice(personality['excitement'])}"
+            response += f"💡 **Pro Tip**: Download the LMU app for real-time shuttle tracking! {self.get_excitement(tone)}"
         elif tone == 'formal':
             response = "🚗 **LMU Transportation & Parking Information** 🚗\n\n"
             response += "**Parking Facilities:**\n"
@@ -1514,7 +1675,7 @@ class EnhancedLMUBuddy:
             response += "• Super tight-knit campus community\n"
             response += "• Everyone knows everyone (in a good way)\n"
             response += "• Strong school spirit and pride\n\n"
-            response += f"💡 **Pro Tip**: The bluff trail behind campus is perfect for sunset walks! {random.choice(personality['excitement'])}"
+            response += f"💡 **Pro Tip**: The bluff trail behind campus is perfect for sunset walks! {self.get_excitement(tone)}"
         elif tone == 'formal':
             response = "🌅 **LMU Campus Life Overview** 🌅\n\n"
             response += "**Campus Location:**\n"
@@ -1600,13 +1761,13 @@ def create_enhanced_chat_interface():
         st.markdown("**📚 Academic**")
         if st.button("Find Professors", key="find_professors"):
             st.session_state.chat_history.append({"role": "user", "content": "Show me some good professors"})
-            ai_response = st.session_state.enhanced_lmu_buddy.generate_response("Show me some good professors")
+            ai_response = st.session_state.enhanced_lmu_buddy.generate_quick_response("Show me some good professors")
             st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
             st.rerun()
         
         if st.button("Popular Courses", key="popular_courses"):
             st.session_state.chat_history.append({"role": "user", "content": "What are some popular courses?"})
-            ai_response = st.session_state.enhanced_lmu_buddy.generate_response("What are some popular courses?")
+            ai_response = st.session_state.enhanced_lmu_buddy.generate_quick_response("What are some popular courses?")
             st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
             st.rerun()
     
@@ -1614,13 +1775,13 @@ def create_enhanced_chat_interface():
         st.markdown("**🎉 Campus Life**")
         if st.button("Upcoming Events", key="upcoming_events"):
             st.session_state.chat_history.append({"role": "user", "content": "What events are coming up?"})
-            ai_response = st.session_state.enhanced_lmu_buddy.generate_response("What events are coming up?")
+            ai_response = st.session_state.enhanced_lmu_buddy.generate_quick_response("What events are coming up?")
             st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
             st.rerun()
         
         if st.button("Best Food Spots", key="best_food"):
             st.session_state.chat_history.append({"role": "user", "content": "Where should I eat on campus?"})
-            ai_response = st.session_state.enhanced_lmu_buddy.generate_response("Where should I eat on campus?")
+            ai_response = st.session_state.enhanced_lmu_buddy.generate_quick_response("Where should I eat on campus?")
             st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
             st.rerun()
     
@@ -1650,7 +1811,7 @@ def create_enhanced_chat_interface():
             st.info("Thanks for the feedback! We're constantly working to improve.")
     with col3:
         if st.button("🔄 Clear Chat", key="clear_enhanced_chat"):
-            st.session_state.chat_history = []
+            st.session_state.chat_history.clear()
             st.rerun()
 
 if __name__ == "__main__":
@@ -6,18 +6,23 @@ from datetime import datetime, timedelta
 import re
 from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
-import pickle
 import os
 import random
 from typing import Dict, List, Any, Tuple
 import logging
+from lmu_buddy_memory import BoundedHistory, memory_report, DEFAULT_MAX_HISTORY
+from lmu_buddy_intents import QUICK_ACCESS_PROMPTS
+from lmu_buddy_cache import shared_quick_access, shared_search_cache
+from lmu_buddy_knowledge_base import knowledge_base, load_index, save_index
+
+EMBEDDINGS_PATH = 'lmu_embeddings.pkl'
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class EnhancedLMUBuddyV2:
-    def __init__(self):
+    def __init__(self, max_history: int = DEFAULT_MAX_HISTORY):
         self.model = SentenceTransformer('all-MiniLM-L6-v2')
         self.data = self.load_lmu_data()
         self.reddit_data = self.load_reddit_data()
@@ -92,7 +97,9 @@ class EnhancedLMUBuddyV2:
         }
         
         self.embeddings = self.load_or_compute_embeddings()
-        self.conversation_history = []
+        self.data_version = knowledge_base.current()
+        self.data_digest = knowledge_base.digest
+        self.conversation_history = BoundedHistory(max_history)
         self.user_preferences = {}
         self.user_context = {
             'name': None,
@@ -171,6 +178,9 @@ class EnhancedLMUBuddyV2:
             'cultural': '🌍', 'professional': '💼', 'spiritual': '🙏', 'food': '🍕',
             'movie': '🎬', 'workshop': '🔧', 'lecture': '🎤', 'party': '🎊', 'meeting': '🤝'
         }
+        
+        # Precomputed tone and retrieval for the quick-access buttons
+        self.quick_access = self.load_quick_access()
     
     def load_lmu_data(self):
         """Load existing LMU data"""
@@ -214,17 +224,29 @@ class EnhancedLMUBuddyV2:
     
     def load_or_compute_embeddings(self):
         """Load or compute embeddings for semantic search"""
-        try:
-            with open('lmu_embeddings.pkl', 'rb') as f:
-                data = pickle.load(f)
-                # Handle both old and new format
-                if isinstance(data, dict):
-                    return data
-                else:
-                    # Old format, recompute
-                    return self.compute_embeddings()
-        except FileNotFoundError:
+        data = load_index(EMBEDDINGS_PATH)
+        # Only reuse an index stamped with the current knowledge base
+        if not isinstance(data, dict) or 'mapping' not in data or not knowledge_base.matches(data):
             return self.compute_embeddings()
+        knowledge_base.seed(data.get('data_version', 0), data.get('data_digest'))
+        return data
+    
+    def refresh_knowledge_base(self) -> bool:
+        """Hot-reload data and index when the knowledge base version moves on"""
+        version = knowledge_base.current()
+        if version == self.data_version:
+            return False
+        
+        if knowledge_base.digest != self.data_digest:
+            logger.info("Knowledge base changed, reloading LMU data...")
+            self.data = self.load_lmu_data()
+            self.reddit_data = self.load_reddit_data()
+            self.rmp_data = self.load_rmp_data()
+            self.embeddings = self.load_or_compute_embeddings()
+            self.data_digest = knowledge_base.digest
+        self.data_version = knowledge_base.current()
+        self.quick_access = self.load_quick_access()
+        return True
     
     def compute_embeddings(self):
         """Compute embeddings for all LMU data"""
@@ -266,11 +288,11 @@ class EnhancedLMUBuddyV2:
         # Compute embeddings
         embeddings = self.model.encode(all_texts)
         
-        # Save embeddings
-        with open('lmu_embeddings.pkl', 'wb') as f:
-            pickle.dump({'embeddings': embeddings, 'mapping': text_mapping}, f)
+        # Save embeddings stamped with the knowledge base version they were built from
+        index = {'embeddings': embeddings, 'mapping': text_mapping, **knowledge_base.stamp()}
+        save_index(index, EMBEDDINGS_PATH)
         
-        return {'embeddings': embeddings, 'mapping': text_mapping}
+        return index
     
     def analyze_user_tone(self, user_input: str) -> Dict[str, float]:
         """Advanced tone analysis using multiple indicators"""
@@ -339,9 +361,10 @@ class EnhancedLMUBuddyV2:
     def mirror_user_tone(self, user_input: str, response: str) -> str:
         """Mirror the user's tone in the response"""
         tone_scores = self.analyze_user_tone(user_input)
-        dominant_tone = self.get_dominant_tone(tone_scores)
-        
-        # Adjust response based on tone
+        return self.apply_tone(self.get_dominant_tone(tone_scores), response)
+    
+    def apply_tone(self, dominant_tone: str, response: str) -> str:
+        """Adjust a response to an already-detected tone"""
         if dominant_tone == 'casual':
             response = self.make_casual(response)
         elif dominant_tone == 'formal':
@@ -432,13 +455,36 @@ class EnhancedLMUBuddyV2:
         
         return random.choice(all_tea) if all_tea else "LMU is literally the best campus ever! 🔥"
     
-    def semantic_search(self, query: str, top_k: int = 3) -> List[Dict]:
-        """Enhanced semantic search with Reddit and RMP data"""
+    def load_quick_access(self) -> Dict[str, Dict[str, Any]]:
+        """Quick-access table for the current data build, computed once and shared by every session"""
+        return shared_quick_access(('v2', self.data_version), self.data_version, self.precompute_quick_access)
+    
+    def precompute_quick_access(self) -> Dict[str, Dict[str, Any]]:
+        """Analyze tone and run retrieval once for every quick-access prompt"""
+        return {
+            prompt: {
+                'tone_scores': self.analyze_user_tone(prompt),
+                'search_results': self.semantic_search(prompt)
+            }
+            for prompt in QUICK_ACCESS_PROMPTS
+        }
+    
+    def encode_query(self, query: str):
+        return self.model.encode([query])
+    
+    def semantic_search(self, query: str, top_k: int = 3, query_embedding: Any = None) -> List[Dict]:
+        """Enhanced semantic search with Reddit and RMP data (query_embedding skips re-encoding the query)"""
         if not self.embeddings or not isinstance(self.embeddings, dict) or 'embeddings' not in self.embeddings:
             return []
         
+        cache_key = ('v2', self.data_version, query, top_k)
+        cached = shared_search_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         # Encode query
-        query_embedding = self.model.encode([query])
+        if query_embedding is None:
+            query_embedding = self.encode_query(query)
         
         # Compute similarities
         similarities = cosine_similarity(query_embedding, self.embeddings['embeddings'])[0]
@@ -456,13 +502,15 @@ class EnhancedLMUBuddyV2:
                     'similarity': float(similarities[idx])
                 })
         
+        shared_search_cache.put(cache_key, results, self.data_version)
         return results
     
     def generate_response(self, user_input: str) -> str:
         """Generate enhanced response with tone mirroring and authentic LMU knowledge"""
+        self.refresh_knowledge_base()
+        
         # Analyze user tone
         tone_scores = self.analyze_user_tone(user_input)
-        dominant_tone = self.get_dominant_tone(tone_scores)
         
         # Update user context
         self.extract_user_context(user_input)
@@ -470,6 +518,22 @@ class EnhancedLMUBuddyV2:
         # Get relevant information
         search_results = self.semantic_search(user_input)
         
+        return self.generate_from_analysis(user_input, tone_scores, search_results)
+    
+    def generate_quick_response(self, prompt: str) -> str:
+        """Answer a quick-access button prompt using its precomputed tone and retrieval"""
+        self.refresh_knowledge_base()
+        entry = self.quick_access.get(prompt)
+        if entry is None:
+            return self.generate_response(prompt)
+        
+        self.extract_user_context(prompt)
+        return self.generate_from_analysis(prompt, entry['tone_scores'], entry['search_results'])
+    
+    def generate_from_analysis(self, user_input: str, tone_scores: Dict[str, float], search_results: List[Dict]) -> str:
+        """Build the response once tone and retrieval results are known"""
+        dominant_tone = self.get_dominant_tone(tone_scores)
+        
         # Generate base response
         response = self.generate_base_response(user_input, search_results, dominant_tone)
         
@@ -479,7 +543,7 @@ class EnhancedLMUBuddyV2:
             response += f"\n\n{tea}"
         
         # Mirror user tone
-        response = self.mirror_user_tone(user_input, response)
+        response = self.apply_tone(dominant_tone, response)
         
         # Add conversation history
         self.conversation_history.append({
@@ -617,6 +681,29 @@ class EnhancedLMUBuddyV2:
         
         return str(item)
     
+    def memory_usage(self) -> Dict[str, int]:
+        """Approximate bytes used by this session's conversation state"""
+        return memory_report({
+            'conversation_history': self.conversation_history,
+            'user_context': self.user_context,
+            'user_preferences': self.user_preferences
+        })
+    
+    def export_session_state(self) -> Dict[str, Any]:
+        """Get the per-session state that should survive restarts"""
+        return {
+            'user_context': self.user_context,
+            'conversation_history': self.conversation_history.to_list()
+        }
+    
+    def restore_session_state(self, state: Dict[str, Any]):
+        """Restore per-session state saved by export_session_state"""
+        if not state:
+            return
+        self.user_context.update(state.get('user_context', {}))
+        self.conversation_history.clear()
+        self.conversation_history.extend(state.get('conversation_history', []))
+    
     def extract_user_context(self, user_input: str):
         """Extract and update user context from input"""
         text = user_input.lower()
@@ -706,19 +793,19 @@ def create_enhanced_chat_interface():
     with col1:
         if st.button("🍕 Food Tea", key="food_tea_v2"):
             st.session_state.last_user_input = "Tell me about the food on campus"
-            response = buddy.generate_response("Tell me about the food on campus")
+            response = buddy.generate_quick_response("Tell me about the food on campus")
             st.markdown(f"**LMU Buddy:** {response}")
     
     with col2:
         if st.button("👻 Dorm Gossip", key="dorm_gossip_v2"):
             st.session_state.last_user_input = "What's the tea about the dorms?"
-            response = buddy.generate_response("What's the tea about the dorms?")
+            response = buddy.generate_quick_response("What's the tea about the dorms?")
             st.markdown(f"**LMU Buddy:** {response}")
     
     with col3:
         if st.button("👨‍🏫 Professor Tea", key="prof_tea_v2"):
             st.session_state.last_user_input = "Tell me about the professors"
-            response = buddy.generate_response("Tell me about the professors")
+            response = buddy.generate_quick_response("Tell me about the professors")
             st.markdown(f"**LMU Buddy:** {response}")
 
 if __name__ == "__main__":
@@ -4,20 +4,29 @@ LMU Buddy Fine-tuning Script
 Fine-tunes an Ollama model with LMU-specific conversational data
 """
 
+import hashlib
 import json
 import os
 import subprocess
 import sys
-from typing import List, Dict, Any
+import tempfile
+from itertools import chain
+from typing import List, Dict, Any, Iterable, Iterator, Optional
 import logging
 from datetime import datetime
 import requests
 import time
 
+from lmu_buddy_dataset import (CORPUS_TRAINING_PATH, DEFAULT_SOURCES, TRAINING_DATA_PATH, generate_examples,
+                               read_examples, write_examples)
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+BUILD_TAG_LENGTH = 12  # hex digits of the Modelfile hash used as the model tag
+HASH_CHUNK_SIZE = 1 << 20  # bytes read at a time when hashing an existing Modelfile
+
 class LMUBuddyFineTuner:
     def __init__(self, base_model: str = "llama2:7b", model_name: str = "lmu-buddy"):
         self.base_model = base_model
@@ -235,10 +244,10 @@ Always respond in a helpful, engaging way that reflects LMU campus culture and s
         
         return training_data
 
-    def create_modelfile(self, training_data: List[Dict[str, Any]]) -> str:
-        """Create a Modelfile for Ollama fine-tuning"""
+    def modelfile_sections(self, training_data: Iterable[Dict[str, Any]]) -> Iterator[str]:
+        """Modelfile text piece by piece: the header, then one section per training example"""
         
-        modelfile_content = f"""FROM {self.base_model}
+        yield f"""FROM {self.base_model}
 
 # System prompt
 SYSTEM \"\"\"
@@ -250,7 +259,7 @@ SYSTEM \"\"\"
         
         # Add training examples
         for i, example in enumerate(training_data):
-            modelfile_content += f"""
+            yield f"""
 # Example {i+1}
 PROMPT \"\"\"
 {example['prompt']}
@@ -260,21 +269,99 @@ RESPONSE \"\"\"
 {example['response']}
 \"\"\"
 """
+
+    def create_modelfile(self, training_data: Iterable[Dict[str, Any]]) -> str:
+        """Create a Modelfile for Ollama fine-tuning as one string (see write_modelfile for large sets)"""
+        return "".join(self.modelfile_sections(training_data))
+
+    def write_modelfile(self, training_data: Iterable[Dict[str, Any]], filename: str = "Modelfile") -> str:
+        """Stream a Modelfile to disk and return its build tag
         
-        return modelfile_content
+        Sections are written as they are rendered and hashed on the way, so neither the
+        Modelfile nor the training set is ever held in memory. An existing file with the
+        same content is left untouched.
+        """
+        digest = hashlib.sha256()
+        directory = os.path.dirname(os.path.abspath(filename))
+        tmp = tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=directory,
+                                          prefix=f"{os.path.basename(filename)}.", suffix=".tmp", delete=False)
+        try:
+            with tmp:
+                for section in self.modelfile_sections(training_data):
+                    tmp.write(section)
+                    digest.update(section.encode('utf-8'))
+            build_tag = digest.hexdigest()[:BUILD_TAG_LENGTH]
+            if os.path.exists(filename) and self.file_build_tag(filename) == build_tag:
+                os.unlink(tmp.name)
+                logger.info(f"Modelfile {filename} unchanged")
+            else:
+                os.replace(tmp.name, filename)
+                logger.info(f"Modelfile saved to {filename}")
+        except BaseException:
+            if os.path.exists(tmp.name):
+                os.unlink(tmp.name)
+            raise
+        return build_tag
 
-    def save_training_data(self, training_data: List[Dict[str, Any]], filename: str = "lmu_buddy_training_data.json"):
-        """Save training data to JSON file"""
-        with open(filename, 'w') as f:
-            json.dump(training_data, f, indent=2)
+    def save_training_data(self, training_data: Iterable[Dict[str, Any]], filename: str = TRAINING_DATA_PATH):
+        """Save training data as JSONL; the system prompt is stored once in the header"""
+        write_examples(training_data, filename, shared={'system_prompt': self.system_prompt},
+                       base_model=self.base_model)
         logger.info(f"Training data saved to {filename}")
 
     def save_modelfile(self, modelfile_content: str, filename: str = "Modelfile"):
-        """Save Modelfile for Ollama"""
+        """Save Modelfile for Ollama (left untouched when the content is unchanged)"""
+        if os.path.exists(filename):
+            with open(filename, 'r') as f:
+                if f.read() == modelfile_content:
+                    logger.info(f"Modelfile {filename} unchanged")
+                    return
         with open(filename, 'w') as f:
             f.write(modelfile_content)
         logger.info(f"Modelfile saved to {filename}")
 
+    def build_tag(self, modelfile_content: str) -> str:
+        """Content address of a build
+        
+        The Modelfile holds the base model, system prompt and every training example,
+        so hashing it covers everything that changes the built model.
+        """
+        return hashlib.sha256(modelfile_content.encode('utf-8')).hexdigest()[:BUILD_TAG_LENGTH]
+
+    def file_build_tag(self, filename: str = "Modelfile") -> str:
+        """build_tag of a Modelfile on disk, hashed in chunks"""
+        digest = hashlib.sha256()
+        with open(filename, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()[:BUILD_TAG_LENGTH]
+
+    def live_model_name(self) -> str:
+        """Name the app resolves (model_name with the implicit :latest tag)"""
+        return self.model_name if ':' in self.model_name else f"{self.model_name}:latest"
+
+    def list_local_models(self) -> Dict[str, str]:
+        """Local model name -> ID from `ollama list`"""
+        models = {}
+        try:
+            result = subprocess.run(['ollama', 'list'], capture_output=True, text=True)
+            if result.returncode != 0:
+                logger.error(f"Failed to list models: {result.stderr}")
+                return models
+            for line in result.stdout.splitlines()[1:]:
+                columns = line.split()
+                if len(columns) >= 2:
+                    models[columns[0]] = columns[1]
+        except Exception as e:
+            logger.error(f"Error listing models: {e}")
+        return models
+
+    def is_current_build(self, build_tag: str) -> bool:
+        """Whether model_name already points at the build with this tag"""
+        models = self.list_local_models()
+        build = models.get(f"{self.model_name.split(':')[0]}:{build_tag}")
+        return build is not None and models.get(self.live_model_name()) == build
+
     def check_ollama_installation(self) -> bool:
         """Check if Ollama is installed and running"""
         try:
@@ -317,53 +404,59 @@ RESPONSE \"\"\"
         except Exception as e:
             logger.error(f"Error pulling base model: {e}")
 
-    def create_model(self):
-        """Create the fine-tuned model using Ollama"""
-        logger.info(f"Creating fine-tuned model {self.model_name}...")
+    def create_model(self, build_tag: Optional[str] = None, modelfile: str = "Modelfile") -> bool:
+        """Create the fine-tuned model using Ollama
+        
+        The model is built under a content-addressed tag (e.g. lmu-buddy:3f2a9c1e04b7)
+        and model_name is then repointed at it with `ollama cp`. The old model keeps
+        serving until the copy swaps the manifest, and an existing build with the same
+        tag is reused instead of rebuilt.
+        """
+        if build_tag is None:
+            build_tag = self.file_build_tag(modelfile)
+        build = f"{self.model_name.split(':')[0]}:{build_tag}"
+        live = self.live_model_name()
+        
         try:
-            # First, try to remove the model if it exists
-            subprocess.run(['ollama', 'rm', self.model_name], capture_output=True, text=True)
-            
-            # Create the model using the Modelfile
-            result = subprocess.run(['ollama', 'create', self.model_name, '-f', 'Modelfile'], 
-                                  capture_output=True, text=True)
-            if result.returncode == 0:
-                logger.info(f"Model {self.model_name} created successfully!")
-                return True
+            if build in self.list_local_models():
+                logger.info(f"Build {build} already exists, skipping ollama create")
             else:
-                logger.error(f"Failed to create model: {result.stderr}")
-                logger.error(f"Full error output: {result.stdout}")
+                logger.info(f"Creating fine-tuned model {build}...")
+                result = subprocess.run(['ollama', 'create', build, '-f', modelfile],
+                                        capture_output=True, text=True)
+                if result.returncode != 0:
+                    logger.error(f"Failed to create model: {result.stderr}")
+                    logger.error(f"Full error output: {result.stdout}")
+                    return False
+                logger.info(f"Model {build} created successfully!")
+            
+            result = subprocess.run(['ollama', 'cp', build, live], capture_output=True, text=True)
+            if result.returncode != 0:
+                logger.error(f"Failed to point {live} at {build}: {result.stderr}")
                 return False
+            logger.info(f"{live} now serves build {build_tag}")
+            return True
         except Exception as e:
             logger.error(f"Error creating model: {e}")
             return False
 
-    def test_model(self, test_prompts: List[str] = None):
-        """Test the fine-tuned model with sample prompts"""
-        if test_prompts is None:
-            test_prompts = [
-                "Where should I eat on campus?",
-                "What's a good coffee spot?",
-                "Where can I study?",
-                "Tell me a fun fact about LMU"
-            ]
+    def test_model(self, test_prompts: List[str] = None, report_path: str = "lmu_buddy_eval_report.json"):
+        """Evaluate the fine-tuned model through the Ollama API and save a JSON report
         
-        logger.info("Testing the fine-tuned model...")
+        Defaults to every training prompt, scored against keywords from its reference answers.
+        """
+        from lmu_buddy_eval import build_eval_cases, print_summary, run_evaluation, save_report
         
-        for prompt in test_prompts:
-            try:
-                result = subprocess.run(['ollama', 'run', self.model_name, prompt], 
-                                      capture_output=True, text=True, timeout=30)
-                if result.returncode == 0:
-                    logger.info(f"Prompt: {prompt}")
-                    logger.info(f"Response: {result.stdout.strip()}")
-                    logger.info("-" * 50)
-                else:
-                    logger.error(f"Failed to get response for '{prompt}': {result.stderr}")
-            except subprocess.TimeoutExpired:
-                logger.error(f"Timeout getting response for '{prompt}'")
-            except Exception as e:
-                logger.error(f"Error testing model: {e}")
+        if test_prompts is None:
+            cases = build_eval_cases()
+        else:
+            cases = [{'prompt': prompt, 'keywords': []} for prompt in test_prompts]
+        
+        logger.info(f"Testing the fine-tuned model on {len(cases)} prompts...")
+        report = run_evaluation(self.model_name, cases)
+        save_report(report, report_path)
+        print_summary(report)
+        return report
 
     def run_fine_tuning(self):
         """Run the complete fine-tuning process"""
@@ -379,17 +472,33 @@ RESPONSE \"\"\"
         training_data = self.create_training_data()
         self.save_training_data(training_data)
         
+        # Step 2b: Generate factual examples from the scraped data
+        logger.info("Generating training data from scraped sources...")
+        corpus_stats: Dict[str, Any] = {}
+        try:
+            write_examples(generate_examples(DEFAULT_SOURCES, corpus_stats), CORPUS_TRAINING_PATH,
+                           sources=DEFAULT_SOURCES)
+        except Exception as e:
+            logger.error(f"Error generating training data from scraped sources: {e}")
+            return False
+        if corpus_stats['bad_records']:
+            logger.warning(f"Skipped {corpus_stats['bad_records']} unreadable records in the scraped sources")
+        
         # Step 3: Create Modelfile
         logger.info("Creating Modelfile...")
-        modelfile_content = self.create_modelfile(training_data)
-        self.save_modelfile(modelfile_content)
+        build_tag = self.write_modelfile(chain(read_examples(TRAINING_DATA_PATH),
+                                               read_examples(CORPUS_TRAINING_PATH)))
+        
+        if self.is_current_build(build_tag):
+            logger.info(f"{self.live_model_name()} is already build {build_tag}; nothing to rebuild")
+            return True
         
         # Step 4: Check and pull base model
         if not self.check_base_model():
             self.pull_base_model()
         
         # Step 5: Create fine-tuned model
-        if self.create_model():
+        if self.create_model(build_tag):
             logger.info("Fine-tuning completed successfully!")
             
             # Step 6: Test the model
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+LMU Buddy Async Ollama Client
+Non-blocking Ollama access for the Streamlit app. Every generation in the process goes
+through one FIFO request queue sized to the backend's parallelism, so many users never
+overload the single local Ollama daemon, and abandoned generations can be cancelled.
+"""
+
+import asyncio
+import concurrent.futures
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional
+
+import aiohttp
+
+from lmu_buddy_ollama_client import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+    LMUBuddyOllamaClient,
+    chunk_text,
+    flight_key,
+    get_shared_client
+)
+
+logger = logging.getLogger(__name__)
+
+# Matches Ollama's OLLAMA_NUM_PARALLEL; more in-flight requests than this only queue inside the daemon
+DEFAULT_MAX_PARALLEL = 4
+DEFAULT_MAX_QUEUE = 64  # waiting requests beyond this are rejected instead of piling up
+
+
+class QueueFullError(Exception):
+    """Raised when the request queue is already at max_queue waiting requests"""
+
+
+class RequestQueue:
+    """FIFO concurrency limiter with queue-depth metrics (async, single event loop)"""
+
+    def __init__(self, max_parallel: int = DEFAULT_MAX_PARALLEL, max_queue: int = DEFAULT_MAX_QUEUE):
+        if max_parallel < 1:
+            raise ValueError("max_parallel must be at least 1")
+        self.max_parallel = max_parallel
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self._waiters: "deque[asyncio.Future]" = deque()
+        self.stats = {'admitted': 0, 'rejected': 0, 'cancelled': 0, 'max_depth': 0, 'total_wait': 0.0}
+
+    @property
+    def depth(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self):
+        """Wait for a free slot in arrival order"""
+        if self.in_flight < self.max_parallel and not self._waiters:
+            self.in_flight += 1
+            self.stats['admitted'] += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self.stats['rejected'] += 1
+            raise QueueFullError(f"{len(self._waiters)} requests already waiting")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.stats['max_depth'] = max(self.stats['max_depth'], len(self._waiters))
+        started = time.perf_counter()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was handed over just as we were cancelled; pass it on
+                self._release_slot()
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            self.stats['cancelled'] += 1
+            raise
+        self.stats['admitted'] += 1
+        self.stats['total_wait'] += time.perf_counter() - started
+
+    def release(self):
+        self._release_slot()
+
+    def _release_slot(self):
+        # Hand the slot straight to the oldest waiter so later arrivals cannot jump the queue
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+
+    def snapshot(self) -> Dict[str, Any]:
+        admitted = self.stats['admitted']
+        return {
+            'max_parallel': self.max_parallel,
+            'in_flight': self.in_flight,
+            'waiting': self.depth,
+            'max_depth': self.stats['max_depth'],
+            'admitted': admitted,
+            'rejected': self.stats['rejected'],
+            'cancelled': self.stats['cancelled'],
+            'avg_wait': self.stats['total_wait'] / admitted if admitted else 0.0
+        }
+
+
+class Flight:
+    """One backend generation shared by every subscriber asking the same thing"""
+
+    def __init__(self):
+        self.chunks: List[Dict[str, Any]] = []
+        self.timings: Dict[str, Any] = {}
+        self.subscribers = 0
+        self.finished = False
+        self.exception: Optional[Exception] = None
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def publish(self, chunk: Dict[str, Any]):
+        self.chunks.append(chunk)
+        self._notify()
+
+    def finish(self):
+        self.finished = True
+        self._notify()
+
+    async def wait(self):
+        """Wait for the next chunk or the end of the flight"""
+        await self._changed.wait()
+
+
+class AsyncLMUBuddyOllamaClient:
+    """aiohttp client for the Ollama API; builds payloads the same way as LMUBuddyOllamaClient"""
+
+    def __init__(self, base_url: str = "http://localhost:11434", max_parallel: int = DEFAULT_MAX_PARALLEL,
+                 max_queue: int = DEFAULT_MAX_QUEUE, connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT, prompt_client: Optional[LMUBuddyOllamaClient] = None):
+        self.base_url = base_url
+        self.api_url = f"{base_url}/api"
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.prompt_client = prompt_client or get_shared_client(base_url=base_url)
+        self.queue = RequestQueue(max_parallel, max_queue)
+        self.recent_timings = deque(maxlen=200)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._flights: Dict[str, "Flight"] = {}
+        self.flight_stats = {'backend_requests': 0, 'coalesced': 0}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Created lazily so it binds to the loop that actually runs the requests
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.queue.max_parallel, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    def _timeout(self, read_timeout: Optional[float] = None) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(
+            sock_connect=self.connect_timeout,
+            sock_read=read_timeout if read_timeout is not None else self.read_timeout
+        )
+
+    async def generate(self, prompt: str, timeout: Optional[float] = None, session_id: Optional[str] = None,
+                       topic: Optional[str] = None, model: Optional[str] = None,
+                       options: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """Get a complete response, waiting in the request queue for a free slot"""
+        chunks = []
+        async for token in self.stream(prompt, timeout, session_id=session_id, topic=topic, model=model,
+                                       options=options):
+            chunks.append(token)
+        return "".join(chunks).strip() or None
+
+    async def stream(self, prompt: str, timeout: Optional[float] = None,
+                     timings: Optional[Dict[str, Any]] = None, session_id: Optional[str] = None,
+                     topic: Optional[str] = None, model: Optional[str] = None,
+                     options: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """Stream response tokens; cancelling the consumer closes the connection so Ollama stops generating
+
+        Identical requests already in flight are joined instead of sent again: every
+        subscriber replays the shared stream from its first chunk.
+        """
+        timings = timings if timings is not None else {}
+        timings.update({'queued': 0.0, 'ttft': None, 'total': None, 'tokens': 0, 'completed': False,
+                        'error': None, 'coalesced': False})
+        endpoint, payload = self.prompt_client._prepare_request(prompt, True, session_id, topic, model, options)
+        key = flight_key(endpoint, payload)
+
+        flight = self._flights.get(key)
+        if flight is None:
+            if not self.prompt_client.breaker.allow_request():
+                timings['error'] = 'circuit open'
+                return
+            flight = Flight()
+            self._flights[key] = flight
+            flight.task = asyncio.ensure_future(self._run_flight(key, flight, endpoint, payload, prompt, timeout))
+        else:
+            timings['coalesced'] = True
+            self.flight_stats['coalesced'] += 1
+        flight.subscribers += 1
+        started = time.perf_counter()
+
+        try:
+            index = 0
+            while True:
+                if index < len(flight.chunks):
+                    chunk = flight.chunks[index]
+                    index += 1
+                    token = chunk_text(chunk)
+                    if token:
+                        if timings['ttft'] is None:
+                            timings['ttft'] = time.perf_counter() - started
+                        timings['tokens'] += 1
+                        yield token
+                    if chunk.get("done"):
+                        timings['completed'] = True
+                        self.prompt_client._finish_request(chunk, prompt, session_id, topic, timings,
+                                                           record_usage=False, payload=payload)
+                        return
+                    continue
+
+                if flight.finished:
+                    if flight.exception is not None:
+                        raise flight.exception
+                    timings['error'] = flight.timings.get('error')
+                    return
+                await flight.wait()
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.finished:
+                # Nobody is listening any more; stop the generation so later askers start afresh
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
+            timings['queued'] = flight.timings.get('queued', 0.0)
+            timings['total'] = time.perf_counter() - started
+            self.recent_timings.append(dict(timings))
+
+    async def _run_flight(self, key: str, flight: "Flight", endpoint: str, payload: Dict[str, Any],
+                          prompt: str, timeout: Optional[float]):
+        """Send one request to the backend and publish its chunks to the flight's subscribers"""
+        timings = flight.timings
+        timings.update({'queued': 0.0, 'ttft': None, 'completed': False, 'error': None})
+        started = time.perf_counter()
+        self.flight_stats['backend_requests'] += 1
+        try:
+            async with self.queue:
+                timings['queued'] = time.perf_counter() - started
+                async for chunk in self._request_chunks(endpoint, payload, prompt, timeout, timings):
+                    if timings['ttft'] is None and chunk_text(chunk):
+                        timings['ttft'] = time.perf_counter() - started
+                    if chunk.get("done"):
+                        timings['completed'] = True
+                        self.prompt_client._record_usage(chunk, payload=payload)
+                    flight.publish(chunk)
+        except QueueFullError as e:
+            flight.exception = e
+        finally:
+            timings['total'] = time.perf_counter() - started
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            flight.finish()
+            self.prompt_client._report_stream_outcome(timings)
+
+    async def _request_chunks(self, endpoint: str, payload: Dict[str, Any], prompt: str,
+                              timeout: Optional[float], timings: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """Parsed NDJSON chunks of one request that already holds a queue slot"""
+        response = None
+        try:
+            response = await self._get_session().post(
+                f"{self.api_url}/{endpoint}", json=payload, timeout=self._timeout(timeout)
+            )
+            if response.status != 200:
+                logger.error(f"API error: {response.status} - {await response.text()}")
+                timings['error'] = f"HTTP {response.status}"
+                return
+
+            async for line in response.content:
+                line = line.strip()
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    logger.error(f"API stream error: {chunk['error']}")
+                    timings['error'] = chunk['error']
+                    return
+                yield chunk
+                if chunk.get("done"):
+                    return
+            timings['error'] = "stream ended before done"
+        except asyncio.TimeoutError:
+            logger.error(f"API stream timeout for prompt: {prompt}")
+            timings['error'] = 'timeout'
+        except aiohttp.ClientError as e:
+            logger.error(f"Error streaming response via API: {e}")
+            timings['error'] = str(e)
+        except ValueError as e:
+            logger.error(f"Malformed chunk in API stream: {e}")
+            timings['error'] = f"malformed chunk: {e}"
+        finally:
+            if response is not None:
+                if timings['completed']:
+                    response.release()
+                else:
+                    # Dropping the socket is what tells Ollama to abandon the generation
+                    response.close()
+
+    def queue_stats(self) -> Dict[str, Any]:
+        return dict(self.queue.snapshot(), in_flight_prompts=len(self._flights), **self.flight_stats)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+
+class AsyncClientRunner:
+    """Runs an event loop on a daemon thread so synchronous Streamlit code can submit coroutines"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="lmu-buddy-async", daemon=True)
+        self._thread.start()
+
+    def submit(self, coro: Awaitable) -> concurrent.futures.Future:
+        """Schedule a coroutine; cancelling the returned future cancels the task"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def iterate(self, make_stream: Callable[[], AsyncIterator[Any]], poll_interval: float = 0.25) -> Iterator[Any]:
+        """Consume an async iterator from synchronous code
+
+        Yields None every poll_interval seconds while waiting so callers can update the UI;
+        closing the generator (e.g. on a Streamlit rerun) cancels the underlying task.
+        """
+        items: "queue.Queue" = queue.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for item in make_stream():
+                    items.put(item)
+            finally:
+                items.put(done)
+
+        future = self.submit(pump())
+        try:
+            while True:
+                try:
+                    item = items.get(timeout=poll_interval)
+                except queue.Empty:
+                    yield None
+                    continue
+                if item is done:
+                    break
+                yield item
+            future.result()
+        finally:
+            if not future.done():
+                future.cancel()
+
+
+_shared_runner: Optional[AsyncClientRunner] = None
+_shared_async_client: Optional[AsyncLMUBuddyOllamaClient] = None
+_shared_async_lock = threading.Lock()
+
+def get_shared_async_client(**kwargs) -> AsyncLMUBuddyOllamaClient:
+    """Process-wide async client; its request queue is the global limit on concurrent generations"""
+    global _shared_async_client
+    with _shared_async_lock:
+        if _shared_async_client is None:
+            _shared_async_client = AsyncLMUBuddyOllamaClient(**kwargs)
+        return _shared_async_client
+
+def get_shared_runner() -> AsyncClientRunner:
+    global _shared_runner
+    with _shared_async_lock:
+        if _shared_runner is None:
+            _shared_runner = AsyncClientRunner()
+        return _shared_runner
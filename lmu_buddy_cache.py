@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+LMU Buddy Caches
+Process-wide caches shared by every chat session. Entries carry the knowledge base
+version they were built from; once a newer version is seen, older entries stop
+hitting and are retired as they reach the LRU end.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_RESPONSE_CACHE_SIZE = 1000
+DEFAULT_RESPONSE_CACHE_TTL = 10 * 60  # seconds
+DEFAULT_SEARCH_CACHE_SIZE = 2000
+DEFAULT_COMPLETION_CACHE_SIZE = 500
+DEFAULT_COMPLETION_CACHE_TTL = 30 * 60  # seconds
+DEFAULT_SIMILARITY_THRESHOLD = 0.92  # cosine similarity for two questions to share an answer
+DEFAULT_QUICK_ACCESS_TTL = 24 * 60 * 60  # seconds; quick-access answers go stale daily anyway
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, drop punctuation/emojis and collapse whitespace"""
+    text = re.sub(r"[^\w\s']", " ", query.lower())
+    return " ".join(text.split())
+
+
+class ResponseCache:
+    """Thread-safe LRU cache with per-entry TTL and knowledge base versioning"""
+
+    def __init__(self, max_entries: int = DEFAULT_RESPONSE_CACHE_SIZE, ttl: float = DEFAULT_RESPONSE_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.current_version = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.retired = 0
+
+    @staticmethod
+    def make_key(query: str, intent: str, tone: str, data_version: Any, *extra: Hashable) -> Tuple:
+        """Cache key covering normalized query, resolved intent, tone and corpus version"""
+        return (normalize_query(query), intent, tone, data_version) + tuple(extra)
+
+    def _is_stale(self, entry: Tuple[float, int, Any], now: float) -> bool:
+        return entry[0] < now or entry[1] < self.current_version
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._is_stale(entry, time.time()):
+                if entry is not None:
+                    del self._entries[key]
+                    self.retired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key: Hashable, value: Any, version: int = 0):
+        """Store a value built from the given knowledge base version"""
+        now = time.time()
+        with self._lock:
+            if version < self.current_version:
+                return
+            self.current_version = version
+            self._entries[key] = (now + self.ttl, version, value)
+            self._entries.move_to_end(key)
+
+            # Entries from older versions are never requested again, so they drift to the LRU end
+            while self._entries:
+                oldest = next(iter(self._entries.values()))
+                if not self._is_stale(oldest, now):
+                    break
+                self._entries.popitem(last=False)
+                self.retired += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'retired': self.retired,
+            'version': self.current_version,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SemanticCache:
+    """Thread-safe cache of LLM completions looked up by query embedding similarity
+
+    A hit needs the same intent, tone and knowledge base version, and a cosine similarity
+    of at least `threshold` to a stored query.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_COMPLETION_CACHE_SIZE, ttl: float = DEFAULT_COMPLETION_CACHE_TTL,
+                 threshold: float = DEFAULT_SIMILARITY_THRESHOLD):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self.current_version = 0
+        self._entries: "OrderedDict[int, Tuple[float, int, str, str, np.ndarray, Any]]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.retired = 0
+
+    @staticmethod
+    def _unit(embedding: Any) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _retire_stale(self, now: float):
+        stale = [entry_id for entry_id, entry in self._entries.items()
+                 if entry[0] < now or entry[1] < self.current_version]
+        for entry_id in stale:
+            del self._entries[entry_id]
+        self.retired += len(stale)
+
+    def get(self, embedding: Any, intent: str, tone: str, version: int = 0) -> Optional[Any]:
+        """Completion stored for the most similar matching query, if similar enough"""
+        query = self._unit(embedding)
+        now = time.time()
+        with self._lock:
+            candidates = [(entry_id, entry) for entry_id, entry in self._entries.items()
+                          if entry[2] == intent and entry[3] == tone and entry[1] == version and entry[0] >= now]
+            if candidates:
+                matrix = np.stack([entry[4] for _, entry in candidates])
+                similarities = matrix @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    entry_id, entry = candidates[best]
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    return entry[5]
+            self.misses += 1
+            return None
+
+    def put(self, embedding: Any, intent: str, tone: str, value: Any, version: int = 0):
+        """Store a completion for a query built from the given knowledge base version"""
+        now = time.time()
+        with self._lock:
+            if version < self.current_version:
+                return
+            if version > self.current_version:
+                self.current_version = version
+                self._retire_stale(now)
+            self._entries[self._next_id] = (now + self.ttl, version, intent, tone, self._unit(embedding), value)
+            self._next_id += 1
+            while self._entries and next(iter(self._entries.values()))[0] < now:
+                self._entries.popitem(last=False)
+                self.retired += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'retired': self.retired,
+            'version': self.current_version,
+            'threshold': self.threshold,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Shared by every buddy instance in the process
+shared_response_cache = ResponseCache()
+shared_search_cache = ResponseCache(max_entries=DEFAULT_SEARCH_CACHE_SIZE)
+shared_completion_cache = SemanticCache()
+shared_quick_access_cache = ResponseCache(max_entries=4, ttl=DEFAULT_QUICK_ACCESS_TTL)
+_quick_access_lock = threading.Lock()
+
+
+def shared_quick_access(key: Hashable, version: int, build: Callable[[], Any]) -> Any:
+    """Quick-access table for a knowledge base version, built by the first session that needs it"""
+    with _quick_access_lock:
+        table = shared_quick_access_cache.get(key)
+        if table is None:
+            table = build()
+            shared_quick_access_cache.put(key, table, version)
+        return table
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+LMU Buddy Circuit Breaker
+Stops sending requests to the LLM backend while it is down or too slow, so users get the
+rule-based answer immediately instead of waiting for a timeout
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FAILURE_THRESHOLD = 3  # consecutive failures or SLO breaches before opening
+DEFAULT_LATENCY_SLO = 8.0  # seconds until the first generated token
+DEFAULT_TOTAL_LATENCY_SLO = 60.0  # seconds for a whole answer, when time to first token is unknown
+DEFAULT_RESET_TIMEOUT = 30.0  # seconds to stay open before letting a probe through
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Closed -> open after repeated failures; open -> half-open after reset_timeout,
+    where a single probe request decides whether to close again"""
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 latency_slo: float = DEFAULT_LATENCY_SLO, reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+                 total_latency_slo: float = DEFAULT_TOTAL_LATENCY_SLO):
+        self.failure_threshold = failure_threshold
+        self.latency_slo = latency_slo
+        self.total_latency_slo = total_latency_slo
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self.stats = {'allowed': 0, 'rejected': 0, 'failures': 0, 'slo_breaches': 0, 'opened': 0}
+
+    def allow_request(self) -> bool:
+        """Whether a request may go to the backend; callers must report the outcome"""
+        with self._lock:
+            if self.state == OPEN and time.time() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                logger.info("Circuit half-open, probing the LLM backend")
+
+            if self.state == CLOSED or (self.state == HALF_OPEN and not self._probe_in_flight):
+                if self.state == HALF_OPEN:
+                    self._probe_in_flight = True
+                self.stats['allowed'] += 1
+                return True
+
+            self.stats['rejected'] += 1
+            return False
+
+    def record_success(self, latency: Optional[float], total: Optional[float] = None):
+        """Report a finished request; one slower than an SLO counts as a failure
+
+        ``latency`` is the time to first token, judged against latency_slo. ``total`` (the
+        whole request) is judged against total_latency_slo, which allows for long answers.
+        """
+        breach = None
+        if latency is not None and latency > self.latency_slo:
+            breach = f"first token after {latency:.1f}s, over {self.latency_slo:.1f}s SLO"
+        elif total is not None and total > self.total_latency_slo:
+            breach = f"answer took {total:.1f}s, over {self.total_latency_slo:.1f}s SLO"
+        if breach:
+            self.stats['slo_breaches'] += 1
+            self._record_failure(breach)
+            return
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info("LLM backend healthy again, closing circuit")
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self, reason: str = "request failed"):
+        self.stats['failures'] += 1
+        self._record_failure(reason)
+
+    def release(self):
+        """Report a request that ended without a verdict (e.g. cancelled by the user)"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def _record_failure(self, reason: str):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.stats['opened'] += 1
+                    logger.warning(f"Opening circuit for {self.reset_timeout:.0f}s: {reason}")
+                self.state = OPEN
+                self.opened_at = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return dict(self.stats, state=self.state, consecutive_failures=self.consecutive_failures)
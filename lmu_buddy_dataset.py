@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+LMU Buddy Dataset Builder
+Streams records from the scraped LMU, Reddit and RateMyProfessors data, renders Q/A training
+examples from per-category templates, dedupes them and writes them out incrementally as JSONL
+
+Training files start with a header record holding the format version and the fields shared
+by every example (e.g. the system prompt), followed by one compact example per line:
+
+    {"format": "lmu-buddy-training", "version": 1, "shared": {"system_prompt": "..."}}
+    {"prompt": "Where should I eat on campus?", "response": "..."}
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+TRAINING_DATA_PATH = "lmu_buddy_training_data.jsonl"
+CORPUS_TRAINING_PATH = "lmu_buddy_corpus_training.jsonl"
+TRAINING_FORMAT = "lmu-buddy-training"
+TRAINING_FORMAT_VERSION = 1
+# The LMU file the buddies answer from; pass enhanced_lmu_data_v2.json via --source to include its campus tea
+DEFAULT_SOURCES = ["enhanced_lmu_data.json", "lmu_reddit_data.json", "lmu_rmp_data.json"]
+MAX_SNIPPET_CHARS = 280
+
+# (question, answer) format strings per category; a template is skipped for records
+# missing any field it uses. List fields are joined into "a, b and c".
+TEMPLATES: Dict[str, List[Tuple[str, str]]] = {
+    'professors': [
+        ("What's {name} like?",
+         "{name} teaches {department} and is rated {rating}/5 (difficulty {difficulty}/5) over {reviews} reviews. Students call them {tags}."),
+        ("Is {name} a good professor?",
+         "Students rate {name} {rating}/5 with a {difficulty}/5 difficulty. They teach {courses}."),
+        ("What does {name} teach?",
+         "{name} ({department}) teaches {courses}. Office: {office}.")
+    ],
+    'courses': [
+        ("What is {code} about?", "{code} {name} ({credits} credits): {description}"),
+        ("Who teaches {code}?", "{code} {name} is taught by {professors}. Prereqs: {prerequisites}."),
+        ("When is {code} offered?", "{code} {name} is offered in {semester_offered}.")
+    ],
+    'dining': [
+        ("What are the hours for {name}?", "{name} ({location}) is open {hours}."),
+        ("What's good at {name}?", "{name} is known for {popular_items}. Price range: {price_range}."),
+        ("Where is {name}?", "{name} is a {type} at {location}.")
+    ],
+    'housing': [
+        ("What's {name} like?", "{name} is {type} on the {location}. Pros: {pros}. Cons: {cons}."),
+        ("How much does {name} cost?", "{name} runs {cost}. Room types: {room_types}.")
+    ],
+    'events': [
+        ("When is {name}?", "{name} is on {date} ({time}) at {location}. Cost: {cost}."),
+        ("Tell me about {name}", "{name}: {description} Hosted by {organizer}, {date} at {location}.")
+    ],
+    'organizations': [
+        ("Tell me about {name}", "{name} ({type}, about {members} members): {description}"),
+        ("What does {name} do?", "{name} runs things like {events}.")
+    ],
+    'facilities': [
+        ("When is {name} open?", "{name} ({location}) is open {hours}."),
+        ("What's at {name}?", "{name} has {features}. Popular spots: {popular_spots}.")
+    ],
+    'news': [
+        ("Any {category} news from LMU?", "{title} ({date}): {summary}")
+    ],
+    'athletics': [
+        ("Does LMU have a {sport} team?", "Yep! LMU {sport} competes in the {conference}, {division}.")
+    ],
+    'academics': [
+        ("Tell me about the {name}", "The {name} ({abbreviation}) is in {location} and offers {programs}."),
+        ("Where is {abbreviation}?", "The {name} ({abbreviation}) is in {location}.")
+    ],
+    'reddit_posts': [
+        ("{title}", "Students on r/LMU have asked this too ({comments} comments). The original post: \"{snippet}\"")
+    ],
+    'campus_tea': [
+        ("What are students saying about \"{topic}\"?", "Campus tea: {snippet}")
+    ],
+    'rmp_professors': [
+        ("How is {name} rated?", "{name} ({department}) is rated {rating}/5 with difficulty {difficulty}/5 from {review_count} reviews on RateMyProfessors.")
+    ],
+    'professor_tea': [
+        ("What's the tea on {professor}?", "{tea_content}. {details}.")
+    ]
+}
+
+
+# Scraper artifacts to clean before rendering, e.g. athletics pages named "Baseball: Roster"
+FIELD_CLEANERS = {
+    'sport': lambda value: value.split(':')[0].strip()
+}
+
+
+def _listing(values: List[Any], limit: int = 3) -> str:
+    """'a, b and c' from the first few list values"""
+    values = [str(value) for value in values[:limit] if value not in (None, "")]
+    if len(values) <= 1:
+        return "".join(values)
+    return f"{', '.join(values[:-1])} and {values[-1]}"
+
+
+def _fields(record: Dict[str, Any]) -> Dict[str, str]:
+    """Template fields for a record; empty values are left out so templates needing them are skipped"""
+    fields = {}
+    for key, value in record.items():
+        if isinstance(value, list):
+            value = _listing(value)
+        elif isinstance(value, (dict, bool)) or value is None:
+            continue
+        value = " ".join(str(value).split())
+        if key in FIELD_CLEANERS:
+            value = FIELD_CLEANERS[key](value)
+        if value:
+            fields[key] = value
+    topic = " ".join(str(record.get('content') or record.get('title') or "").split()).rstrip("?.! ")
+    if topic:
+        fields['topic'] = topic
+    text = record.get('details') or record.get('content') or ""
+    snippet = " ".join(str(text).split())
+    if snippet:
+        fields['snippet'] = snippet if len(snippet) <= MAX_SNIPPET_CHARS else snippet[:MAX_SNIPPET_CHARS - 3].rstrip() + "..."
+    return fields
+
+
+def _load_json(path: str) -> Any:
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def iter_source_records(path: str, stats: Optional[Dict[str, Any]] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """(category, record) pairs from one scraped data file
+
+    .jsonl sources are streamed line by line ({"category": ..., "record": {...}}); a malformed
+    line is skipped and counted in stats['bad_records']. JSON documents are read one file at
+    a time and released before the next source.
+    """
+    stats = stats if stats is not None else {}
+    if not os.path.exists(path):
+        logger.warning(f"Skipping missing source {path}")
+        return
+
+    if path.endswith(".jsonl"):
+        with open(path, 'r') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    item = json.loads(line)
+                    category, record = item.get('category', ''), item.get('record', {})
+                except (ValueError, AttributeError) as e:
+                    stats['bad_records'] = stats.get('bad_records', 0) + 1
+                    logger.warning(f"Skipping malformed line {line_number} of {path}: {e}")
+                    continue
+                yield category, record
+        return
+
+    data = _load_json(path)
+    name = os.path.basename(path)
+    if name.startswith("lmu_reddit"):
+        for posts in data.get('data', {}).values():
+            for post in posts:
+                if post.get('title', '').rstrip().endswith('?'):
+                    yield 'reddit_posts', post
+        for tea in data.get('campus_tea', []):
+            yield 'campus_tea', tea
+    elif name.startswith("lmu_rmp"):
+        for professor in data.get('professors', []):
+            yield 'rmp_professors', professor
+        for tea in data.get('professor_tea', []):
+            yield 'professor_tea', tea
+    else:
+        for category, records in data.items():
+            if category in TEMPLATES and isinstance(records, list):
+                for record in records:
+                    if isinstance(record, dict):
+                        yield category, record
+
+
+def render_examples(category: str, record: Dict[str, Any]) -> Iterator[Dict[str, str]]:
+    """Q/A examples for one record from its category's templates"""
+    fields = _fields(record)
+    for question, answer in TEMPLATES.get(category, []):
+        try:
+            yield {'prompt': question.format_map(fields), 'response': answer.format_map(fields),
+                   'category': category}
+        except KeyError:
+            continue
+
+
+def example_hash(example: Dict[str, str]) -> str:
+    """Dedupe key: the prompt/response pair, case and whitespace normalized"""
+    text = " ".join(f"{example['prompt']}\n{example['response']}".lower().split())
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def generate_examples(sources: Iterable[str] = DEFAULT_SOURCES,
+                      stats: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, str]]:
+    """Deduplicated examples from every source; only the hashes seen so far are kept in memory
+
+    A record that can't be read or rendered is skipped and counted in stats['bad_records'].
+    A source that can't be read at all raises, so write_examples keeps the previous corpus
+    instead of swapping in a truncated one.
+    """
+    stats = stats if stats is not None else {}
+    stats.update({'records': 0, 'examples': 0, 'duplicates': 0, 'bad_records': 0, 'by_category': {}})
+    seen = set()
+    for path in sources:
+        for category, record in iter_source_records(path, stats):
+            stats['records'] += 1
+            try:
+                examples = list(render_examples(category, record))
+            except Exception as e:
+                stats['bad_records'] += 1
+                logger.warning(f"Skipping unrenderable {category} record in {path}: {e}")
+                continue
+            for example in examples:
+                key = example_hash(example)
+                if key in seen:
+                    stats['duplicates'] += 1
+                    continue
+                seen.add(key)
+                example['source'] = os.path.basename(path)
+                stats['examples'] += 1
+                stats['by_category'][category] = stats['by_category'].get(category, 0) + 1
+                yield example
+
+
+def write_examples(examples: Iterable[Dict[str, Any]], path: str = CORPUS_TRAINING_PATH,
+                   shared: Optional[Dict[str, Any]] = None, **metadata) -> int:
+    """Write a header record, then examples one JSON line at a time
+
+    Example fields equal to their ``shared`` value are left out of each line. Each writer
+    gets its own temp file, swapped in only once complete and removed if writing fails.
+    Extra keyword arguments are stored in the header.
+    """
+    shared = shared or {}
+    header = dict(metadata, format=TRAINING_FORMAT, version=TRAINING_FORMAT_VERSION, shared=shared)
+    tmp = tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=os.path.dirname(os.path.abspath(path)),
+                                      prefix=f"{os.path.basename(path)}.", suffix=".tmp", delete=False)
+    written = 0
+    try:
+        with tmp:
+            tmp.write(json.dumps(header, ensure_ascii=False) + "\n")
+            for example in examples:
+                compact = {key: value for key, value in example.items()
+                           if key not in shared or shared[key] != value}
+                tmp.write(json.dumps(compact, ensure_ascii=False) + "\n")
+                written += 1
+        os.replace(tmp.name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp.name)
+        except OSError:
+            pass
+        raise
+    logger.info(f"Wrote {written} training examples to {path}")
+    return written
+
+
+def _is_header(record: Dict[str, Any]) -> bool:
+    return record.get('format') == TRAINING_FORMAT
+
+
+def read_header(path: str = TRAINING_DATA_PATH) -> Dict[str, Any]:
+    """Header record of a training file ({} for legacy files without one)"""
+    if path.endswith(".json"):
+        return {}
+    with open(path, 'r') as f:
+        first = f.readline()
+    record = json.loads(first) if first.strip() else {}
+    if _is_header(record) and record.get('version', 0) > TRAINING_FORMAT_VERSION:
+        logger.warning(f"{path} uses training format v{record['version']}, newer than v{TRAINING_FORMAT_VERSION}")
+    return record if _is_header(record) else {}
+
+
+def read_examples(path: str = TRAINING_DATA_PATH, with_shared: bool = False) -> Iterator[Dict[str, Any]]:
+    """Stream examples from a training file
+
+    with_shared=True fills each example in with the header's shared fields. Legacy
+    JSON-array files are still accepted (loaded whole).
+    """
+    if path.endswith(".json"):
+        with open(path, 'r') as f:
+            yield from json.load(f)
+        return
+
+    shared: Dict[str, Any] = {}
+    with open(path, 'r') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if _is_header(record):
+                shared = record.get('shared', {}) if with_shared else {}
+                continue
+            yield dict(shared, **record) if shared else record
+
+
+def main():
+    """Regenerate the corpus training examples after a scrape"""
+    parser = argparse.ArgumentParser(description="Build LMU Buddy training examples from scraped data")
+    parser.add_argument("--source", action="append", dest="sources",
+                        help=f"scraped data file (repeatable; default: {', '.join(DEFAULT_SOURCES)})")
+    parser.add_argument("--output", default=CORPUS_TRAINING_PATH)
+    args = parser.parse_args()
+
+    print("🦁 LMU Buddy Dataset Builder")
+    print("=" * 50)
+
+    stats: Dict[str, Any] = {}
+    sources = args.sources or DEFAULT_SOURCES
+    write_examples(generate_examples(sources, stats), args.output, sources=sources)
+    print(f"Records read: {stats['records']}")
+    print(f"Examples written: {stats['examples']} ({stats['duplicates']} duplicates skipped)")
+    if stats['bad_records']:
+        print(f"Bad records skipped: {stats['bad_records']}")
+    for category, count in sorted(stats['by_category'].items()):
+        print(f"  {category}: {count}")
+
+
+if __name__ == "__main__":
+    main()
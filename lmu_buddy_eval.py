@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+LMU Buddy Model Evaluation
+Runs the training prompts through the Ollama HTTP API with bounded concurrency and writes a
+JSON report (latency, tokens/sec, keyword hits) for comparing model builds
+"""
+
+import argparse
+import json
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from lmu_buddy_dataset import TRAINING_DATA_PATH, read_examples
+from lmu_buddy_load_test import percentile
+from lmu_buddy_ollama_client import LMU_BUDDY_SYSTEM_PROMPT, chunk_text, create_pooled_session
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPORT_PATH = "lmu_buddy_eval_report.json"
+DEFAULT_CONCURRENCY = 4
+DEFAULT_TIMEOUT = 60
+MAX_KEYWORDS = 6
+
+STOPWORDS = {
+    'about', 'after', 'again', 'also', 'always', 'because', 'before', 'being', 'best', 'between', 'both',
+    'could', 'depends', 'does', 'doing', 'either', 'every', 'from', 'have', 'here', 'just', 'know',
+    'like', 'literally', 'make', 'more', 'most', 'much', 'need', 'only', 'or', 'other', 'over', 'should',
+    'some', 'still', 'that', 'their', 'them', 'then', 'there', 'these', 'they', 'this', 'those', 'tryna',
+    'unless', 'very', 'want', 'wanna', 'were', 'what', 'when', 'where', 'which', 'while', 'with', 'would',
+    'your', "you're", 'yours', 'the', 'but', 'you', 'and', 'for', 'are', 'not', 'can', 'get'
+}
+
+
+def extract_keywords(references: List[str], limit: int = MAX_KEYWORDS) -> List[str]:
+    """Words an answer is expected to mention: campus names first, then the longest content words"""
+    names: List[str] = []
+    words: List[str] = []
+    for reference in references:
+        for sentence in re.split(r"[.!?:;=]\s*", reference):
+            for position, raw in enumerate(re.findall(r"[A-Za-z][A-Za-z'\-]+", sentence)):
+                word = raw.strip("'-")
+                lower = word.lower()
+                if len(word) < 3 or lower in STOPWORDS:
+                    continue
+                # Capitalized mid-sentence words are places, people and orgs (Bluff, Lair, Doolan)
+                target = names if word[0].isupper() and position > 0 else words
+                if lower not in (existing.lower() for existing in names + words):
+                    target.append(word)
+    words.sort(key=len, reverse=True)
+    return (names + words)[:limit]
+
+
+def build_eval_cases(path: str = TRAINING_DATA_PATH) -> List[Dict[str, Any]]:
+    """One case per distinct training prompt with its reference answers and expected keywords"""
+    cases: Dict[str, Dict[str, Any]] = {}
+    try:
+        for example in read_examples(path):
+            if not example.get('prompt'):
+                continue
+            case = cases.setdefault(example['prompt'], {'prompt': example['prompt'], 'references': []})
+            if example.get('response'):
+                case['references'].append(example['response'])
+    except Exception as e:
+        logger.error(f"Error loading evaluation prompts from {path}: {e}")
+        return []
+
+    for case in cases.values():
+        case['keywords'] = extract_keywords(case['references'])
+    return list(cases.values())
+
+
+def evaluate_prompt(session: requests.Session, base_url: str, model: str, case: Dict[str, Any],
+                    timeout: float = DEFAULT_TIMEOUT, system_prompt: Optional[str] = None) -> Dict[str, Any]:
+    """Stream one answer from /api/generate and score it against the case's keywords"""
+    payload = {"model": model, "prompt": case['prompt'], "stream": True}
+    if system_prompt:
+        payload["system"] = system_prompt
+
+    result = {'prompt': case['prompt'], 'response': '', 'error': None, 'latency': None, 'ttft': None,
+              'eval_count': 0, 'tokens_per_second': 0.0}
+    started = time.perf_counter()
+    try:
+        with session.post(f"{base_url}/api/generate", json=payload, stream=True, timeout=(3.05, timeout)) as response:
+            if response.status_code != 200:
+                result['error'] = f"HTTP {response.status_code}: {response.text[:200]}"
+            else:
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        result['error'] = chunk['error']
+                        break
+                    token = chunk_text(chunk)
+                    if token and result['ttft'] is None:
+                        result['ttft'] = time.perf_counter() - started
+                    result['response'] += token
+                    if chunk.get("done"):
+                        result['eval_count'] = chunk.get('eval_count', 0)
+                        eval_seconds = chunk.get('eval_duration', 0) / 1e9
+                        if eval_seconds:
+                            result['tokens_per_second'] = result['eval_count'] / eval_seconds
+                        break
+                else:
+                    result['error'] = "stream ended before done"
+    except requests.exceptions.Timeout:
+        result['error'] = 'timeout'
+    except Exception as e:
+        result['error'] = str(e)
+    result['latency'] = time.perf_counter() - started
+
+    answer = result['response'].lower()
+    hits = [keyword for keyword in case.get('keywords', []) if keyword.lower() in answer]
+    result.update({
+        'response_chars': len(result['response']),
+        'keywords': case.get('keywords', []),
+        'keyword_hits': hits,
+        'keyword_recall': len(hits) / len(case['keywords']) if case.get('keywords') else None,
+        'passed': result['error'] is None and bool(result['response'].strip())
+                  and (not case.get('keywords') or bool(hits))
+    })
+    return result
+
+
+def summarize(results: List[Dict[str, Any]], wall_seconds: float) -> Dict[str, Any]:
+    answered = [result for result in results if result['error'] is None]
+    latencies = [result['latency'] for result in answered]
+    ttfts = [result['ttft'] for result in answered if result['ttft'] is not None]
+    recalls = [result['keyword_recall'] for result in answered if result['keyword_recall'] is not None]
+    speeds = [result['tokens_per_second'] for result in answered if result['tokens_per_second']]
+    return {
+        'prompts': len(results),
+        'errors': len(results) - len(answered),
+        'pass_rate': sum(result['passed'] for result in results) / len(results) if results else 0.0,
+        'avg_keyword_recall': sum(recalls) / len(recalls) if recalls else 0.0,
+        'p50_latency': percentile(latencies, 50),
+        'p95_latency': percentile(latencies, 95),
+        'avg_ttft': sum(ttfts) / len(ttfts) if ttfts else 0.0,
+        'avg_tokens_per_second': sum(speeds) / len(speeds) if speeds else 0.0,
+        'avg_response_chars': sum(result['response_chars'] for result in answered) / len(answered) if answered else 0.0,
+        'wall_seconds': wall_seconds
+    }
+
+
+def run_evaluation(model: str, cases: List[Dict[str, Any]], base_url: str = "http://localhost:11434",
+                   concurrency: int = DEFAULT_CONCURRENCY, timeout: float = DEFAULT_TIMEOUT,
+                   system_prompt: Optional[str] = None) -> Dict[str, Any]:
+    """Evaluate every case with at most `concurrency` requests in flight; returns the report"""
+    session = create_pooled_session(concurrency)
+    completed = 0
+    lock = threading.Lock()
+
+    def evaluate(case: Dict[str, Any]) -> Dict[str, Any]:
+        nonlocal completed
+        result = evaluate_prompt(session, base_url, model, case, timeout, system_prompt)
+        with lock:
+            completed += 1
+            status = "ok" if result['passed'] else f"FAIL ({result['error'] or 'no keyword hit'})"
+            logger.info(f"[{completed}/{len(cases)}] {result['latency']:.2f}s {status}: {case['prompt']}")
+        return result
+
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(evaluate, cases))
+    finally:
+        session.close()
+
+    return {
+        'model': model,
+        'base_url': base_url,
+        'created_at': datetime.now().isoformat(),
+        'concurrency': concurrency,
+        'system_prompt': bool(system_prompt),
+        'summary': summarize(results, time.perf_counter() - started),
+        'results': results
+    }
+
+
+def save_report(report: Dict[str, Any], path: str = DEFAULT_REPORT_PATH):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Evaluation report saved to {path}")
+
+
+def print_summary(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None):
+    """Summary table, with the change against an earlier report if given"""
+    print(f"Model: {report['model']} ({report['summary']['prompts']} prompts, concurrency {report['concurrency']})")
+    for name, value in report['summary'].items():
+        line = f"  {name:<22} {value:>10.3f}" if isinstance(value, float) else f"  {name:<22} {value:>10}"
+        if baseline and isinstance(baseline['summary'].get(name), (int, float)):
+            line += f"  ({value - baseline['summary'][name]:+.3f} vs {baseline['model']})"
+        print(line)
+
+
+def main():
+    """Evaluate a model build against the training prompts"""
+    parser = argparse.ArgumentParser(description="Evaluate an LMU Buddy model through the Ollama API")
+    parser.add_argument("--model", default="lmu-buddy", help="model to evaluate")
+    parser.add_argument("--base-url", default="http://localhost:11434")
+    parser.add_argument("--data", default=TRAINING_DATA_PATH, help="training data with prompts and reference answers")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="requests in flight at once")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="read timeout per prompt in seconds")
+    parser.add_argument("--system", action="store_true",
+                        help="send the LMU Buddy system prompt (for base models without one baked in)")
+    parser.add_argument("--output", default=DEFAULT_REPORT_PATH, help="where to write the JSON report")
+    parser.add_argument("--compare", help="earlier report to show the change against")
+    args = parser.parse_args()
+
+    print("🦁 LMU Buddy Model Evaluation")
+    print("=" * 50)
+
+    cases = build_eval_cases(args.data)
+    if not cases:
+        print("No evaluation prompts found")
+        return
+
+    report = run_evaluation(args.model, cases, args.base_url, args.concurrency, args.timeout,
+                            LMU_BUDDY_SYSTEM_PROMPT if args.system else None)
+    save_report(report, args.output)
+
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.compare, 'r') as f:
+                baseline = json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading baseline report {args.compare}: {e}")
+    print_summary(report, baseline)
+
+
+if __name__ == "__main__":
+    main()
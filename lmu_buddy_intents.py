@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+LMU Buddy Intent Routing
+Keyword rules that map a user message to the handler that answers it
+"""
+
+from typing import List, Tuple
+
+# Checked in order; the first intent with a matching keyword wins
+INTENT_KEYWORDS: List[Tuple[str, List[str]]] = [
+    ('professor', ['professor', 'teacher', 'instructor', 'faculty', 'dr.', 'prof.']),
+    ('course', ['course', 'class', 'subject', 'syllabus', 'assignment', 'exam']),
+    ('dining', ['food', 'eat', 'dining', 'restaurant', 'lair', 'lions den', 'cafe']),
+    ('housing', ['housing', 'dorm', 'apartment', 'live', 'residence', 'room']),
+    ('event', ['event', 'activity', 'weekend', 'party', 'social', 'fun']),
+    ('organization', ['organization', 'club', 'greek', 'sorority', 'fraternity', 'group']),
+    ('facility', ['facility', 'library', 'study', 'gym', 'center', 'building']),
+    ('news', ['news', 'announcement', 'update', 'information']),
+    ('transportation', ['parking', 'car', 'shuttle', 'transportation', 'commute']),
+    ('campus_life', ['weather', 'sunset', 'view', 'bluff', 'campus'])
+]
+
+QUESTION_WORDS = ['what', 'how', 'why', 'when', 'where']
+
+
+def resolve_intent(user_input: str) -> str:
+    """Resolve the intent for a message ('unknown' for short/broad questions, 'general' otherwise)"""
+    user_input_lower = user_input.lower()
+    for intent, keywords in INTENT_KEYWORDS:
+        if any(word in user_input_lower for word in keywords):
+            return intent
+
+    if len(user_input.split()) < 3 or any(word in user_input_lower for word in QUESTION_WORDS):
+        return 'unknown'
+    return 'general'
+
+
+# Fixed prompts sent by the quick-access buttons; routing and retrieval for these
+# are precomputed when a buddy builds its index
+QUICK_ACCESS_PROMPTS = [
+    "Show me some good professors",
+    "What are some popular courses?",
+    "What events are coming up?",
+    "Where should I eat on campus?",
+    "Tell me about housing options",
+    "What organizations should I join?",
+    "What's the latest LMU news?",
+    "Tell me about the food on campus",
+    "What's the tea about the dorms?",
+    "Tell me about the professors",
+    "What are the biggest complaints about admin?",
+    "What's up with TNL events?",
+    "Tell me about basketball games"
+]
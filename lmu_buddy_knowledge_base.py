@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+LMU Buddy Knowledge Base Version
+Single monotonically increasing version for the data files the buddies load.
+Every cache keys its entries by this version, so a data refresh retires stale entries.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+KNOWLEDGE_BASE_FILES = ['enhanced_lmu_data.json', 'lmu_reddit_data.json', 'lmu_rmp_data.json']
+REFRESH_CHECK_INTERVAL = 5.0  # seconds between file stat checks
+
+
+class KnowledgeBaseVersion:
+    """Tracks a content digest of the data files and bumps the version whenever it changes"""
+
+    def __init__(self, paths: List[str] = None, check_interval: float = REFRESH_CHECK_INTERVAL):
+        self.paths = paths or list(KNOWLEDGE_BASE_FILES)
+        self.check_interval = check_interval
+        self.version = 0
+        self.digest: Optional[str] = None
+        self._file_stats: Optional[Tuple] = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def _stat_files(self) -> Tuple:
+        stats = []
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+                stats.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                stats.append(None)
+        return tuple(stats)
+
+    def _compute_digest(self) -> str:
+        digest = hashlib.sha1()
+        for path in self.paths:
+            digest.update(path.encode('utf-8'))
+            try:
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
+            except FileNotFoundError:
+                digest.update(b'<missing>')
+        return digest.hexdigest()
+
+    def current(self) -> int:
+        """Current version, re-checking the files at most every check_interval seconds"""
+        now = time.time()
+        if self.version and now - self._last_check < self.check_interval:
+            return self.version
+
+        with self._lock:
+            self._last_check = now
+            stats = self._stat_files()
+            if stats != self._file_stats:
+                digest = self._compute_digest()
+                if digest != self.digest:
+                    self.version += 1
+                    if self.digest is not None:
+                        logger.info(f"Knowledge base changed, now at version {self.version}")
+                    self.digest = digest
+                self._file_stats = stats
+            return self.version
+
+    def seed(self, version: int, digest: Optional[str]):
+        """Continue numbering from the stamp on an index artifact so versions survive restarts"""
+        self.current()
+        with self._lock:
+            if digest == self.digest:
+                self.version = max(self.version, version)
+            else:
+                self.version = max(self.version, version + 1)
+
+    def matches(self, stamp: Dict[str, Any]) -> bool:
+        """Whether an artifact stamp was built from the current data"""
+        self.current()
+        return stamp.get('data_digest') == self.digest
+
+    def stamp(self) -> Dict[str, Any]:
+        """Version fields to store on an index artifact"""
+        return {'data_version': self.current(), 'data_digest': self.digest}
+
+
+def load_index(path: str) -> Optional[Any]:
+    """Unpickle an index artifact; None when it is missing or unreadable (e.g. truncated)"""
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable index {path}: {e}")
+        return None
+
+
+def save_index(index: Any, path: str):
+    """Pickle an index artifact and swap it in atomically
+
+    Each writer gets its own temp file, so concurrent rebuilds never interleave writes.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp = tempfile.NamedTemporaryFile(dir=directory, prefix=f"{os.path.basename(path)}.", suffix=".tmp",
+                                      delete=False)
+    try:
+        with tmp:
+            pickle.dump(index, tmp)
+        os.replace(tmp.name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp.name)
+        except OSError:
+            pass
+        raise
+
+
+# Shared by every buddy and cache in the process
+knowledge_base = KnowledgeBaseVersion()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+LMU Buddy Load Test
+Simulates concurrent chat sessions replaying realistic conversations and reports throughput,
+latency percentiles, error rate and memory per session as concurrency ramps up
+"""
+
+import argparse
+import copy
+import json
+import logging
+import random
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from lmu_buddy_intents import QUICK_ACCESS_PROMPTS
+from lmu_buddy_memory import BoundedHistory, LRUCounter
+
+# Configure logging
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+TRAINING_DATA_PATH = "lmu_buddy_training_data.jsonl"
+DEFAULT_CONCURRENCY_LEVELS = [1, 5, 10, 25]
+DEFAULT_TURNS = 5
+
+
+def load_conversation_prompts(path: str = TRAINING_DATA_PATH) -> List[str]:
+    """Student questions from the training data plus the quick-access button prompts"""
+    from lmu_buddy_dataset import read_examples
+    prompts = list(QUICK_ACCESS_PROMPTS)
+    try:
+        prompts.extend(example['prompt'] for example in read_examples(path) if example.get('prompt'))
+    except Exception as e:
+        logger.error(f"Error loading prompts from {path}: {e}")
+    return prompts
+
+
+def build_conversations(prompts: List[str], sessions: int, turns: int, seed: int = 0) -> List[List[str]]:
+    """One conversation per session; quick-access prompts repeat across sessions like real button clicks"""
+    generator = random.Random(seed)
+    return [[generator.choice(prompts) for _ in range(turns)] for _ in range(sessions)]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(round(pct / 100.0 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+class EngineTarget:
+    """Rule-based engine; each session gets its own conversation state on top of one loaded buddy"""
+
+    def __init__(self):
+        from enhanced_lmu_buddy import EnhancedLMUBuddy
+        self.base = EnhancedLMUBuddy()
+        self.initial_context = copy.deepcopy(self.base.user_context)
+
+    def new_session(self, session_id: str) -> Any:
+        session = copy.copy(self.base)
+        session.conversation_history = BoundedHistory(self.base.conversation_history.maxlen)
+        session.query_frequency = LRUCounter(self.base.query_frequency.max_keys)
+        session.user_context = copy.deepcopy(self.initial_context)
+        session.user_preferences = {}
+        return session
+
+    def respond(self, session: Any, session_id: str, prompt: str) -> str:
+        return session.generate_response(prompt)
+
+    def session_bytes(self, session: Any) -> int:
+        return session.memory_usage()['total']
+
+
+class LLMTarget:
+    """LMUBuddyOllamaClient against a live Ollama or the stub server"""
+
+    def __init__(self, base_url: str, ground_with_engine: bool = False, pool_size: int = 10):
+        from lmu_buddy_ollama_client import LMUBuddyOllamaClient
+        self.client = LMUBuddyOllamaClient(base_url=base_url, pool_size=pool_size)
+        self.engine = EngineTarget() if ground_with_engine else None
+
+    def new_session(self, session_id: str) -> Any:
+        return self.engine.new_session(session_id) if self.engine else None
+
+    def respond(self, session: Any, session_id: str, prompt: str) -> str:
+        context = {'session_id': session_id}
+        if session is not None:
+            context['buddy'] = session
+        return self.client.get_enhanced_response(prompt, context)
+
+    def session_bytes(self, session: Any) -> int:
+        return session.memory_usage()['total'] if session is not None else 0
+
+
+def run_level(target: Any, conversations: List[List[str]], think_time: float = 0.0) -> Dict[str, Any]:
+    """Run every conversation concurrently (one worker per session) and summarize"""
+    latencies: List[float] = []
+    errors = 0
+    session_bytes: List[int] = []
+    lock = threading.Lock()
+
+    def run_session(index: int, prompts: List[str]):
+        nonlocal errors
+        session_id = f"load-{len(conversations)}-{index}"
+        session = target.new_session(session_id)
+        for prompt in prompts:
+            started = time.perf_counter()
+            try:
+                response = target.respond(session, session_id, prompt)
+                failed = not response
+            except Exception as e:
+                logger.error(f"Session {session_id} failed on '{prompt}': {e}")
+                failed = True
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                errors += failed
+            if think_time:
+                time.sleep(think_time)
+        with lock:
+            session_bytes.append(target.session_bytes(session))
+        return session
+
+    traced_before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(conversations)) as executor:
+        sessions = list(executor.map(lambda args: run_session(*args), enumerate(conversations)))
+    wall = time.perf_counter() - started
+    traced_growth = tracemalloc.get_traced_memory()[0] - traced_before
+    del sessions
+
+    requests_made = len(latencies)
+    return {
+        'sessions': len(conversations),
+        'requests': requests_made,
+        'wall_seconds': wall,
+        'requests_per_second': requests_made / wall if wall else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'error_rate': errors / requests_made if requests_made else 0.0,
+        'state_kb_per_session': sum(session_bytes) / len(session_bytes) / 1024 if session_bytes else 0.0,
+        'traced_kb_per_session': max(traced_growth, 0) / len(conversations) / 1024
+    }
+
+
+def print_report(results: List[Dict[str, Any]]):
+    print(f"{'sessions':>8} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7} {'state KB':>9} {'heap KB':>9}")
+    for result in results:
+        print(f"{result['sessions']:>8} {result['requests_per_second']:>8.1f} {result['p50_ms']:>9.1f} "
+              f"{result['p95_ms']:>9.1f} {result['p99_ms']:>9.1f} {result['error_rate']:>7.1%} "
+              f"{result['state_kb_per_session']:>9.1f} {result['traced_kb_per_session']:>9.1f}")
+
+
+def main():
+    """Ramp concurrency against the chosen target and print a summary table"""
+    parser = argparse.ArgumentParser(description="Concurrent chat load generator for LMU Buddy")
+    parser.add_argument("--target", choices=["engine", "llm"], default="engine",
+                        help="rule-based engine response function or the Ollama client")
+    parser.add_argument("--concurrency", default=",".join(str(level) for level in DEFAULT_CONCURRENCY_LEVELS),
+                        help="comma-separated numbers of simultaneous sessions")
+    parser.add_argument("--turns", type=int, default=DEFAULT_TURNS, help="messages per session")
+    parser.add_argument("--think-time", type=float, default=0.0, help="seconds between a session's messages")
+    parser.add_argument("--base-url", default="http://localhost:11434", help="Ollama URL for --target llm")
+    parser.add_argument("--stub", action="store_true", help="start the Ollama stub server in-process for --target llm")
+    parser.add_argument("--ground", action="store_true", help="ground LLM prompts with the engine's semantic search")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    prompts = load_conversation_prompts()
+
+    stub = None
+    base_url = args.base_url
+    if args.target == "llm" and args.stub:
+        from ollama_stub_server import OllamaStubServer
+        stub = OllamaStubServer(port=0).start()
+        base_url = stub.url
+
+    print("🦁 LMU Buddy Load Test")
+    print("=" * 50)
+    print(f"Target: {args.target}{f' ({base_url})' if args.target == 'llm' else ''}, {args.turns} turns per session")
+
+    target: Any = EngineTarget() if args.target == "engine" else LLMTarget(base_url, args.ground, max(levels))
+    tracemalloc.start()
+    results = []
+    try:
+        for level in levels:
+            conversations = build_conversations(prompts, level, args.turns, args.seed + level)
+            results.append(run_level(target, conversations, args.think_time))
+    finally:
+        tracemalloc.stop()
+        if stub is not None:
+            stub.stop()
+
+    print_report(results)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'target': args.target, 'turns': args.turns, 'results': results}, f, indent=2)
+        print(f"\nResults saved to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
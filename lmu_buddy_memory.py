@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+LMU Buddy Memory Utilities
+Bounded conversation storage, frequency tracking and per-session memory accounting
+"""
+
+import sys
+from collections import OrderedDict, deque
+from typing import Any, Dict, Iterator, List, Optional
+
+# Default caps for per-session structures
+DEFAULT_MAX_HISTORY = 50
+DEFAULT_MAX_TRACKED_QUERIES = 500
+
+# Topics used to summarize turns that fall out of the ring buffer
+TOPIC_KEYWORDS = {
+    'academic': ['professor', 'course', 'class', 'exam', 'study'],
+    'dining': ['food', 'eat', 'dining', 'restaurant', 'cafe', 'lair', 'coffee'],
+    'social': ['event', 'party', 'club', 'organization', 'weekend', 'tnl'],
+    'housing': ['housing', 'dorm', 'apartment', 'roommate'],
+    'facilities': ['library', 'gym', 'building', 'facility'],
+    'transportation': ['parking', 'shuttle', 'car', 'commute']
+}
+
+
+def get_turn_text(turn: Any) -> str:
+    """Get the user-side text of a stored turn (supports V1, V2 and app formats)"""
+    if isinstance(turn, dict):
+        if turn.get('role', 'user') != 'user':
+            return ""
+        return str(turn.get('content') or turn.get('user') or "")
+    return str(turn)
+
+
+def summarize_turn(turn: Any) -> List[str]:
+    """Get the topics mentioned in a turn"""
+    text = get_turn_text(turn).lower()
+    return [topic for topic, keywords in TOPIC_KEYWORDS.items() if any(word in text for word in keywords)]
+
+
+class BoundedHistory:
+    """Ring buffer of conversation turns that keeps a topic summary of evicted turns"""
+
+    def __init__(self, maxlen: int = DEFAULT_MAX_HISTORY, summarize_evicted: bool = True):
+        if maxlen < 1:
+            raise ValueError("maxlen must be at least 1")
+        self.maxlen = maxlen
+        self.summarize_evicted = summarize_evicted
+        self.evicted_count = 0
+        self.evicted_topics: Dict[str, int] = {}
+        self._turns = deque(maxlen=maxlen)
+
+    def append(self, turn: Any):
+        """Add a turn, evicting the oldest one when the buffer is full"""
+        if len(self._turns) == self.maxlen:
+            self._evict(self._turns[0])
+        self._turns.append(turn)
+
+    def extend(self, turns):
+        for turn in turns:
+            self.append(turn)
+
+    def _evict(self, turn: Any):
+        self.evicted_count += 1
+        if self.summarize_evicted:
+            for topic in summarize_turn(turn):
+                self.evicted_topics[topic] = self.evicted_topics.get(topic, 0) + 1
+
+    def summary(self) -> str:
+        """Short text summary of the turns that were evicted"""
+        if not self.evicted_count:
+            return ""
+        topics = sorted(self.evicted_topics.items(), key=lambda x: x[1], reverse=True)
+        topic_text = ", ".join(f"{topic} x{count}" for topic, count in topics) or "general chat"
+        return f"Earlier in this chat ({self.evicted_count} older turns): {topic_text}"
+
+    def clear(self):
+        self._turns.clear()
+        self.evicted_count = 0
+        self.evicted_topics = {}
+
+    def to_list(self) -> List[Any]:
+        return list(self._turns)
+
+    def __len__(self) -> int:
+        return len(self._turns)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._turns)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self._turns)[index]
+        return self._turns[index]
+
+
+class LRUCounter:
+    """Frequency counter that only remembers the most recently seen keys"""
+
+    def __init__(self, max_keys: int = DEFAULT_MAX_TRACKED_QUERIES):
+        if max_keys < 1:
+            raise ValueError("max_keys must be at least 1")
+        self.max_keys = max_keys
+        self.evicted_count = 0
+        self._counts = OrderedDict()
+
+    def increment(self, key: str) -> int:
+        """Count one more occurrence of key and mark it as recently used"""
+        count = self._counts.pop(key, 0) + 1
+        self._counts[key] = count
+        if len(self._counts) > self.max_keys:
+            self._counts.popitem(last=False)
+            self.evicted_count += 1
+        return count
+
+    def get(self, key: str, default: int = 0) -> int:
+        return self._counts.get(key, default)
+
+    def load(self, counts: Dict[str, int]):
+        """Restore counts in least- to most-recently-used order"""
+        for key, count in counts.items():
+            self._counts.pop(key, None)
+            self._counts[key] = count
+        while len(self._counts) > self.max_keys:
+            self._counts.popitem(last=False)
+
+    def items(self):
+        return self._counts.items()
+
+    def clear(self):
+        self._counts.clear()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._counts
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+
+def estimate_size(obj: Any, _seen: Optional[set] = None) -> int:
+    """Approximate deep size of an object in bytes"""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_size(k, _seen) + estimate_size(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(estimate_size(item, _seen) for item in obj)
+    elif hasattr(obj, '__dict__') and not isinstance(obj, type):
+        size += estimate_size(vars(obj), _seen)
+    return size
+
+
+def memory_report(structures: Dict[str, Any]) -> Dict[str, int]:
+    """Bytes used by each named structure plus a total"""
+    report = {name: estimate_size(value) for name, value in structures.items()}
+    report['total'] = sum(report.values())
+    return report
@@ -5,60 +5,55 @@ Integration script for using the fine-tuned Ollama model with the Streamlit app
 """
 
 import subprocess
+import hashlib
 import json
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Iterator, Tuple
+from collections import deque
+import threading
 import time
+from collections import OrderedDict
 import requests
+from requests.adapters import HTTPAdapter
+
+from lmu_buddy_cache import SemanticCache, normalize_query, shared_completion_cache
+from lmu_buddy_circuit_breaker import CircuitBreaker
+from lmu_buddy_intents import resolve_intent
+from lmu_buddy_knowledge_base import knowledge_base
+from lmu_buddy_prompt_builder import (DEFAULT_TOKEN_BUDGET, FACTS_HEADER, build_grounded_prompt, describe_query,
+                                      estimate_tokens, is_personalized, token_estimator, trim_history)
+from lmu_buddy_router import RULES, ModelRouter
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-class LMUBuddyOllamaClient:
-    def __init__(self, model_name: str = "lmu-buddy", base_url: str = "http://localhost:11434"):
-        self.model_name = model_name
-        self.base_url = base_url
-        self.api_url = f"{base_url}/api"
-        
-    def check_model_availability(self) -> bool:
-        """Check if the fine-tuned model is available"""
-        try:
-            result = subprocess.run(['ollama', 'list'], capture_output=True, text=True)
-            if result.returncode == 0:
-                models = result.stdout
-                return self.model_name in models
-            return False
-        except Exception as e:
-            logger.error(f"Error checking model availability: {e}")
-            return False
-    
-    def get_response_via_cli(self, prompt: str, timeout: int = 30) -> Optional[str]:
-        """Get response using Ollama CLI"""
-        try:
-            result = subprocess.run(
-                ['ollama', 'run', self.model_name, prompt],
-                capture_output=True,
-                text=True,
-                timeout=timeout
-            )
-            if result.returncode == 0:
-                return result.stdout.strip()
-            else:
-                logger.error(f"CLI error: {result.stderr}")
-                return None
-        except subprocess.TimeoutExpired:
-            logger.error(f"Timeout getting response for prompt: {prompt}")
-            return None
-        except Exception as e:
-            logger.error(f"Error getting response via CLI: {e}")
-            return None
-    
-    def get_response_via_api_with_system_prompt(self, prompt: str, timeout: int = 30) -> Optional[str]:
-        """Get response using Ollama API with LMU Buddy system prompt"""
-        try:
-            # LMU Buddy system prompt
-            system_prompt = """You are LMU Buddy, a friendly and helpful AI assistant for Loyola Marymount University students. You have a casual, relatable personality with these characteristics:
+# Connection pool and timeout defaults
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 30
+DEFAULT_TAGS_TTL = 60  # seconds to trust the cached /api/tags model list
+
+# Base model served with the LMU Buddy system prompt
+DEFAULT_BASE_MODEL = "llama2:7b"
+DEFAULT_KEEP_ALIVE = "30m"  # keep the model loaded between chat turns
+# Per-session context arrays returned by /api/generate
+DEFAULT_MAX_CONTEXT_SESSIONS = 256
+DEFAULT_MAX_CONTEXT_TOKENS = 3072  # reset before the conversation outgrows the model's num_ctx
+GENERAL_TOPICS = ('general', 'unknown')  # follow-ups like "what about tomorrow?" keep the thread
+# Prompt section budgets, checked against the request's num_ctx
+DEFAULT_NUM_CTX = 2048  # Ollama's default when a request doesn't set one
+DEFAULT_RESPONSE_RESERVE = 256  # room kept for the answer when num_predict isn't set
+DEFAULT_HISTORY_TOKEN_BUDGET = 1024  # chat messages resent on /api/chat, newest first
+
+DEFAULT_OPTIONS = {
+    "temperature": 0.7,
+    "top_p": 0.9
+}
+
+# Sent as the system message on every chat request; keep it byte-for-byte stable so
+# Ollama can reuse the already-evaluated prefix
+LMU_BUDDY_SYSTEM_PROMPT = """You are LMU Buddy, a friendly and helpful AI assistant for Loyola Marymount University students. You have a casual, relatable personality with these characteristics:
 
 - Use casual, student-friendly language with emojis and slang
 - Be specific about LMU locations, events, and campus life
@@ -84,75 +79,582 @@ Key LMU locations you know:
 - C-store (convenience store)
 
 Always respond in a helpful, engaging way that reflects LMU campus culture and student life."""
+
+def chunk_text(chunk: Dict[str, Any]) -> str:
+    """Text carried by an Ollama /api/chat or /api/generate response chunk"""
+    message = chunk.get("message")
+    if message:
+        return message.get("content", "")
+    return chunk.get("response", "")
+
+def payload_chars(payload: Dict[str, Any]) -> int:
+    """Characters of text a /api/chat or /api/generate payload asks the model to evaluate"""
+    if "messages" in payload:
+        return sum(len(message.get("content", "")) for message in payload["messages"])
+    return len(payload.get("system", "")) + len(payload.get("prompt", ""))
+
+def blocking_latency(result: Dict[str, Any], elapsed: float) -> Tuple[Optional[float], float]:
+    """(time to first token, total) for a non-streamed generation
+    
+    The whole answer arrives at once, so the time to first token is the wall time minus
+    the generation time Ollama reports (None when it reports none).
+    """
+    eval_seconds = result.get("eval_duration", 0) / 1e9
+    ttft = max(elapsed - eval_seconds, 0.0) if eval_seconds else None
+    return ttft, elapsed
+
+class SessionContextStore:
+    """LRU map of session id -> (topic, model, Ollama context array) for multi-turn chats"""
+    
+    def __init__(self, max_sessions: int = DEFAULT_MAX_CONTEXT_SESSIONS,
+                 max_tokens: int = DEFAULT_MAX_CONTEXT_TOKENS):
+        self.max_sessions = max_sessions
+        self.max_tokens = max_tokens
+        self._contexts = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'reused': 0, 'topic_resets': 0, 'model_resets': 0, 'size_resets': 0, 'evicted': 0}
+    
+    def get(self, session_id: str, topic: str, model: Optional[str] = None) -> Optional[List[int]]:
+        """Context to continue from, or None when the session starts over"""
+        with self._lock:
+            entry = self._contexts.get(session_id)
+            if entry is None:
+                return None
+            stored_topic, stored_model, context = entry
+            if topic not in GENERAL_TOPICS and stored_topic not in GENERAL_TOPICS and topic != stored_topic:
+                del self._contexts[session_id]
+                self.stats['topic_resets'] += 1
+                return None
+            if model != stored_model:
+                # Context arrays are token ids of the model that produced them
+                del self._contexts[session_id]
+                self.stats['model_resets'] += 1
+                return None
+            self._contexts.move_to_end(session_id)
+            self.stats['reused'] += 1
+            return context
+    
+    def peek(self, session_id: str, topic: str, model: Optional[str] = None) -> Optional[List[int]]:
+        """Context get() would return, without resetting anything or counting a reuse"""
+        with self._lock:
+            entry = self._contexts.get(session_id)
+        if entry is None:
+            return None
+        stored_topic, stored_model, context = entry
+        if topic not in GENERAL_TOPICS and stored_topic not in GENERAL_TOPICS and topic != stored_topic:
+            return None
+        return context if model == stored_model else None
+    
+    def update(self, session_id: str, topic: str, context: Optional[List[int]], model: Optional[str] = None,
+               max_tokens: Optional[int] = None):
+        """Store the context returned by the latest turn (max_tokens tightens the store's own limit)"""
+        limit = min(self.max_tokens, max_tokens) if max_tokens else self.max_tokens
+        with self._lock:
+            if not context or len(context) > limit:
+                if self._contexts.pop(session_id, None) is not None:
+                    self.stats['size_resets'] += 1
+                return
+            previous = self._contexts.get(session_id)
+            if topic in GENERAL_TOPICS and previous is not None:
+                topic = previous[0]
+            self._contexts[session_id] = (topic, model, context)
+            self._contexts.move_to_end(session_id)
+            while len(self._contexts) > self.max_sessions:
+                self._contexts.popitem(last=False)
+                self.stats['evicted'] += 1
+    
+    def reset(self, session_id: str):
+        with self._lock:
+            self._contexts.pop(session_id, None)
+    
+    def __len__(self) -> int:
+        return len(self._contexts)
+
+def flight_key(endpoint: str, payload: Dict[str, Any]) -> str:
+    """Key under which identical in-flight requests are coalesced (prompt text normalized)"""
+    canonical = dict(payload)
+    if "prompt" in canonical:
+        canonical["prompt"] = normalize_query(canonical["prompt"])
+    if "messages" in canonical:
+        canonical["messages"] = [dict(message, content=normalize_query(message["content"]))
+                                 for message in canonical["messages"]]
+    encoded = json.dumps([endpoint, canonical], sort_keys=True)
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+class SingleFlight:
+    """Coalesces identical blocking requests from concurrent threads into one backend call"""
+    
+    def __init__(self):
+        self._flights: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.stats = {'backend_requests': 0, 'coalesced': 0}
+    
+    def join(self, key: str):
+        """Returns (flight, is_leader); the leader must call finish() with the result"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.stats['coalesced'] += 1
+                return flight, False
+            flight = {'event': threading.Event(), 'result': None}
+            self._flights[key] = flight
+            self.stats['backend_requests'] += 1
+            return flight, True
+    
+    def finish(self, key: str, flight: Dict[str, Any], result: Any):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight['result'] = result
+        flight['event'].set()
+
+def create_pooled_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """Create a keep-alive HTTP session whose pool holds up to pool_size connections per host"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=False)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+class LMUBuddyOllamaClient:
+    def __init__(self, model_name: str = "lmu-buddy", base_url: str = "http://localhost:11434",
+                 pool_size: int = DEFAULT_POOL_SIZE, connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT, session: Optional[requests.Session] = None,
+                 base_model: str = DEFAULT_BASE_MODEL, keep_alive: str = DEFAULT_KEEP_ALIVE,
+                 tags_ttl: float = DEFAULT_TAGS_TTL, allow_cli_fallback: bool = False,
+                 breaker: Optional[CircuitBreaker] = None, completion_cache: Optional[SemanticCache] = None,
+                 router: Optional[ModelRouter] = None):
+        self.model_name = model_name
+        self.base_url = base_url
+        self.api_url = f"{base_url}/api"
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.session = session or create_pooled_session(pool_size)
+        self.base_model = base_model
+        self.keep_alive = keep_alive
+        self.recent_timings = deque(maxlen=200)  # per-turn streaming timings
+        self.recent_usage = deque(maxlen=200)  # per-turn token counts reported by Ollama
+        self.recent_prompt_sizes = deque(maxlen=500)  # estimated tokens per prompt section
+        self.prompt_stats = {'history_trims': 0, 'messages_trimmed': 0, 'context_resets': 0, 'over_budget': 0}
+        self.session_contexts = SessionContextStore()
+        self.tags_ttl = tags_ttl
+        self.allow_cli_fallback = allow_cli_fallback  # last resort: spawns `ollama run` per message
+        self._models_cache = None  # (fetched_at, model names)
+        self._models_lock = threading.Lock()
+        self.breaker = breaker or CircuitBreaker()  # fail fast while the backend is down or slow
+        self.completion_cache = completion_cache if completion_cache is not None else shared_completion_cache
+        self.single_flight = SingleFlight()
+        # Greetings and lookups skip the large model, which is the fine-tuned build when installed
+        self.router = router or ModelRouter(large_model=base_model, is_available=self.check_model_availability,
+                                            tuned_model=self.live_model_name())
+    
+    def _timeout(self, read_timeout: Optional[float] = None):
+        """(connect, read) timeout tuple for requests"""
+        return (self.connect_timeout, read_timeout if read_timeout is not None else self.read_timeout)
+    
+    def connection_stats(self) -> Dict[str, Any]:
+        """Requests sent vs. TCP connections opened across the session's pools"""
+        requests_sent = 0
+        connections_opened = 0
+        for adapter in set(self.session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                requests_sent += pool.num_requests
+                connections_opened += pool.num_connections
+        reused = max(requests_sent - connections_opened, 0)
+        return {
+            'pool_size': self.pool_size,
+            'requests': requests_sent,
+            'connections_opened': connections_opened,
+            'connections_reused': reused,
+            'reuse_rate': reused / requests_sent if requests_sent else 0.0
+        }
+    
+    def close(self):
+        self.session.close()
+        
+    def list_models(self, force_refresh: bool = False) -> List[str]:
+        """Names of the locally available models from /api/tags, cached for tags_ttl seconds"""
+        with self._models_lock:
+            cached = self._models_cache
+            if cached and not force_refresh and time.time() - cached[0] < self.tags_ttl:
+                return cached[1]
             
-            # Combine system prompt with user prompt
-            full_prompt = f"{system_prompt}\n\nUser: {prompt}\nAssistant:"
-            
-            payload = {
-                "model": "llama2:7b",  # Use base model
-                "prompt": full_prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.7,
-                    "top_p": 0.9
-                }
-            }
+            try:
+                response = self.session.get(f"{self.api_url}/tags", timeout=self._timeout(5))
+                if response.status_code == 200:
+                    models = [model.get("name", "") for model in response.json().get("models", [])]
+                    self._models_cache = (time.time(), models)
+                    return models
+                logger.error(f"API error listing models: {response.status_code} - {response.text}")
+            except Exception as e:
+                logger.error(f"Error listing models: {e}")
             
-            response = requests.post(
-                f"{self.api_url}/generate",
-                json=payload,
+            # Keep serving the last known list (or nothing) until the next TTL window
+            models = cached[1] if cached else []
+            self._models_cache = (time.time(), models)
+            return models
+    
+    def live_model_name(self) -> str:
+        """Tag fine_tune_lmu_buddy.py points at the current build (model_name with the implicit :latest)"""
+        return self.model_name if ':' in self.model_name else f"{self.model_name}:latest"
+    
+    def check_model_availability(self, model_name: Optional[str] = None) -> bool:
+        """Check if the fine-tuned model (or the given model) is available"""
+        model_name = model_name or self.model_name
+        for name in self.list_models():
+            if name == model_name or name.split(':')[0] == model_name:
+                return True
+        return False
+    
+    def get_response_via_cli(self, prompt: str, timeout: int = 30) -> Optional[str]:
+        """Get response using Ollama CLI (spawns a process per call; offline tooling only)"""
+        try:
+            result = subprocess.run(
+                ['ollama', 'run', self.model_name, prompt],
+                capture_output=True,
+                text=True,
                 timeout=timeout
             )
+            if result.returncode == 0:
+                return result.stdout.strip()
+            else:
+                logger.error(f"CLI error: {result.stderr}")
+                return None
+        except subprocess.TimeoutExpired:
+            logger.error(f"Timeout getting response for prompt: {prompt}")
+            return None
+        except Exception as e:
+            logger.error(f"Error getting response via CLI: {e}")
+            return None
+    
+    def _build_chat_payload(self, prompt: str, stream: bool = False,
+                            history: Optional[List[Dict[str, str]]] = None,
+                            model: Optional[str] = None, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Build the /api/chat payload
+        
+        The system message is identical on every request so the backend can reuse
+        the evaluated prompt prefix between turns; ``options`` (a generation profile)
+        only bounds the answer.
+        """
+        messages = [{"role": "system", "content": LMU_BUDDY_SYSTEM_PROMPT}]
+        messages.extend(history or [])
+        messages.append({"role": "user", "content": prompt})
+        return {
+            "model": model or self.base_model,
+            "messages": messages,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": dict(DEFAULT_OPTIONS, **(options or {}))
+        }
+    
+    def _build_generate_payload(self, prompt: str, stream: bool = False,
+                                context: Optional[List[int]] = None, model: Optional[str] = None,
+                                options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Build the /api/generate payload continuing from an earlier turn's context array"""
+        payload = {
+            "model": model or self.base_model,
+            "system": LMU_BUDDY_SYSTEM_PROMPT,
+            "prompt": prompt,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": dict(DEFAULT_OPTIONS, **(options or {}))
+        }
+        if context:
+            payload["context"] = context
+        return payload
+    
+    def _prepare_request(self, prompt: str, stream: bool = False, session_id: Optional[str] = None,
+                         topic: Optional[str] = None, model: Optional[str] = None,
+                         options: Optional[Dict[str, Any]] = None,
+                         history: Optional[List[Dict[str, str]]] = None):
+        """Pick the endpoint and payload for a turn
+        
+        Turns that belong to a session go through /api/generate so the returned
+        context array can be passed back on the next turn instead of resending history.
+        History is trimmed oldest-first so system prompt, history, prompt and the
+        answer all fit in the request's num_ctx.
+        """
+        model = model or self.base_model
+        options = options or {}
+        num_ctx = options.get("num_ctx") or DEFAULT_NUM_CTX
+        reserve = options.get("num_predict") or DEFAULT_RESPONSE_RESERVE
+        sizes = {'system': estimate_tokens(LMU_BUDDY_SYSTEM_PROMPT), 'prompt': estimate_tokens(prompt), 'history': 0}
+        room = num_ctx - reserve - sizes['system'] - sizes['prompt']
+        
+        if session_id is None:
+            if history:
+                history, dropped = trim_history(history, max(min(DEFAULT_HISTORY_TOKEN_BUDGET, room), 0))
+                if dropped:
+                    self.prompt_stats['history_trims'] += 1
+                    self.prompt_stats['messages_trimmed'] += dropped
+                sizes['history'] = sum(estimate_tokens(message.get("content", "")) for message in history)
+            endpoint, payload = "chat", self._build_chat_payload(prompt, stream, history, model, options)
+        else:
+            context = self.session_contexts.get(session_id, topic or resolve_intent(prompt), model)
+            if context and len(context) > room:
+                # A context array can't be cut down, so the conversation starts over
+                self.session_contexts.reset(session_id)
+                self.prompt_stats['context_resets'] += 1
+                context = None
+            sizes['history'] = len(context) if context else 0  # exact: these are token ids
+            endpoint, payload = "generate", self._build_generate_payload(prompt, stream, context, model, options)
+        
+        self._record_prompt_size(sizes, num_ctx, reserve)
+        return endpoint, payload
+    
+    def grounding_budget(self, user_input: str, session_id: Optional[str] = None,
+                         route: Optional[Dict[str, Any]] = None) -> int:
+        """Tokens build_grounded_prompt may spend on facts, profile and summary for this turn
+        
+        What num_ctx leaves after the answer reserve, system prompt, question and the
+        session's context array, capped at the prompt builder's own budget. A context array
+        too long to fit next to the bare question is reset anyway, so it is not counted.
+        """
+        route = route or {}
+        options = route.get('options') or {}
+        num_ctx = options.get("num_ctx") or DEFAULT_NUM_CTX
+        reserve = options.get("num_predict") or DEFAULT_RESPONSE_RESERVE
+        room = (num_ctx - reserve - estimate_tokens(LMU_BUDDY_SYSTEM_PROMPT)
+                - estimate_tokens(f"{FACTS_HEADER}\nQuestion: {user_input}"))
+        if session_id is not None:
+            context = self.session_contexts.peek(session_id, route.get('intent') or resolve_intent(user_input),
+                                                 route.get('model') or self.base_model)
+            if context and len(context) <= room:
+                room -= len(context)
+        return max(min(DEFAULT_TOKEN_BUDGET, room), 0)
+    
+    def _record_prompt_size(self, sizes: Dict[str, int], num_ctx: int, reserve: int):
+        sizes['total'] = sizes['system'] + sizes['history'] + sizes['prompt']
+        self.recent_prompt_sizes.append(sizes)
+        if sizes['total'] + reserve > num_ctx:
+            self.prompt_stats['over_budget'] += 1
+            logger.warning(f"Prompt ~{sizes['total']} tokens leaves less than {reserve} of num_ctx {num_ctx} "
+                           f"for the answer (system {sizes['system']}, history {sizes['history']}, "
+                           f"prompt {sizes['prompt']})")
+        else:
+            logger.debug(f"Prompt ~{sizes['total']} tokens (system {sizes['system']}, "
+                         f"history {sizes['history']}, prompt {sizes['prompt']})")
+    
+    def prompt_size_stats(self) -> Dict[str, Any]:
+        """Distribution of estimated prompt sizes plus the estimator's calibration"""
+        sizes = list(self.recent_prompt_sizes)
+        stats = dict(self.prompt_stats, requests=len(sizes), **token_estimator.snapshot())
+        if sizes:
+            totals = sorted(size['total'] for size in sizes)
+            stats.update({
+                'p50_tokens': totals[len(totals) // 2],
+                'p95_tokens': totals[min(int(len(totals) * 0.95), len(totals) - 1)],
+                'max_tokens': totals[-1],
+                'avg_history_tokens': sum(size['history'] for size in sizes) / len(sizes)
+            })
+        return stats
+    
+    def _finish_request(self, chunk: Dict[str, Any], prompt: str, session_id: Optional[str] = None,
+                        topic: Optional[str] = None, timings: Optional[Dict[str, Any]] = None,
+                        record_usage: bool = True, payload: Optional[Dict[str, Any]] = None):
+        """Record usage from the final chunk and keep the session's new context array
+        
+        Subscribers of a coalesced request pass record_usage=False; the shared
+        backend call is only counted once. A context that would leave no room for
+        the next answer inside the request's num_ctx is dropped.
+        """
+        payload = payload or {}
+        model = payload.get("model") or self.base_model
+        options = payload.get("options") or {}
+        if record_usage:
+            self._record_usage(chunk, timings, payload)
+        if session_id is not None:
+            max_tokens = None
+            if options.get("num_ctx"):
+                max_tokens = options["num_ctx"] - options.get("num_predict", 0)
+            self.session_contexts.update(session_id, topic or resolve_intent(prompt), chunk.get("context"),
+                                         model, max_tokens)
+    
+    def _report_stream_outcome(self, timings: Dict[str, Any]):
+        """Feed a finished stream into the circuit breaker (SLO is judged on time to first token)"""
+        if timings.get('completed'):
+            self.breaker.record_success(timings['ttft'], timings['total'])
+        elif timings.get('error'):
+            self.breaker.record_failure(timings['error'])
+        else:
+            # Abandoned by the consumer; says nothing about backend health
+            self.breaker.release()
+    
+    def _record_usage(self, chunk: Dict[str, Any], timings: Optional[Dict[str, Any]] = None,
+                      payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Keep the token counts Ollama reports on the final chunk of a response
+        
+        Requests without a context array had their whole text evaluated, so their
+        prompt_eval_count also calibrates the token estimator.
+        """
+        payload = payload or {}
+        usage = {
+            'prompt_eval_count': chunk.get('prompt_eval_count', 0),
+            'eval_count': chunk.get('eval_count', 0),
+            'prompt_eval_ms': chunk.get('prompt_eval_duration', 0) / 1e6,
+            'load_ms': chunk.get('load_duration', 0) / 1e6
+        }
+        self.recent_usage.append(usage)
+        self.router.record_tokens(payload.get("model") or self.base_model, usage['prompt_eval_count'],
+                                  usage['eval_count'])
+        if payload and not payload.get("context"):
+            token_estimator.observe(payload_chars(payload), usage['prompt_eval_count'])
+        if timings is not None:
+            timings.update(usage)
+        logger.info(f"Prompt tokens evaluated: {usage['prompt_eval_count']}, generated: {usage['eval_count']}")
+        return usage
+    
+    def usage_stats(self) -> Dict[str, Any]:
+        """Average prompt-eval work per turn; falls once the system prompt prefix is cached"""
+        turns = list(self.recent_usage)
+        if not turns:
+            return {'turns': 0}
+        return {
+            'turns': len(turns),
+            'first_prompt_eval_count': turns[0]['prompt_eval_count'],
+            'avg_prompt_eval_count': sum(t['prompt_eval_count'] for t in turns) / len(turns),
+            'avg_prompt_eval_ms': sum(t['prompt_eval_ms'] for t in turns) / len(turns),
+            'avg_eval_count': sum(t['eval_count'] for t in turns) / len(turns)
+        }
+    
+    def get_response_via_api_with_system_prompt(self, prompt: str, timeout: Optional[float] = None,
+                                                session_id: Optional[str] = None, topic: Optional[str] = None,
+                                                model: Optional[str] = None,
+                                                options: Optional[Dict[str, Any]] = None,
+                                                history: Optional[List[Dict[str, str]]] = None) -> Optional[str]:
+        """Get response using Ollama API with LMU Buddy system prompt
+        
+        Concurrent callers sending the same normalized request share one backend call.
+        """
+        endpoint, payload = self._prepare_request(prompt, session_id=session_id, topic=topic, model=model,
+                                                  options=options, history=history)
+        key = flight_key(endpoint, payload)
+        flight, is_leader = self.single_flight.join(key)
+        
+        if is_leader:
+            result = None
+            try:
+                result = self._post_generation(endpoint, payload, prompt, timeout)
+            finally:
+                self.single_flight.finish(key, flight, result)
+        else:
+            read_timeout = timeout if timeout is not None else self.read_timeout
+            flight['event'].wait(self.connect_timeout + read_timeout)
+            result = flight['result']
+        
+        if result is None:
+            return None
+        self._finish_request(result, prompt, session_id, topic, record_usage=is_leader, payload=payload)
+        return chunk_text(result).strip()
+    
+    def _post_generation(self, endpoint: str, payload: Dict[str, Any], prompt: str,
+                         timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Send one blocking generation request; returns Ollama's JSON result"""
+        if not self.breaker.allow_request():
+            return None
+        
+        started = time.perf_counter()
+        try:
+            response = self.session.post(
+                f"{self.api_url}/{endpoint}",
+                json=payload,
+                timeout=self._timeout(timeout)
+            )
             
             if response.status_code == 200:
-                return response.json().get("response", "").strip()
+                result = response.json()
+                self.breaker.record_success(*blocking_latency(result, time.perf_counter() - started))
+                return result
             else:
                 logger.error(f"API error: {response.status_code} - {response.text}")
+                self.breaker.record_failure(f"HTTP {response.status_code}")
                 return None
                 
         except requests.exceptions.Timeout:
             logger.error(f"API timeout for prompt: {prompt}")
+            self.breaker.record_failure("timeout")
             return None
         except Exception as e:
             logger.error(f"Error getting response via API: {e}")
+            self.breaker.record_failure(str(e))
             return None
 
-    def get_response_via_cli_with_system_prompt(self, prompt: str, timeout: int = 30) -> Optional[str]:
-        """Get response using Ollama CLI with LMU Buddy system prompt"""
+    def stream_response(self, prompt: str, timeout: Optional[float] = None,
+                        timings: Optional[Dict[str, Any]] = None, session_id: Optional[str] = None,
+                        topic: Optional[str] = None, model: Optional[str] = None,
+                        options: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """Stream response tokens from the Ollama API as they are generated
+        
+        Parses Ollama's NDJSON chunks; time-to-first-token and total time are written
+        into ``timings`` (if given) and kept in ``recent_timings``.
+        """
+        timings = timings if timings is not None else {}
+        started = time.perf_counter()
+        timings.update({'ttft': None, 'total': None, 'tokens': 0, 'completed': False, 'error': None})
+        if not self.breaker.allow_request():
+            timings['error'] = 'circuit open'
+            return
+        endpoint, payload = self._prepare_request(prompt, True, session_id, topic, model, options)
+        
         try:
-            # LMU Buddy system prompt
-            system_prompt = """You are LMU Buddy, a friendly and helpful AI assistant for Loyola Marymount University students. You have a casual, relatable personality with these characteristics:
-
-- Use casual, student-friendly language with emojis and slang
-- Be specific about LMU locations, events, and campus life
-- Provide personalized, contextual responses
-- Show personality and humor while being helpful
-- Use LMU-specific references and insider knowledge
-- Be interactive and engaging
-- Collect feedback and ratings
-- Suggest relevant campus resources and events
-
-Key LMU locations you know:
-- The Bluff (scenic dining with sunset views)
-- The Lair (quick dining option)
-- Lion's Den (coffee spot)
-- University Hall (UHall)
-- Doolan Hall
-- Hilton Center
-- Howard B. Fitzpatrick Pavilion
-- Alumni Mall
-- Lawton Plaza
-- Career Center
-- Library (3rd floor study spots)
-- C-store (convenience store)
-
-Always respond in a helpful, engaging way that reflects LMU campus culture and student life."""
-            
-            # Combine system prompt with user prompt
-            full_prompt = f"{system_prompt}\n\nUser: {prompt}\nAssistant:"
+            with self.session.post(
+                f"{self.api_url}/{endpoint}",
+                json=payload,
+                stream=True,
+                timeout=self._timeout(timeout)
+            ) as response:
+                if response.status_code != 200:
+                    logger.error(f"API error: {response.status_code} - {response.text}")
+                    timings['error'] = f"HTTP {response.status_code}"
+                    return
+                
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        logger.error(f"API stream error: {chunk['error']}")
+                        timings['error'] = chunk['error']
+                        return
+                    
+                    token = chunk_text(chunk)
+                    if token:
+                        if timings['ttft'] is None:
+                            timings['ttft'] = time.perf_counter() - started
+                        timings['tokens'] += 1
+                        yield token
+                    
+                    if chunk.get("done"):
+                        timings['completed'] = True
+                        self._finish_request(chunk, prompt, session_id, topic, timings, payload=payload)
+                        return
+                timings['error'] = "stream ended before done"
+        except requests.exceptions.Timeout:
+            logger.error(f"API stream timeout for prompt: {prompt}")
+            timings['error'] = 'timeout'
+        except Exception as e:
+            logger.error(f"Error streaming response via API: {e}")
+            timings['error'] = str(e)
+        finally:
+            timings['total'] = time.perf_counter() - started
+            self.recent_timings.append(dict(timings))
+            self._report_stream_outcome(timings)
+            logger.info(f"Stream finished: ttft={timings['ttft']}, total={timings['total']:.2f}s, chunks={timings['tokens']}")
+    
+    def get_response_via_cli_with_system_prompt(self, prompt: str, timeout: int = 30,
+                                                model: Optional[str] = None) -> Optional[str]:
+        """Get response using Ollama CLI with LMU Buddy system prompt (last-resort mode)"""
+        try:
+            # The CLI has no system role, so the prompt is prepended
+            full_prompt = f"{LMU_BUDDY_SYSTEM_PROMPT}\n\nUser: {prompt}\nAssistant:"
             
             result = subprocess.run(
-                ['ollama', 'run', 'llama2:7b', full_prompt],
+                ['ollama', 'run', model or self.base_model, full_prompt],
                 capture_output=True,
                 text=True,
                 timeout=timeout
@@ -169,27 +671,107 @@ Always respond in a helpful, engaging way that reflects LMU campus culture and s
             logger.error(f"Error getting response via CLI: {e}")
             return None
     
-    def get_response(self, prompt: str, use_api: bool = True, timeout: int = 30) -> Optional[str]:
-        """Get response from the base model with LMU Buddy system prompt"""
+    def get_response(self, prompt: str, use_api: bool = True, timeout: Optional[float] = None,
+                     session_id: Optional[str] = None, topic: Optional[str] = None,
+                     model: Optional[str] = None, options: Optional[Dict[str, Any]] = None,
+                     history: Optional[List[Dict[str, str]]] = None) -> Optional[str]:
+        """Get response from the base model (or the routed model) with LMU Buddy system prompt
+        
+        ``history`` (earlier chat messages) is only sent for turns without a session id.
+        """
         # Use the base model with system prompt instead of custom model
         if use_api:
-            return self.get_response_via_api_with_system_prompt(prompt, timeout)
-        else:
-            return self.get_response_via_cli_with_system_prompt(prompt, timeout)
+            response = self.get_response_via_api_with_system_prompt(prompt, timeout, session_id, topic, model,
+                                                                    options, history)
+            if response or not self.allow_cli_fallback:
+                return response
+            logger.warning("API unavailable, falling back to the Ollama CLI")
+        return self.get_response_via_cli_with_system_prompt(prompt, timeout or self.read_timeout, model)
+    
+    def cached_completion(self, user_input: str, buddy: Any = None, route: Optional[Dict[str, Any]] = None,
+                          user_context: Optional[Dict[str, Any]] = None, summary: Optional[str] = None,
+                          session_id: Optional[str] = None, history: Optional[List[Dict[str, str]]] = None):
+        """Earlier LLM answer to a near-identical question, plus the query key to store a new one under
+        
+        Follow-ups without a specific intent depend on the conversation, so they are never cached.
+        Neither are answers to prompts carrying the student's profile, an earlier-chat summary,
+        resent history or a session context array: they would leak to other students.
+        ``route`` is the router's decision for the question, whose embedding and tone are reused.
+        """
+        route = route or {}
+        if history or is_personalized(buddy, user_context, summary):
+            return None, None
+        if session_id is not None and self.session_contexts.peek(
+                session_id, route.get('intent') or resolve_intent(user_input), route.get('model') or self.base_model):
+            return None, None
+        query = describe_query(buddy, user_input, route.get('embedding'), route.get('tone'))
+        if query is None or query[1] in GENERAL_TOPICS:
+            return None, None
+        embedding, intent, tone = query
+        return self.completion_cache.get(embedding, intent, tone, knowledge_base.current()), query
+    
+    def store_completion(self, query, completion: Optional[str]):
+        """Remember an LLM answer under the key returned by cached_completion"""
+        if query is None or not completion:
+            return
+        embedding, intent, tone = query
+        self.completion_cache.put(embedding, intent, tone, completion, knowledge_base.current())
     
     def get_enhanced_response(self, user_input: str, context: Dict[str, Any] = None) -> str:
-        """Get enhanced response with context and fallback logic"""
+        """Get enhanced response with context and fallback logic
         
-        # Try to get response from fine-tuned model
-        response = self.get_response(user_input)
+        ``context`` may carry ``buddy`` (an LMU Buddy whose semantic_search grounds the
+        prompt), ``user_context``, ``session_id`` and ``history`` (chat messages resent
+        when there is no session id).
+        """
+        context = context or {}
+        buddy = context.get('buddy')
+        started = time.perf_counter()
+        route = self.router.route(user_input, buddy)
+        if route['route'] == RULES:
+            response = self.get_rule_based_response(user_input, buddy)
+            self.router.record(RULES, time.perf_counter() - started)
+            return response
+        
+        cached, query = self.cached_completion(user_input, buddy, route, context.get('user_context'),
+                                               session_id=context.get('session_id'), history=context.get('history'))
+        if cached:
+            return cached
+        
+        budget = self.grounding_budget(user_input, context.get('session_id'), route)
+        prompt = build_grounded_prompt(user_input, buddy, context.get('user_context'), token_budget=budget,
+                                       query_embedding=route['embedding'])
+        
+        # Try to get response from the routed model, continuing the session's conversation if known
+        response = self.get_response(prompt, session_id=context.get('session_id'),
+                                     topic=route['intent'], model=route['model'], options=route['options'],
+                                     history=context.get('history'))
         
         if response:
+            self.router.record(route['route'], time.perf_counter() - started)
+            self.store_completion(query, response)
             return response
         
+        # Model down or circuit open: answer from the rule-based buddy straight away
+        return self.get_rule_based_response(user_input, buddy)
+    
+    def get_rule_based_response(self, user_input: str, buddy: Any = None) -> str:
+        """Answer without a model: the rule-based buddy if loaded, else the keyword table"""
+        if buddy is not None:
+            try:
+                return buddy.generate_response(user_input)
+            except Exception as e:
+                logger.error(f"Error getting fallback response from buddy: {e}")
+        
+        return self.get_fallback_response(user_input)
+    
+    def get_fallback_response(self, user_input: str) -> str:
+        """Keyword-matched answer used when the model is not available"""
         # Fallback to basic responses if model is not available
         fallback_responses = {
             "hi": "Hey! Welcome to LMU Buddy! 🦁 How can I help you today?",
             "hello": "What's up! Ready to explore LMU?",
+            "thank": "Anytime! 🦁 Hit me up whenever you need more campus intel.",
             "help": "I can help you with campus info, food spots, study locations, and more! Just ask away!",
             "food": "The Bluff has amazing sunset views, The Lair is great for quick meals, and Lion's Den has the best coffee!",
             "study": "Library 3rd floor is quiet, UHall balcony has fresh air, or try the Lion's Den for a caffeine boost!",
@@ -207,6 +789,17 @@ Always respond in a helpful, engaging way that reflects LMU campus culture and s
         
         return "I'm still learning about that! But I can help with campus food, study spots, events, and more. What would you like to know?"
 
+_shared_client: Optional[LMUBuddyOllamaClient] = None
+_shared_client_lock = threading.Lock()
+
+def get_shared_client(**kwargs) -> LMUBuddyOllamaClient:
+    """Process-wide client so every session shares one keep-alive connection pool"""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = LMUBuddyOllamaClient(**kwargs)
+        return _shared_client
+
 def integrate_with_streamlit():
     """Integration function for Streamlit app"""
     
@@ -238,7 +831,7 @@ def get_lmu_buddy_response_for_streamlit(user_input: str, user_context: Dict[str
     Function to be used in your Streamlit app
     Replace the existing get_lmu_buddy_response function with this
     """
-    client = LMUBuddyOllamaClient()
+    client = get_shared_client()
     return client.get_enhanced_response(user_input, user_context)
 
 if __name__ == "__main__":
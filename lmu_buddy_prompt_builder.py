@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+LMU Buddy Prompt Builder
+Grounds LLM prompts in retrieved campus facts while keeping them inside a fixed token budget
+"""
+
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from lmu_buddy_intents import resolve_intent
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOKEN_BUDGET = 400  # tokens for retrieved facts, user context and the earlier-chat summary
+DEFAULT_TOP_K = 6
+CHARS_PER_TOKEN = 4  # rough average for English text, used until calibrated
+MAX_RECORD_CHARS = 240
+MESSAGE_OVERHEAD_TOKENS = 4  # role markers the chat template adds per message
+CALIBRATION_SAMPLES = 200
+# A chars/token ratio outside this band means part of the prompt came from Ollama's
+# prefix cache (or the sample is otherwise unusable), so it is not used for calibration
+CALIBRATION_BAND = (2.0, 8.0)
+FACTS_HEADER = "Campus facts (use these, don't invent others):"
+# Profile fields that make an answer specific to one student; interests such as
+# favorite_topics only echo what the question is about
+IDENTIFYING_FIELDS = ('name', 'year', 'major', 'dorm', 'clubs')
+
+
+class TokenEstimator:
+    """Chars-per-token estimate calibrated against the prompt_eval_count Ollama reports"""
+
+    def __init__(self, chars_per_token: float = CHARS_PER_TOKEN, samples: int = CALIBRATION_SAMPLES):
+        self.default_chars_per_token = chars_per_token
+        self.chars_per_token = chars_per_token
+        self._ratios = deque(maxlen=samples)
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def estimate(self, text: str) -> int:
+        return max(1, int(len(text) / self.chars_per_token + 0.999))
+
+    def observe(self, chars: int, reported_tokens: int) -> bool:
+        """Learn from a request whose whole prompt was evaluated; returns whether the sample was used"""
+        if chars <= 0 or reported_tokens <= 0:
+            return False
+        ratio = chars / reported_tokens
+        with self._lock:
+            if not CALIBRATION_BAND[0] <= ratio <= CALIBRATION_BAND[1]:
+                self.rejected += 1
+                return False
+            self._ratios.append(ratio)
+            ordered = sorted(self._ratios)
+            self.chars_per_token = ordered[len(ordered) // 2]
+        return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {'chars_per_token': self.chars_per_token, 'samples': len(self._ratios), 'rejected': self.rejected}
+
+
+# Shared so every client calibrates the same estimate the prompt builder budgets with
+token_estimator = TokenEstimator()
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count for budget checks"""
+    return token_estimator.estimate(text)
+
+
+def trim_history(history: List[Dict[str, str]], budget: int) -> Tuple[List[Dict[str, str]], int]:
+    """Newest chat messages that fit in budget tokens, plus how many older ones were dropped"""
+    kept: List[Dict[str, str]] = []
+    used = 0
+    for message in reversed(history):
+        cost = estimate_tokens(message.get('content', '')) + MESSAGE_OVERHEAD_TOKENS
+        if used + cost > budget:
+            break
+        kept.append(message)
+        used += cost
+    kept.reverse()
+    return kept, len(history) - len(kept)
+
+
+def _join(values: Any, limit: int = 3) -> str:
+    """First few list values, course names shortened to their codes"""
+    if not isinstance(values, list):
+        return str(values) if values else ""
+    return ", ".join(str(value).split(" - ")[0] for value in values[:limit])
+
+
+def _professor(record: Dict) -> str:
+    text = f"Professor {record.get('name', '?')} ({record.get('department', 'unknown dept')})"
+    if record.get('rating') is not None:
+        text += f", rating {record['rating']}/5"
+    if record.get('difficulty') is not None:
+        text += f", difficulty {record['difficulty']}/5"
+    if record.get('courses'):
+        text += f"; teaches {_join(record['courses'])}"
+    return text
+
+
+def _course(record: Dict) -> str:
+    text = f"Course {record.get('code', '')} {record.get('name', '')} ({record.get('department', '')}, {record.get('credits', '?')} cr)"
+    if record.get('professors'):
+        text += f"; taught by {_join(record['professors'], 2)}"
+    if record.get('prerequisites'):
+        text += f"; prereqs: {record['prerequisites']}"
+    return text
+
+
+def _dining(record: Dict) -> str:
+    text = f"Dining: {record.get('name', '?')} - {record.get('type', '')}, {record.get('location', '')}"
+    if record.get('hours'):
+        text += f"; hours {record['hours']}"
+    return text
+
+
+def _housing(record: Dict) -> str:
+    text = f"Housing: {record.get('name', '?')} - {record.get('type', '')}, {record.get('location', '')}"
+    if record.get('pros'):
+        text += f"; pros: {_join(record['pros'])}"
+    return text
+
+
+def _event(record: Dict) -> str:
+    text = f"Event: {record.get('name', '?')} on {record.get('date', 'TBA')} {record.get('time', '')} at {record.get('location', 'TBA')}"
+    if record.get('cost'):
+        text += f"; {record['cost']}"
+    return text
+
+
+def _organization(record: Dict) -> str:
+    return f"Org: {record.get('name', '?')} - {record.get('type', '')}; {record.get('description', '')}"
+
+
+def _facility(record: Dict) -> str:
+    text = f"Facility: {record.get('name', '?')} - {record.get('location', '')}"
+    if record.get('hours'):
+        text += f"; hours {record['hours']}"
+    return text
+
+
+def _news(record: Dict) -> str:
+    return f"News ({record.get('date', '')}): {record.get('title', '')}"
+
+
+def _reddit_tea(record: Dict) -> str:
+    return f"Student tea: {record.get('content', '')}"
+
+
+def _rmp_tea(record: Dict) -> str:
+    return f"Professor tea: {record.get('professor', '')}: {record.get('tea_content', '')}"
+
+
+def _generic(record: Any) -> str:
+    if isinstance(record, dict):
+        return "; ".join(f"{key}: {value}" for key, value in record.items()
+                         if isinstance(value, (str, int, float)) and value != "")
+    return str(record)
+
+
+# V1 uses singular categories, V2 uses the data file's plural keys
+RECORD_SERIALIZERS: Dict[str, Callable[[Dict], str]] = {
+    'professor': _professor,
+    'professors': _professor,
+    'course': _course,
+    'courses': _course,
+    'dining': _dining,
+    'housing': _housing,
+    'event': _event,
+    'events': _event,
+    'organization': _organization,
+    'organizations': _organization,
+    'facility': _facility,
+    'facilities': _facility,
+    'news': _news,
+    'reddit_tea': _reddit_tea,
+    'rmp_tea': _rmp_tea
+}
+
+
+def serialize_record(category: str, record: Any) -> str:
+    """One compact line for a retrieved record"""
+    serializer = RECORD_SERIALIZERS.get(category, _generic)
+    try:
+        text = serializer(record) if isinstance(record, dict) else _generic(record)
+    except Exception as e:
+        logger.error(f"Error serializing {category} record: {e}")
+        text = _generic(record)
+    text = " ".join(text.split())
+    if len(text) > MAX_RECORD_CHARS:
+        text = text[:MAX_RECORD_CHARS - 3].rstrip() + "..."
+    return text
+
+
+def serialize_user_context(user_context: Optional[Dict[str, Any]]) -> str:
+    """Compact description of what we know about the student"""
+    if not user_context:
+        return ""
+    parts = []
+    if user_context.get('name'):
+        parts.append(f"name {user_context['name']}")
+    if user_context.get('year'):
+        parts.append(str(user_context['year']))
+    if user_context.get('major'):
+        parts.append(f"{user_context['major']} major")
+    if user_context.get('dorm'):
+        parts.append(f"lives in {user_context['dorm']}")
+    if user_context.get('clubs'):
+        parts.append(f"clubs: {_join(user_context['clubs'])}")
+    if user_context.get('favorite_topics'):
+        parts.append(f"likes {_join(user_context['favorite_topics'])}")
+    return f"Student: {', '.join(parts)}" if parts else ""
+
+
+def history_summary(buddy: Any = None) -> str:
+    """Topic summary of the turns that fell out of the buddy's bounded conversation history"""
+    history = getattr(buddy, 'conversation_history', None)
+    return history.summary() if hasattr(history, 'summary') else ""
+
+
+def is_personalized(buddy: Any = None, user_context: Optional[Dict[str, Any]] = None,
+                    summary: Optional[str] = None) -> bool:
+    """Whether build_grounded_prompt would add anything identifying this student or chat"""
+    user_context = user_context if user_context is not None else getattr(buddy, 'user_context', None)
+    if user_context and any(user_context.get(field) for field in IDENTIFYING_FIELDS):
+        return True
+    return bool(summary if summary is not None else history_summary(buddy))
+
+
+def build_grounded_prompt(user_input: str, buddy: Any = None, user_context: Optional[Dict[str, Any]] = None,
+                          token_budget: int = DEFAULT_TOKEN_BUDGET, top_k: int = DEFAULT_TOP_K,
+                          stats: Optional[Dict[str, Any]] = None, summary: Optional[str] = None,
+                          query_embedding: Any = None) -> str:
+    """Prompt with the user's question plus as many retrieved facts as fit in token_budget
+
+    Facts are added in similarity order; records that would overflow the budget are skipped.
+    ``summary`` describes chat turns no longer kept in history (defaults to the buddy's own).
+    ``query_embedding`` is the question's embedding if the caller already computed it.
+    """
+    stats = stats if stats is not None else {}
+    stats.update({'retrieved': 0, 'packed': 0, 'context_tokens': 0})
+
+    context_line = serialize_user_context(user_context if user_context is not None
+                                          else getattr(buddy, 'user_context', None))
+    summary_line = summary if summary is not None else history_summary(buddy)
+    remaining = token_budget
+    if context_line:
+        remaining -= estimate_tokens(context_line)
+    if summary_line and estimate_tokens(summary_line) <= remaining:
+        remaining -= estimate_tokens(summary_line)
+    else:
+        summary_line = ""
+
+    facts: List[str] = []
+    if buddy is not None and remaining > 0:
+        try:
+            results = buddy.semantic_search(user_input, top_k=top_k, query_embedding=query_embedding)
+        except Exception as e:
+            logger.error(f"Error retrieving facts for prompt: {e}")
+            results = []
+        stats['retrieved'] = len(results)
+
+        for result in results:
+            record = result.get('data', result.get('item'))
+            line = f"- {serialize_record(result.get('category', ''), record)}"
+            cost = estimate_tokens(line)
+            if line in facts or cost > remaining:
+                continue
+            facts.append(line)
+            remaining -= cost
+        stats['packed'] = len(facts)
+
+    stats['context_tokens'] = token_budget - remaining
+    if not facts and not context_line and not summary_line:
+        return user_input
+
+    sections = []
+    if facts:
+        sections.append(FACTS_HEADER + "\n" + "\n".join(facts))
+    if context_line:
+        sections.append(context_line)
+    if summary_line:
+        sections.append(summary_line)
+    sections.append(f"Question: {user_input}")
+    return "\n\n".join(sections)
+
+
+def embed_query(buddy: Any, user_input: str) -> Any:
+    """Embedding of a question with the buddy's own model (None without a buddy or on error)"""
+    if buddy is None:
+        return None
+    try:
+        if hasattr(buddy, 'encode_query'):
+            return buddy.encode_query(user_input)
+        return buddy.model.encode([user_input])
+    except Exception as e:
+        logger.error(f"Error embedding query: {e}")
+        return None
+
+
+def describe_query(buddy: Any, user_input: str, embedding: Any = None,
+                   tone: Optional[str] = None) -> Optional[Tuple[Any, str, str]]:
+    """(embedding, intent, tone) for a question; pass embedding and tone if already known"""
+    if buddy is None:
+        return None
+    if embedding is None:
+        embedding = embed_query(buddy, user_input)
+        if embedding is None:
+            return None
+    return embedding, resolve_intent(user_input), tone or resolve_tone(buddy, user_input)
+
+
+def resolve_tone(buddy: Any, user_input: str) -> str:
+    """Dominant tone of a message as a string for both buddy versions ('neutral' without a buddy)"""
+    if buddy is None:
+        return 'neutral'
+    try:
+        tone = buddy.analyze_user_tone(user_input)
+        if isinstance(tone, dict):
+            tone = buddy.get_dominant_tone(tone)
+    except Exception as e:
+        logger.error(f"Error analyzing tone: {e}")
+        return 'neutral'
+    return tone
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+LMU Buddy Model Router
+Sends each question to the cheapest backend that can answer it: the rule-based engine,
+a small fast model, or the large model
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from lmu_buddy_intents import QUICK_ACCESS_PROMPTS, resolve_intent
+from lmu_buddy_prompt_builder import embed_query, resolve_tone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SMALL_MODEL = "llama3.2:1b"
+DEFAULT_LARGE_MODEL = "llama2:7b"
+DEFAULT_RETRIEVAL_THRESHOLD = 0.75  # top similarity at which the retrieved record is the answer
+
+RULES = 'rules'
+SMALL = 'small'
+LARGE = 'large'
+ROUTES = (RULES, SMALL, LARGE)
+
+# Relative cost of one token on each route (roughly billions of parameters)
+ROUTE_COST_WEIGHTS = {RULES: 0.0, SMALL: 1.0, LARGE: 7.0}
+
+# Generation budgets. num_ctx is fixed per route because a different value makes Ollama
+# reload the model; answer length and stop sequences vary per intent and tone.
+ROUTE_NUM_CTX = {SMALL: 2048, LARGE: 4096}
+DEFAULT_NUM_PREDICT = 256
+INTENT_NUM_PREDICT = {
+    'dining': 120,
+    'facility': 120,
+    'transportation': 120,
+    'campus_life': 120,
+    'event': 160,
+    'news': 160,
+    'organization': 160,
+    'housing': 200,
+    'professor': 200,
+    'course': 200,
+    'unknown': 256,
+    'general': 320
+}
+TONE_LENGTH_FACTORS = {'casual': 0.75, 'social': 0.75, 'academic': 1.25}
+DEFAULT_STOP = ["\nUser:", "\nStudent:", "\nQuestion:"]
+
+GREETING_WORDS = {'hi', 'hey', 'hello', 'yo', 'sup', 'hiya', 'howdy', 'thanks', 'thank', 'thx', 'ty',
+                  'bye', 'goodbye', 'morning', 'evening', 'ok', 'okay', 'cool', 'nice', 'lol'}
+FILLER_WORDS = {'there', 'buddy', 'you', 'u', 'so', 'much', 'good', 'whats', "what's", 'up'}
+# Lookups the grounded prompt answers well; everything else is open-ended
+SMALL_MODEL_INTENTS = ('professor', 'course', 'dining', 'housing', 'event', 'organization',
+                       'facility', 'news', 'transportation', 'campus_life')
+
+
+def is_small_talk(user_input: str) -> bool:
+    """Greetings, thanks and other messages with nothing to look up"""
+    words = [word.strip("!?.,:;'\"") for word in user_input.lower().split()]
+    words = [word for word in words if word]
+    return (0 < len(words) <= 4 and any(word in GREETING_WORDS for word in words)
+            and all(word in GREETING_WORDS or word in FILLER_WORDS for word in words))
+
+
+def generation_profile(route: str, intent: str, tone: str = 'neutral') -> Dict[str, Any]:
+    """Ollama options bounding the answer for a routed question"""
+    num_predict = INTENT_NUM_PREDICT.get(intent, DEFAULT_NUM_PREDICT)
+    num_predict = int(num_predict * TONE_LENGTH_FACTORS.get(tone, 1.0))
+    return {
+        'num_predict': num_predict,
+        'num_ctx': ROUTE_NUM_CTX.get(route, ROUTE_NUM_CTX[LARGE]),
+        'stop': list(DEFAULT_STOP)
+    }
+
+
+class ModelRouter:
+    """Chooses a route per question and keeps per-route latency and token cost counters"""
+
+    def __init__(self, small_model: str = DEFAULT_SMALL_MODEL, large_model: str = DEFAULT_LARGE_MODEL,
+                 retrieval_threshold: float = DEFAULT_RETRIEVAL_THRESHOLD,
+                 is_available: Optional[Callable[[str], bool]] = None, tuned_model: Optional[str] = None):
+        self.small_model = small_model
+        self.large_model = large_model
+        self.tuned_model = tuned_model  # fine-tuned build served on the large route once installed
+        self.retrieval_threshold = retrieval_threshold
+        self.is_available = is_available  # e.g. LMUBuddyOllamaClient.check_model_availability
+        self._lock = threading.Lock()
+        self.stats = {route: {'requests': 0, 'seconds': 0.0, 'prompt_tokens': 0, 'generated_tokens': 0}
+                      for route in ROUTES}
+
+    def route(self, user_input: str, buddy: Any = None) -> Dict[str, Any]:
+        """{'route', 'model', 'intent', 'tone', 'options', 'reason', 'embedding'} for a question
+
+        model and options are None on the rules route. embedding is the question's embedding
+        when the retrieval check computed one, so later steps of the turn can reuse it.
+        """
+        intent = resolve_intent(user_input)
+        if is_small_talk(user_input):
+            return self._decision(RULES, intent, 'small talk')
+        if buddy is not None and user_input in QUICK_ACCESS_PROMPTS:
+            return self._decision(RULES, intent, 'quick-access prompt')
+
+        embedding = None
+        if buddy is not None and intent not in ('general', 'unknown'):
+            embedding = embed_query(buddy, user_input)
+            similarity = self._top_similarity(buddy, user_input, embedding)
+            if similarity >= self.retrieval_threshold:
+                return self._decision(RULES, intent, f'retrieval match {similarity:.2f}', embedding=embedding)
+
+        tone = resolve_tone(buddy, user_input)
+        if intent in SMALL_MODEL_INTENTS:
+            if self.is_available is None or self.is_available(self.small_model):
+                return self._decision(SMALL, intent, 'factual lookup', tone, embedding)
+            return self._decision(LARGE, intent, f'{self.small_model} not installed', tone, embedding)
+        return self._decision(LARGE, intent, 'open-ended', tone, embedding)
+
+    def serving_large_model(self) -> str:
+        """The fine-tuned build when it is installed, else the base large model"""
+        if self.tuned_model and self.is_available is not None and self.is_available(self.tuned_model):
+            return self.tuned_model
+        return self.large_model
+
+    def _decision(self, route: str, intent: str, reason: str, tone: str = 'neutral',
+                  embedding: Any = None) -> Dict[str, Any]:
+        model = {SMALL: self.small_model, LARGE: self.serving_large_model()}.get(route)
+        options = generation_profile(route, intent, tone) if model else None
+        return {'route': route, 'model': model, 'intent': intent, 'tone': tone, 'options': options,
+                'reason': reason, 'embedding': embedding}
+
+    def _top_similarity(self, buddy: Any, user_input: str, embedding: Any = None) -> float:
+        try:
+            results = buddy.semantic_search(user_input, top_k=1, query_embedding=embedding)
+        except Exception as e:
+            logger.error(f"Error checking retrieval for routing: {e}")
+            return 0.0
+        return float(results[0].get('similarity', 0.0)) if results else 0.0
+
+    def route_for_model(self, model: Optional[str]) -> str:
+        if model == self.small_model:
+            return SMALL
+        return LARGE if model else RULES
+
+    def record(self, route: str, seconds: float):
+        """Count one answered question and its end-to-end latency"""
+        with self._lock:
+            self.stats[route]['requests'] += 1
+            self.stats[route]['seconds'] += seconds
+
+    def record_tokens(self, model: Optional[str], prompt_tokens: int, generated_tokens: int):
+        """Token counts Ollama reported for a request to one of the routed models"""
+        with self._lock:
+            counters = self.stats[self.route_for_model(model)]
+            counters['prompt_tokens'] += prompt_tokens
+            counters['generated_tokens'] += generated_tokens
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per-route requests, average latency and relative token cost"""
+        with self._lock:
+            summary = {}
+            for route, counters in self.stats.items():
+                tokens = counters['prompt_tokens'] + counters['generated_tokens']
+                summary[route] = dict(
+                    counters,
+                    avg_seconds=counters['seconds'] / counters['requests'] if counters['requests'] else 0.0,
+                    cost=tokens * ROUTE_COST_WEIGHTS[route]
+                )
+            return summary
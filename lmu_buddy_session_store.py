@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+LMU Buddy Session Store
+Persists per-session conversation state so it survives restarts and can be shared across replicas
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SESSION_DB = "lmu_sessions.db"
+DEFAULT_IDLE_TTL = 30 * 60  # seconds before an idle session is dropped from memory
+DEFAULT_EVICTION_INTERVAL = 60  # seconds between idle sweeps
+DEFAULT_RETENTION = 30 * 24 * 60 * 60  # seconds a saved session is kept in the store
+
+
+def _encode_state_value(value: Any) -> Any:
+    """JSON fallback for bounded containers kept in session state"""
+    if hasattr(value, 'to_list'):
+        return value.to_list()
+    if hasattr(value, 'items'):
+        return dict(value.items())
+    raise TypeError(f"Cannot serialize {type(value).__name__} in session state")
+
+
+def serialize_state(state: Dict[str, Any]) -> str:
+    return json.dumps(state, default=_encode_state_value, sort_keys=True)
+
+
+class SessionStore:
+    """Interface for session persistence backends"""
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def save(self, session_id: str, state: Dict[str, Any]):
+        raise NotImplementedError
+
+    def delete(self, session_id: str):
+        raise NotImplementedError
+
+    def purge_older_than(self, max_age: float) -> int:
+        """Delete sessions not updated within max_age seconds"""
+        raise NotImplementedError
+
+
+class InMemorySessionStore(SessionStore):
+    """Process-local store, useful for development and tests"""
+
+    def __init__(self):
+        self._states: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._states.get(session_id)
+        return json.loads(entry[0]) if entry else None
+
+    def save(self, session_id: str, state: Dict[str, Any]):
+        payload = serialize_state(state)
+        with self._lock:
+            self._states[session_id] = (payload, time.time())
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._states.pop(session_id, None)
+
+    def purge_older_than(self, max_age: float) -> int:
+        cutoff = time.time() - max_age
+        with self._lock:
+            expired = [sid for sid, (_, updated_at) in self._states.items() if updated_at < cutoff]
+            for session_id in expired:
+                del self._states[session_id]
+        return len(expired)
+
+
+class SQLiteSessionStore(SessionStore):
+    """SQLite-backed store running in WAL mode so readers never block the writer"""
+
+    def __init__(self, db_path: str = DEFAULT_SESSION_DB, timeout: float = 5.0):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=timeout, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)")
+        self._conn.commit()
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        if not row:
+            return None
+        try:
+            return json.loads(row[0])
+        except json.JSONDecodeError:
+            logger.error(f"Corrupt session state for {session_id}, starting fresh")
+            return None
+
+    def save(self, session_id: str, state: Dict[str, Any]):
+        payload = serialize_state(state)
+        with self._lock:
+            self._conn.execute(
+                """INSERT INTO sessions (session_id, state, updated_at) VALUES (?, ?, ?)
+                   ON CONFLICT(session_id) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at""",
+                (session_id, payload, time.time())
+            )
+            self._conn.commit()
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+
+    def purge_older_than(self, max_age: float) -> int:
+        """Delete sessions not updated within max_age seconds"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM sessions WHERE updated_at < ?", (time.time() - max_age,)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SessionManager:
+    """In-memory view of live sessions on top of a SessionStore, with idle-session eviction
+
+    Besides the persisted state, each live session can hold in-memory resources (e.g. its
+    loaded buddies); they are dropped together with the state when the session is evicted.
+    """
+
+    def __init__(self, store: SessionStore, idle_ttl: float = DEFAULT_IDLE_TTL,
+                 eviction_interval: float = DEFAULT_EVICTION_INTERVAL,
+                 retention: Optional[float] = DEFAULT_RETENTION):
+        self.store = store
+        self.idle_ttl = idle_ttl
+        self.eviction_interval = eviction_interval
+        self.retention = retention  # None keeps saved sessions forever
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        self._resources: Dict[str, Dict[str, Any]] = {}
+        self._last_access: Dict[str, float] = {}
+        self._saved_payloads: Dict[str, str] = {}
+        self._last_sweep = time.time()
+        self._lock = threading.RLock()
+        self.stats = {'loads': 0, 'saves': 0, 'evictions': 0, 'purged': 0}
+
+    def get(self, session_id: str) -> Dict[str, Any]:
+        """Get the live state for a session, loading it lazily from the store"""
+        self._maybe_evict_idle()
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                state = self.store.load(session_id) or {}
+                self.stats['loads'] += 1
+                self._sessions[session_id] = state
+                self._saved_payloads[session_id] = serialize_state(state)
+            self._last_access[session_id] = time.time()
+            return state
+
+    def resources(self, session_id: str) -> Dict[str, Any]:
+        """In-memory objects for a live session; never persisted, freed on eviction"""
+        with self._lock:
+            self._last_access[session_id] = time.time()
+            return self._resources.setdefault(session_id, {})
+
+    def save(self, session_id: str, state: Optional[Dict[str, Any]] = None):
+        """Persist a live session if it changed since the last save
+
+        Pass the state the caller holds: if the session was evicted in the meantime,
+        that state is taken back in instead of being lost.
+        """
+        with self._lock:
+            if state is None:
+                state = self._sessions.get(session_id)
+                if state is None:
+                    return
+            elif self._sessions.get(session_id) is not state:
+                self._sessions[session_id] = state
+                self._last_access[session_id] = time.time()
+            payload = serialize_state(state)
+            if payload == self._saved_payloads.get(session_id):
+                return
+            self.store.save(session_id, state)
+            self._saved_payloads[session_id] = payload
+            self.stats['saves'] += 1
+
+    def evict_idle(self) -> List[str]:
+        """Persist and drop sessions idle for longer than idle_ttl, then purge expired saved ones"""
+        cutoff = time.time() - self.idle_ttl
+        with self._lock:
+            idle = [sid for sid, last in self._last_access.items() if last < cutoff]
+            for session_id in idle:
+                try:
+                    self.save(session_id)
+                except Exception as e:
+                    logger.error(f"Error saving session {session_id} before eviction: {e}")
+                    continue
+                self._sessions.pop(session_id, None)
+                self._resources.pop(session_id, None)
+                self._last_access.pop(session_id, None)
+                self._saved_payloads.pop(session_id, None)
+                self.stats['evictions'] += 1
+            self._last_sweep = time.time()
+        if idle:
+            logger.info(f"Evicted {len(idle)} idle sessions from memory")
+        self.purge_expired()
+        return idle
+
+    def purge_expired(self) -> int:
+        """Delete saved sessions older than the retention period from the store"""
+        if self.retention is None:
+            return 0
+        try:
+            purged = self.store.purge_older_than(self.retention)
+        except NotImplementedError:
+            return 0
+        except Exception as e:
+            logger.error(f"Error purging expired sessions: {e}")
+            return 0
+        if purged:
+            self.stats['purged'] += purged
+            logger.info(f"Purged {purged} expired sessions from the store")
+        return purged
+
+    def _maybe_evict_idle(self):
+        if time.time() - self._last_sweep >= self.eviction_interval:
+            self.evict_idle()
+
+    def active_sessions(self) -> int:
+        return len(self._sessions)
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Ollama Stub Server
+Deterministic stand-in for the Ollama HTTP API so the LLM path can be load- and latency-tested
+without a live daemon or a 7B model
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from lmu_buddy_dataset import TRAINING_DATA_PATH, read_examples
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 11435  # next to Ollama's 11434 so both can run side by side
+DEFAULT_TTFT = 0.25  # seconds before the first token
+DEFAULT_TOKEN_LATENCY = 0.02  # seconds between tokens
+DEFAULT_MODELS = ["llama2:7b", "lmu-buddy:latest"]
+DEFAULT_EMBEDDING_DIM = 384
+
+
+def _words(text: str) -> List[str]:
+    return text.split()
+
+
+def _token_ids(text: str) -> List[int]:
+    """Stable fake token ids (one per word) for context arrays"""
+    return [int(hashlib.md5(word.encode('utf-8')).hexdigest()[:6], 16) for word in _words(text)]
+
+
+class StubBackend:
+    """Canned answers, simulated timing and failure injection shared by all request handlers"""
+
+    def __init__(self, ttft: float = DEFAULT_TTFT, token_latency: float = DEFAULT_TOKEN_LATENCY,
+                 error_rate: float = 0.0, stream_error_rate: float = 0.0, models: List[str] = None,
+                 seed: int = 0, training_data_path: str = TRAINING_DATA_PATH,
+                 embedding_dim: int = DEFAULT_EMBEDDING_DIM):
+        self.ttft = ttft
+        self.token_latency = token_latency
+        self.error_rate = error_rate
+        self.stream_error_rate = stream_error_rate
+        self.models = models or list(DEFAULT_MODELS)
+        self.embedding_dim = embedding_dim
+        self.answers = self._load_answers(training_data_path)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._evaluated_systems = set()  # system prompts already "in the prompt cache"
+        self.stats = {'requests': {}, 'tokens': 0, 'injected_errors': 0, 'cancelled': 0}
+
+    @staticmethod
+    def _load_answers(path: str) -> Dict[str, str]:
+        if not os.path.exists(path):
+            return {}
+        try:
+            return {" ".join(example['prompt'].lower().split()): example['response']
+                    for example in read_examples(path) if example.get('prompt') and example.get('response')}
+        except Exception as e:
+            logger.error(f"Error loading stub answers from {path}: {e}")
+            return {}
+
+    def count(self, endpoint: str):
+        with self._lock:
+            self.stats['requests'][endpoint] = self.stats['requests'].get(endpoint, 0) + 1
+
+    def roll(self, rate: float) -> bool:
+        """Deterministic (seeded) failure draw"""
+        if rate <= 0:
+            return False
+        with self._lock:
+            failed = self._random.random() < rate
+            if failed:
+                self.stats['injected_errors'] += 1
+            return failed
+
+    def answer(self, question: str) -> str:
+        # Grounded prompts end with "Question: ..."; answer the question part
+        question = question.rsplit("Question:", 1)[-1]
+        answer = self.answers.get(" ".join(question.lower().split()))
+        if answer:
+            return answer
+        return f"LMU Buddy here! 🦁 You asked about \"{question.strip()[:80]}\". Check out the Lair, the Bluff and the library 3rd floor."
+
+    def tokens(self, text: str, options: Dict[str, Any]) -> List[str]:
+        """Split an answer into streamed tokens, honouring num_predict and stop sequences"""
+        for stop in options.get('stop') or []:
+            if stop and stop in text:
+                text = text[:text.index(stop)]
+        words = _words(text)
+        if options.get('num_predict') and options['num_predict'] > 0:
+            words = words[:options['num_predict']]
+        return [word if i == 0 else f" {word}" for i, word in enumerate(words)]
+
+    def prompt_eval_count(self, system: str, prompt_text: str, context: Optional[List[int]]) -> int:
+        """Tokens the model would evaluate: the system prompt only the first time it is seen"""
+        count = len(_words(prompt_text))
+        if system and not context:
+            key = hashlib.sha1(system.encode('utf-8')).hexdigest()
+            with self._lock:
+                if key not in self._evaluated_systems:
+                    self._evaluated_systems.add(key)
+                    count += len(_words(system))
+        return count
+
+    def embedding(self, text: str) -> List[float]:
+        seed = int(hashlib.sha1(text.encode('utf-8')).hexdigest()[:8], 16)
+        generator = random.Random(seed)
+        vector = [generator.uniform(-1, 1) for _ in range(self.embedding_dim)]
+        norm = sum(v * v for v in vector) ** 0.5 or 1.0
+        return [v / norm for v in vector]
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive and chunked streaming like the real server
+    backend: StubBackend = None
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _send_json(self, status: int, body: Dict[str, Any]):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _write_chunk(self, body: Dict[str, Any]):
+        data = (json.dumps(body) + "\n").encode('utf-8')
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def _read_body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length) if length else b"{}"
+        return json.loads(raw or b"{}")
+
+    def do_GET(self):
+        if self.path.rstrip('/') == "/api/tags":
+            self.backend.count("tags")
+            models = [{
+                "name": name,
+                "model": name,
+                "size": 0,
+                "digest": hashlib.sha256(name.encode('utf-8')).hexdigest(),
+                "modified_at": datetime.now(timezone.utc).isoformat()
+            } for name in self.backend.models]
+            self._send_json(200, {"models": models})
+        else:
+            self._send_json(404, {"error": f"unknown endpoint {self.path}"})
+
+    def do_POST(self):
+        endpoint = self.path.rstrip('/').rsplit('/', 1)[-1]
+        try:
+            body = self._read_body()
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": "invalid JSON body"})
+            return
+        self.backend.count(endpoint)
+
+        if endpoint == "embeddings":
+            self._send_json(200, {"embedding": self.backend.embedding(body.get("prompt", ""))})
+            return
+        if endpoint not in ("generate", "chat"):
+            self._send_json(404, {"error": f"unknown endpoint {self.path}"})
+            return
+        if body.get("model") not in self.backend.models and f"{body.get('model')}:latest" not in self.backend.models:
+            self._send_json(404, {"error": f"model '{body.get('model')}' not found"})
+            return
+        if self.backend.roll(self.backend.error_rate):
+            self._send_json(500, {"error": "injected failure"})
+            return
+
+        self._generate(endpoint, body)
+
+    def _generate(self, endpoint: str, body: Dict[str, Any]):
+        backend = self.backend
+        options = body.get("options") or {}
+        if endpoint == "chat":
+            messages = body.get("messages") or []
+            system = next((m["content"] for m in messages if m.get("role") == "system"), "")
+            question = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+            prompt_text = " ".join(m["content"] for m in messages if m.get("role") != "system")
+            context = None
+        else:
+            system = body.get("system", "")
+            question = prompt_text = body.get("prompt", "")
+            context = body.get("context")
+
+        answer = backend.answer(question)
+        tokens = backend.tokens(answer, options)
+        prompt_eval_count = backend.prompt_eval_count(system, prompt_text, context)
+        started = time.perf_counter()
+
+        def message(text: str) -> Dict[str, Any]:
+            base = {"model": body.get("model"), "created_at": datetime.now(timezone.utc).isoformat()}
+            if endpoint == "chat":
+                base["message"] = {"role": "assistant", "content": text}
+            else:
+                base["response"] = text
+            return base
+
+        def final() -> Dict[str, Any]:
+            elapsed_ns = int((time.perf_counter() - started) * 1e9)
+            done = dict(message(""), done=True, done_reason="stop",
+                        total_duration=elapsed_ns, load_duration=0,
+                        prompt_eval_count=prompt_eval_count,
+                        prompt_eval_duration=int(backend.ttft * 1e9),
+                        eval_count=len(tokens), eval_duration=max(elapsed_ns - int(backend.ttft * 1e9), 0))
+            if endpoint == "generate":
+                done["context"] = list(context or []) + _token_ids(prompt_text) + _token_ids("".join(tokens))
+            return done
+
+        with backend._lock:
+            backend.stats['tokens'] += len(tokens)
+
+        if not body.get("stream", True):
+            time.sleep(backend.ttft + backend.token_latency * max(len(tokens) - 1, 0))
+            result = message("".join(tokens))
+            result.update({k: v for k, v in final().items() if k not in ("message", "response")})
+            self._send_json(200, result)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        fail_at = len(tokens) // 2 if backend.roll(backend.stream_error_rate) else None
+        try:
+            time.sleep(backend.ttft)
+            for i, token in enumerate(tokens):
+                if i == fail_at:
+                    self._write_chunk({"error": "injected failure mid-stream"})
+                    break
+                if i:
+                    time.sleep(backend.token_latency)
+                self._write_chunk(dict(message(token), done=False))
+            else:
+                self._write_chunk(final())
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # Client went away (e.g. a cancelled generation); stop producing tokens like Ollama does
+            with backend._lock:
+                backend.stats['cancelled'] += 1
+            self.close_connection = True
+
+
+class OllamaStubServer:
+    """Runs the stub on a background thread; use as a context manager in benchmarks"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, **backend_options):
+        self.backend = StubBackend(**backend_options)
+        handler = type("BoundStubRequestHandler", (StubRequestHandler,), {"backend": self.backend})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "OllamaStubServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="ollama-stub", daemon=True)
+        self._thread.start()
+        logger.info(f"Ollama stub listening on {self.url}")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "OllamaStubServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main():
+    """Run the stub server in the foreground"""
+    parser = argparse.ArgumentParser(description="Deterministic Ollama API stand-in for LMU Buddy testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--ttft", type=float, default=DEFAULT_TTFT, help="seconds before the first token")
+    parser.add_argument("--token-latency", type=float, default=DEFAULT_TOKEN_LATENCY, help="seconds between tokens")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with HTTP 500")
+    parser.add_argument("--stream-error-rate", type=float, default=0.0, help="fraction of streams that fail midway")
+    parser.add_argument("--model", action="append", dest="models", help="model name to serve (repeatable)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print("🦙 Ollama stub server")
+    print("=" * 50)
+    server = OllamaStubServer(args.host, args.port, ttft=args.ttft, token_latency=args.token_latency,
+                              error_rate=args.error_rate, stream_error_rate=args.stream_error_rate,
+                              models=args.models, seed=args.seed)
+    print(f"Point LMUBuddyOllamaClient(base_url=\"{server.url}\") at it. Ctrl+C to stop.")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(f"\nStats: {json.dumps(server.backend.stats)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+LMU Buddy completion cache tests
+Needs the buddy's embedding stack (sentence-transformers, scikit-learn, pandas)
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip("sentence_transformers")
+pytest.importorskip("sklearn")
+pytest.importorskip("pandas")
+
+from lmu_buddy_cache import SemanticCache
+from lmu_buddy_ollama_client import LMUBuddyOllamaClient
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def buddy(monkeypatch):
+    monkeypatch.chdir(REPO_DIR)
+    from enhanced_lmu_buddy import EnhancedLMUBuddy
+    return EnhancedLMUBuddy()
+
+
+@pytest.fixture
+def client():
+    # Nothing listens on port 9; these tests never reach a model
+    return LMUBuddyOllamaClient(base_url="http://127.0.0.1:9", completion_cache=SemanticCache())
+
+
+def test_repeated_question_hits_cache_after_topic_tracking(buddy, client):
+    question = "where should I eat"
+    buddy.generate_response(question)
+    assert buddy.user_context['favorite_topics']
+
+    cached, query = client.cached_completion(question, buddy)
+    assert cached is None and query is not None
+    client.store_completion(query, "The Lair for a quick bite, The Bluff for the sunset")
+
+    buddy.generate_response(question)
+    cached, _ = client.cached_completion(question, buddy)
+    assert cached == "The Lair for a quick bite, The Bluff for the sunset"
+
+
+def test_identified_student_skips_cache(buddy, client):
+    question = "where should I eat"
+    cached, query = client.cached_completion(question, buddy)
+    client.store_completion(query, "The Lair")
+
+    buddy.user_context['major'] = 'Film'
+    assert client.cached_completion(question, buddy) == (None, None)